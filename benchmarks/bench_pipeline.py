@@ -0,0 +1,269 @@
+"""Benchmark the pipeline offline against a fake LLM with configurable latency.
+
+Synthetic OpenAPI and Postman documents of ``--endpoints`` sizes are run
+through these scenarios:
+
+- parse: ``parse_document`` for both formats (no LLM)
+- gen-cases: test-case generation
+- gen-code-flat / gen-code-layered: code generation including validation
+- validation: ``validate_files`` on the layered output, from a cold collect
+  worker and again with a filled validation cache
+
+LLM scenarios run once per ``--jobs`` value. Every request is answered by
+``fake_llm.FakeLlm`` after ``--latency`` ± ``--jitter`` seconds, so timings
+show the pipeline's own overhead and how it scales with concurrency without
+touching a real model. Each result records wall time, the simulated LLM time
+(``ideal_seconds`` is that time divided by the jobs, a lower bound) and the
+per-stage totals of ``--stats``. Results are written as JSON; pass an earlier
+file as ``--baseline`` to print the change of every matching result.
+
+Usage: python benchmarks/bench_pipeline.py [--endpoints 100,1000] [--jobs 1,8]
+       [--latency 0.05] [--output results.json] [--baseline old.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from fake_llm import FakeLlm
+from synthetic_specs import build_openapi, build_postman
+
+from api_test_gen.generator.collect_worker import shared_worker
+from api_test_gen.generator.validation_cache import ValidationCache
+from api_test_gen.generator.validator import validate_files
+from api_test_gen.llm import LlmOptions
+from api_test_gen.pipeline import generate_code, generate_testcases, parse_document
+from api_test_gen.stats import tracing
+
+SCENARIOS = ("parse", "gen-cases", "gen-code-flat", "gen-code-layered", "validation")
+
+
+def _int_list(value: str) -> list[int]:
+    return [int(part) for part in value.split(",") if part]
+
+
+def _measure(
+    scenario: str,
+    variant: str | None,
+    endpoints: int,
+    jobs: int | None,
+    func: Callable[[], Any],
+    fake: FakeLlm | None = None,
+) -> dict[str, Any]:
+    """Time one run from a cold collect worker, under a tracer."""
+    shared_worker().close()
+    with tracing() as tracer:
+        start = time.perf_counter()
+        if fake is None:
+            func()
+        else:
+            with fake.installed():
+                func()
+        seconds = time.perf_counter() - start
+    result: dict[str, Any] = {
+        "scenario": scenario,
+        "variant": variant,
+        "endpoints": endpoints,
+        "jobs": jobs,
+        "seconds": round(seconds, 4),
+        "stages": {
+            name: {"count": stage.count, "seconds": round(stage.total_seconds, 4)}
+            for name, stage in tracer.stages().items()
+        },
+    }
+    if fake is not None:
+        result["llm_calls"] = fake.calls
+        result["llm_seconds"] = round(fake.waited, 4)
+        result["ideal_seconds"] = round(fake.waited / (jobs or 1), 4)
+    return result
+
+
+def run_size(args: argparse.Namespace, count: int, workdir: Path) -> list[dict]:
+    results = []
+    documents = {
+        "swagger": build_openapi(count, args.per_tag),
+        "postman": build_postman(count, args.per_tag),
+    }
+    paths = {}
+    for fmt, document in documents.items():
+        paths[fmt] = workdir / f"{fmt}-{count}.json"
+        paths[fmt].write_text(json.dumps(document), encoding="utf-8")
+    endpoints = parse_document(paths["swagger"], fmt="swagger")
+
+    def fake() -> FakeLlm:
+        return FakeLlm(args.latency, args.jitter, args.seed)
+
+    if "parse" in args.scenarios:
+        for fmt, path in paths.items():
+            results.append(
+                _measure(
+                    "parse",
+                    fmt,
+                    count,
+                    None,
+                    lambda p=path, f=fmt: parse_document(p, f),
+                )
+            )
+
+    # Inputs of the later stages are built with an instant fake, untimed.
+    with FakeLlm().installed():
+        testcases = generate_testcases(endpoints, llm_options=LlmOptions())
+
+    for jobs in args.jobs:
+        options = LlmOptions()
+        if "gen-cases" in args.scenarios:
+            results.append(
+                _measure(
+                    "gen-cases",
+                    None,
+                    count,
+                    jobs,
+                    lambda j=jobs, o=options: generate_testcases(
+                        endpoints, jobs=j, llm_options=o, batch_tokens=args.batch_tokens
+                    ),
+                    fake(),
+                )
+            )
+        for arch in ("flat", "layered"):
+            if f"gen-code-{arch}" in args.scenarios:
+                results.append(
+                    _measure(
+                        f"gen-code-{arch}",
+                        None,
+                        count,
+                        jobs,
+                        lambda j=jobs, a=arch, o=options: generate_code(
+                            testcases, a, endpoints=endpoints, llm_options=o, jobs=j
+                        ),
+                        fake(),
+                    )
+                )
+
+    if "validation" in args.scenarios:
+        with FakeLlm().installed():
+            files = generate_code(
+                testcases, "layered", endpoints=endpoints, llm_options=LlmOptions()
+            )
+        cache = ValidationCache()
+        results.append(
+            _measure("validation", "cold", count, None, lambda: validate_files(files))
+        )
+        validate_files(files, cache)
+        results.append(
+            _measure(
+                "validation",
+                "cached",
+                count,
+                None,
+                lambda: validate_files(files, cache),
+            )
+        )
+    return results
+
+
+def _key(result: dict[str, Any]) -> tuple:
+    return (result["scenario"], result["variant"], result["endpoints"], result["jobs"])
+
+
+def _label(result: dict[str, Any]) -> str:
+    parts = [result["scenario"]]
+    if result["variant"]:
+        parts.append(result["variant"])
+    parts.append(f"n={result['endpoints']}")
+    if result["jobs"] is not None:
+        parts.append(f"jobs={result['jobs']}")
+    return " ".join(parts)
+
+
+def _echo(result: dict[str, Any], baseline: dict[tuple, dict[str, Any]]) -> None:
+    line = f"{_label(result):<40}{result['seconds']:>10.3f}s"
+    if "ideal_seconds" in result:
+        line += f"  (ideal {result['ideal_seconds']:.3f}s, {result['llm_calls']} calls)"
+    previous = baseline.get(_key(result))
+    if previous is not None and previous["seconds"]:
+        change = result["seconds"] / previous["seconds"] - 1
+        line += f"  {change:+.1%} vs baseline"
+    print(line, file=sys.stderr)
+
+
+def _commit() -> str | None:
+    try:
+        completed = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).parent,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return completed.stdout.strip()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--endpoints", type=_int_list, default=[100])
+    parser.add_argument("--jobs", type=_int_list, default=[1, 8])
+    parser.add_argument("--per-tag", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--batch-tokens", type=int, default=None)
+    parser.add_argument(
+        "--scenarios",
+        type=lambda value: value.split(","),
+        default=list(SCENARIOS),
+        help=f"Comma-separated subset of: {', '.join(SCENARIOS)}.",
+    )
+    parser.add_argument("--output", type=Path, default=None)
+    parser.add_argument("--baseline", type=Path, default=None)
+    args = parser.parse_args()
+    # Offline: litellm would otherwise download its price list on import.
+    os.environ.setdefault("LITELLM_LOCAL_MODEL_COST_MAP", "True")
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    baseline = {}
+    if args.baseline is not None:
+        previous = json.loads(args.baseline.read_text(encoding="utf-8"))
+        baseline = {_key(result): result for result in previous["results"]}
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for count in args.endpoints:
+            for result in run_size(args, count, Path(tmpdir)):
+                _echo(result, baseline)
+                results.append(result)
+
+    report = {
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.process_cpu_count(),
+        "settings": {
+            "latency": args.latency,
+            "jitter": args.jitter,
+            "seed": args.seed,
+            "per_tag": args.per_tag,
+            "batch_tokens": args.batch_tokens,
+        },
+        "results": results,
+    }
+    document = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output is None:
+        print(document)
+    else:
+        args.output.write_text(document + "\n", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Report how many input tokens the compact endpoint JSON saves.
+
+For every document, the endpoint JSON the generators send is measured both
+ways: as the former ``model_dump_json(indent=2)`` and as rendered by
+``api_test_gen.generator.prompt_json``. Two prompt kinds are counted:
+
+- gen-cases: one prompt per endpoint (``endpoint_json``)
+- layered: the API and services prompts of every tag group
+  (``endpoints_json``, twice per tag)
+
+Tokens are the pipeline's own ``estimate_tokens`` figures. Without spec
+arguments the test fixtures are measured together with three synthetic
+documents: the CRUD OpenAPI and Postman specs of ``bench_pipeline.py`` and a
+spec of deeply nested shared ``$ref`` schemas from ``bench_ref_resolution.py``.
+
+Usage: python benchmarks/bench_prompt_tokens.py [SPEC ...] [--endpoints 100]
+       [--output report.json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any
+
+from bench_ref_resolution import build_spec
+from synthetic_specs import build_openapi, build_postman
+
+from api_test_gen.generator.naming import group_endpoints_by_tag
+from api_test_gen.generator.prompt_json import endpoint_json, endpoints_json
+from api_test_gen.parser.base import ApiEndpoint
+from api_test_gen.pipeline import parse_document
+from api_test_gen.ratelimit import estimate_tokens
+
+FIXTURES = Path(__file__).parent.parent / "tests" / "fixtures"
+
+
+def _indented(endpoints: list[ApiEndpoint]) -> str:
+    return "\n".join(endpoint.model_dump_json(indent=2) for endpoint in endpoints)
+
+
+def measure(name: str, endpoints: list[ApiEndpoint]) -> dict[str, Any]:
+    """Token totals and the largest prompt, before and after, per prompt kind."""
+    cases_before = [estimate_tokens(_indented([endpoint])) for endpoint in endpoints]
+    cases_after = [estimate_tokens(endpoint_json(endpoint)) for endpoint in endpoints]
+    groups = list(group_endpoints_by_tag(endpoints).values())
+    layered_before = [estimate_tokens(_indented(group)) for group in groups] * 2
+    layered_after = [estimate_tokens(endpoints_json(group)) for group in groups] * 2
+
+    def totals(before: list[int], after: list[int]) -> dict[str, Any]:
+        return {
+            "prompts": len(before),
+            "before": sum(before),
+            "after": sum(after),
+            "max_before": max(before, default=0),
+            "max_after": max(after, default=0),
+        }
+
+    return {
+        "spec": name,
+        "endpoints": len(endpoints),
+        "gen-cases": totals(cases_before, cases_after),
+        "layered": totals(layered_before, layered_after),
+    }
+
+
+def _specs(args: argparse.Namespace, workdir: Path) -> list[tuple[str, Path]]:
+    if args.specs:
+        return [(path.name, path) for path in args.specs]
+    specs = [
+        (path.name, path)
+        for path in sorted(FIXTURES.iterdir())
+        if path.suffix in (".yaml", ".yml", ".json")
+    ]
+    synthetic = {
+        f"crud-openapi-{args.endpoints}": build_openapi(args.endpoints),
+        f"crud-postman-{args.endpoints}": build_postman(args.endpoints),
+        "nested-refs": build_spec(paths=20, levels=4, width=5, fanout=2),
+    }
+    for name, document in synthetic.items():
+        path = workdir / f"{name}.json"
+        path.write_text(json.dumps(document), encoding="utf-8")
+        specs.append((name, path))
+    return specs
+
+
+def _echo(result: dict[str, Any]) -> None:
+    for kind in ("gen-cases", "layered"):
+        totals = result[kind]
+        saved = 1 - totals["after"] / totals["before"] if totals["before"] else 0.0
+        print(
+            f"{result['spec']:<28}{kind:<11}{totals['prompts']:>6}"
+            f"{totals['before']:>11}{totals['after']:>10}{saved:>9.1%}"
+            f"{totals['max_before']:>10}{totals['max_after']:>10}",
+            file=sys.stderr,
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("specs", nargs="*", type=Path)
+    parser.add_argument("--endpoints", type=int, default=100)
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+    # Offline: litellm would otherwise download its price list on import.
+    os.environ.setdefault("LITELLM_LOCAL_MODEL_COST_MAP", "True")
+
+    print(
+        f"{'spec':<28}{'prompts':<11}{'count':>6}{'before':>11}{'after':>10}"
+        f"{'saved':>9}{'max bef.':>10}{'max aft.':>10}",
+        file=sys.stderr,
+    )
+    results = []
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for name, path in _specs(args, Path(tmpdir)):
+            if path.suffix == ".md":
+                continue  # the Markdown parser needs a model
+            result = measure(name, parse_document(path))
+            _echo(result)
+            results.append(result)
+
+    if args.output is not None:
+        document = json.dumps({"results": results}, indent=2, ensure_ascii=False)
+        args.output.write_text(document + "\n", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Benchmark local $ref resolution on a synthetic spec with shared schemas.
+
+The generated spec has ``--levels`` layers of component schemas; every schema
+references ``--fanout`` schemas of the next layer, so the deepest schemas are
+shared by almost everything above them. Each path references top-layer
+schemas from its parameters, request body and responses.
+
+Usage: python benchmarks/bench_ref_resolution.py [--paths 200] [--levels 6]
+"""
+
+import argparse
+import json
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any
+
+from api_test_gen.parser.swagger import parse_openapi
+
+
+def build_spec(paths: int, levels: int, width: int, fanout: int) -> dict[str, Any]:
+    schemas: dict[str, Any] = {}
+    for level in range(levels):
+        for index in range(width):
+            properties: dict[str, Any] = {
+                "id": {"type": "integer", "minimum": 1},
+                "label": {"type": "string", "maxLength": 64},
+            }
+            if level + 1 < levels:
+                for offset in range(fanout):
+                    child = f"L{level + 1}S{(index + offset) % width}"
+                    properties[f"child{offset}"] = {
+                        "$ref": f"#/components/schemas/{child}"
+                    }
+                properties["items"] = {
+                    "type": "array",
+                    "items": {"$ref": f"#/components/schemas/L{level + 1}S{index}"},
+                }
+            schemas[f"L{level}S{index}"] = {"type": "object", "properties": properties}
+
+    def top(index: int) -> dict[str, str]:
+        return {"$ref": f"#/components/schemas/L0S{index % width}"}
+
+    path_items: dict[str, Any] = {}
+    for index in range(paths):
+        response = {
+            "description": "OK",
+            "content": {"application/json": {"schema": top(index + 1)}},
+        }
+        path_items[f"/resources{index}/{{id}}"] = {
+            "parameters": [{"$ref": "#/components/parameters/Id"}],
+            "get": {"responses": {"200": response}},
+            "put": {
+                "requestBody": {
+                    "content": {"application/json": {"schema": top(index)}}
+                },
+                "responses": {"200": response},
+            },
+        }
+    return {
+        "openapi": "3.0.0",
+        "info": {"title": "Synthetic", "version": "1.0.0"},
+        "paths": path_items,
+        "components": {
+            "schemas": schemas,
+            "parameters": {
+                "Id": {
+                    "name": "id",
+                    "in": "path",
+                    "required": True,
+                    "schema": {"type": "integer"},
+                }
+            },
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--paths", type=int, default=200)
+    parser.add_argument("--levels", type=int, default=6)
+    parser.add_argument("--width", type=int, default=20)
+    parser.add_argument("--fanout", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--memory", action="store_true", help="Also report peak traced memory."
+    )
+    args = parser.parse_args()
+
+    spec = build_spec(args.paths, args.levels, args.width, args.fanout)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        spec_path = Path(tmpdir) / "synthetic.json"
+        spec_path.write_text(json.dumps(spec), encoding="utf-8")
+        size_mb = spec_path.stat().st_size / 1024 / 1024
+
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            endpoints = parse_openapi(spec_path)
+            timings.append(time.perf_counter() - start)
+
+        print(f"spec: {size_mb:.2f} MB, {len(endpoints)} endpoints")
+        print(f"parse: best {min(timings):.3f}s over {args.repeat} runs")
+
+        if args.memory:
+            tracemalloc.start()
+            parse_openapi(spec_path)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"peak traced memory: {peak / 1024 / 1024:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Benchmark syntax and YAML validation of a large synthetic layered output.
+
+The output mimics ``--arch layered`` for ``--tags`` tags: an API class, a
+service flow, a test module with ``--cases`` tests and a YAML data file per
+tag, so ``--tags 500`` yields 2,000 files. Each check runs in-process and on
+the process pool; the pool is started before timing, as it is shared by every
+validation round of a run.
+
+Usage: python benchmarks/bench_validation.py [--tags 500] [--workers N]
+"""
+
+import argparse
+import os
+import time
+
+from api_test_gen.generator.validator import validate_python, validate_yaml
+
+
+def build_files(tags: int, cases: int) -> dict[str, str]:
+    files: dict[str, str] = {}
+    for index in range(tags):
+        tag = f"resource{index}"
+        cls = f"Resource{index}"
+        methods = "".join(
+            f"""
+    def op{case}(self, payload: dict | None = None, **params):
+        response = self.client.request(
+            "POST", f"/{tag}/{case}", json=payload, params=params
+        )
+        return response.json() if response.content else None
+"""
+            for case in range(cases)
+        )
+        files[f"api/{tag}_api.py"] = (
+            f"from base.client import ApiClient\n\n\nclass {cls}Api:\n"
+            f"    def __init__(self, client: ApiClient):\n"
+            f"        self.client = client\n{methods}"
+        )
+        files[f"services/{tag}_flow.py"] = (
+            f"from api.{tag}_api import {cls}Api\n\n\n"
+            f"def create_and_fetch(api: {cls}Api, payload: dict) -> dict:\n"
+            f"    created = api.op0(payload)\n"
+            f"    return api.op1(created, id=created['id'])\n"
+        )
+        tests = "".join(
+            f"""
+    @pytest.mark.parametrize("case", DATA["case{case}"])
+    def test_case{case}(self, api, case):
+        result = api.op{case}(case["input"])
+        assert result["status"] == case["expected_status"], result
+"""
+            for case in range(cases)
+        )
+        files[f"tests/test_{tag}.py"] = (
+            f"import pytest\nimport yaml\n\nfrom api.{tag}_api import {cls}Api\n\n"
+            f'DATA = yaml.safe_load(open("data/{tag}.yaml"))\n\n\n'
+            f"class Test{cls}:\n{tests}"
+        )
+        files[f"data/{tag}.yaml"] = "".join(
+            f"case{case}:\n"
+            f"  - input: {{name: item{case}, tags: [a, b], nested: {{x: 1}}}}\n"
+            f"    expected_status: 200\n"
+            f"  - input: {{name: ''}}\n"
+            f"    expected_status: 400\n"
+            for case in range(cases)
+        )
+    return files
+
+
+def best_of(repeat: int, func) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tags", type=int, default=500)
+    parser.add_argument("--cases", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=os.process_cpu_count() or 1)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    files = build_files(args.tags, args.cases)
+    size_mb = sum(len(content) for content in files.values()) / 1024 / 1024
+    print(f"output: {len(files)} files, {size_mb:.1f} MB")
+
+    def check(workers: int) -> None:
+        validate_python(files, workers=workers)
+        validate_yaml(files, workers=workers)
+
+    start = time.perf_counter()
+    check(args.workers)
+    print(
+        f"pool start + first run ({args.workers} workers): "
+        f"{time.perf_counter() - start:.3f}s"
+    )
+
+    serial = best_of(args.repeat, lambda: check(1))
+    pooled = best_of(args.repeat, lambda: check(args.workers))
+    print(f"in-process: best {serial:.3f}s over {args.repeat} runs")
+    print(f"pool ({args.workers} workers): best {pooled:.3f}s over {args.repeat} runs")
+    print(f"speedup: {serial / pooled:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""Deterministic stand-in for the model behind ``LlmClient``.
+
+:class:`FakeLlm` replaces ``api_test_gen.llm.completion`` (and its async
+twin), so requests still pass through the real client, rate limiter, response
+cache and spans; only the network round trip is simulated. Each request
+sleeps for ``latency`` seconds plus up to ``jitter`` either way, drawn from a
+generator seeded by the prompt, so the same request always waits the same
+time regardless of thread scheduling. Responses are canned but valid: drafts
+satisfy the test-case schema and generated modules import, collect and pass
+the reference checks, so no repair rounds are triggered.
+"""
+
+import asyncio
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from types import SimpleNamespace
+from typing import Any
+from unittest.mock import patch
+
+from api_test_gen.ratelimit import estimate_tokens
+
+_TAG = re.compile(r"tag '([^']+)'")
+_FILENAME = re.compile(r"Generate the contents of (\S+)")
+_BATCH_KEY = re.compile(r"^### ([A-Z]+ \S+)$", re.MULTILINE)
+_ENDPOINT_PATH = re.compile(r'"path":\s*"([^"]+)"')
+
+
+class FakeLlm:
+    """Canned completions after a seeded, configurable delay."""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.seed = seed
+        self.calls = 0
+        self.waited = 0.0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def installed(self) -> Iterator["FakeLlm"]:
+        """Serve every ``LlmClient`` request from this fake inside the block."""
+        with (
+            patch("api_test_gen.llm.completion", self.completion),
+            patch("api_test_gen.llm.acompletion", self.acompletion),
+        ):
+            yield self
+
+    def completion(self, **request: Any) -> SimpleNamespace:
+        system, user = _prompts(request)
+        time.sleep(self._wait(system, user))
+        return self._response(system, user)
+
+    async def acompletion(self, **request: Any) -> SimpleNamespace:
+        system, user = _prompts(request)
+        await asyncio.sleep(self._wait(system, user))
+        return self._response(system, user)
+
+    def _wait(self, system: str, user: str) -> float:
+        """Count the request and return its simulated latency."""
+        digest = hashlib.sha256(f"{self.seed}\0{system}\0{user}".encode()).digest()
+        rng = random.Random(digest)
+        delay = max(0.0, self.latency + rng.uniform(-self.jitter, self.jitter))
+        with self._lock:
+            self.calls += 1
+            self.waited += delay
+        return delay
+
+    def _response(self, system: str, user: str) -> SimpleNamespace:
+        content = respond(user)
+        prompt_tokens = estimate_tokens(system, user)
+        completion_tokens = estimate_tokens(content)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+            usage=SimpleNamespace(
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                total_tokens=prompt_tokens + completion_tokens,
+            ),
+            # Keeps traced runs from pricing the call (and importing litellm).
+            _hidden_params={"response_cost": 0.0},
+        )
+
+
+def respond(user: str) -> str:
+    """Return a valid answer to one of the pipeline's user prompts."""
+    if user.startswith("请为以下接口生成测试用例"):
+        return _fenced("json", json.dumps(_drafts(), ensure_ascii=False))
+    if user.startswith("请为以下 "):
+        batch = {key: _drafts() for key in _BATCH_KEY.findall(user)}
+        return _fenced("json", json.dumps(batch, ensure_ascii=False))
+    if match := _FILENAME.search(user):
+        return _fenced("python", _flat_test(match.group(1)))
+
+    match = _TAG.search(user)
+    if match is None:
+        raise ValueError(f"FakeLlm has no canned answer for: {user[:80]!r}")
+    tag = match.group(1)
+    if "生成封装类" in user:
+        return _fenced("python", _api_layer(tag, _ENDPOINT_PATH.findall(user)))
+    if "提取测试数据" in user:
+        return _fenced("yaml", _data_layer(user))
+    if "生成业务编排类" in user:
+        return _fenced("python", _services_layer(tag))
+    if "生成测试代码" in user:
+        return _fenced("python", _tests_layer(tag))
+    raise ValueError(f"FakeLlm has no canned answer for tag {tag!r}")
+
+
+def _prompts(request: dict[str, Any]) -> tuple[str, str]:
+    system, user = request["messages"]
+    content = system["content"]
+    if isinstance(content, list):
+        content = "".join(block["text"] for block in content)
+    return content, user["content"]
+
+
+def _fenced(language: str, body: str) -> str:
+    return f"```{language}\n{body}\n```"
+
+
+def _drafts() -> list[dict[str, Any]]:
+    return [
+        {
+            "scenario": "正常请求返回成功",
+            "input": {"page": 1},
+            "expected_status": 200,
+            "expected_response": "返回资源数据",
+            "priority": "P0",
+        },
+        {
+            "scenario": "缺少必填参数",
+            "input": {},
+            "expected_status": 400,
+            "expected_response": "返回参数错误",
+            "priority": "P1",
+        },
+        {
+            "scenario": "资源不存在",
+            "input": {"id": 0},
+            "expected_status": 404,
+            "expected_response": "返回未找到",
+            "priority": "P2",
+        },
+    ]
+
+
+def _class_name(tag: str) -> str:
+    # Mirrors the fixtures LayeredCodeGenerator renders into tests/conftest.py.
+    return tag.title().replace("_", "") + "Api"
+
+
+def _flat_test(filename: str) -> str:
+    name = filename.removesuffix(".py")
+    return f"""import requests
+
+
+def {name}_returns_success(base_url, auth_headers):
+    response = requests.get(f"{{base_url}}/health", headers=auth_headers, timeout=5)
+    assert response.status_code == 200
+"""
+
+
+def _api_layer(tag: str, paths: list[str]) -> str:
+    methods = "".join(
+        f"""
+    def call_{index}(self, **kwargs):
+        return self.client.get("{path}", **kwargs)
+"""
+        for index, path in enumerate(paths)
+    )
+    return f"""from base.client import HttpClient
+
+
+class {_class_name(tag)}:
+    def __init__(self, client: HttpClient):
+        self.client = client
+{methods}"""
+
+
+def _data_layer(user: str) -> str:
+    cases = re.findall(r"\| (TC-\d+) \|", user) or ["TC-001"]
+    return "".join(
+        f"{case}:\n  input: {{page: 1}}\n  expected_status: 200\n" for case in cases
+    )
+
+
+def _services_layer(tag: str) -> str:
+    cls = _class_name(tag)
+    return f"""from api.{tag}_api import {cls}
+
+
+class {cls.removesuffix("Api")}Flow:
+    def __init__(self, api: {cls}):
+        self.api = api
+"""
+
+
+def _tests_layer(tag: str) -> str:
+    return f"""class Test{_class_name(tag)}:
+    def test_client_is_configured(self, {tag}_api):
+        assert {tag}_api.client is not None
+"""
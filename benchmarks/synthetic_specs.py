@@ -0,0 +1,172 @@
+"""Synthetic OpenAPI and Postman documents of any size.
+
+Endpoints come in CRUD groups of five per resource (list, create, get,
+update, delete) with query, path and header parameters, a shared request
+schema and typed responses, so every parser branch the real documents hit is
+exercised. ``per_tag`` endpoints share a tag (an OpenAPI tag or a Postman
+folder), which sets the number of layered tag groups.
+"""
+
+from collections.abc import Iterator
+from typing import Any
+
+_OPERATIONS = (
+    ("get", "", "List"),
+    ("post", "", "Create"),
+    ("get", "/{id}", "Get"),
+    ("put", "/{id}", "Update"),
+    ("delete", "/{id}", "Delete"),
+)
+
+
+def _endpoints(count: int, per_tag: int) -> Iterator[tuple[int, str, str, str, str]]:
+    """Yield (index, method, path, summary, tag) for ``count`` endpoints."""
+    for index in range(count):
+        resource, operation = divmod(index, len(_OPERATIONS))
+        method, suffix, verb = _OPERATIONS[operation]
+        yield (
+            index,
+            method,
+            f"/resources{resource}{suffix}",
+            f"{verb} resource {resource}",
+            f"group{index // per_tag}",
+        )
+
+
+def build_openapi(count: int, per_tag: int = 10) -> dict[str, Any]:
+    """Build an OpenAPI 3 document with ``count`` endpoints."""
+    paths: dict[str, Any] = {}
+    for _, method, path, summary, tag in _endpoints(count, per_tag):
+        operation: dict[str, Any] = {
+            "tags": [tag],
+            "summary": summary,
+            "parameters": [{"$ref": "#/components/parameters/RequestId"}],
+            "responses": {
+                "200": {
+                    "description": "OK",
+                    "content": {
+                        "application/json": {
+                            "schema": {"$ref": "#/components/schemas/Resource"}
+                        }
+                    },
+                },
+                "404": {"description": "Not found"},
+            },
+        }
+        if path.endswith("{id}"):
+            operation["parameters"].append({"$ref": "#/components/parameters/Id"})
+        elif method == "get":
+            operation["parameters"].extend(
+                [
+                    {"name": "page", "in": "query", "schema": {"type": "integer"}},
+                    {"name": "size", "in": "query", "schema": {"type": "integer"}},
+                ]
+            )
+        if method in ("post", "put"):
+            operation["requestBody"] = {
+                "required": True,
+                "content": {
+                    "application/json": {
+                        "schema": {"$ref": "#/components/schemas/ResourceInput"}
+                    }
+                },
+            }
+        paths.setdefault(path, {})[method] = operation
+
+    return {
+        "openapi": "3.0.0",
+        "info": {"title": "Synthetic", "version": "1.0.0"},
+        "paths": paths,
+        "components": {
+            "parameters": {
+                "Id": {
+                    "name": "id",
+                    "in": "path",
+                    "required": True,
+                    "schema": {"type": "integer", "minimum": 1},
+                },
+                "RequestId": {
+                    "name": "X-Request-ID",
+                    "in": "header",
+                    "schema": {"type": "string"},
+                },
+            },
+            "schemas": {
+                "ResourceInput": {
+                    "type": "object",
+                    "required": ["name"],
+                    "properties": {
+                        "name": {"type": "string", "maxLength": 64},
+                        "labels": {"type": "array", "items": {"type": "string"}},
+                    },
+                },
+                "Resource": {
+                    "allOf": [
+                        {"$ref": "#/components/schemas/ResourceInput"},
+                        {
+                            "type": "object",
+                            "properties": {"id": {"type": "integer"}},
+                        },
+                    ]
+                },
+            },
+        },
+    }
+
+
+def build_postman(count: int, per_tag: int = 10) -> dict[str, Any]:
+    """Build a Postman v2.1 collection with ``count`` requests in tag folders."""
+    folders: dict[str, list[dict[str, Any]]] = {}
+    for index, method, path, summary, tag in _endpoints(count, per_tag):
+        segments = [
+            ":id" if segment == "{id}" else segment
+            for segment in path.strip("/").split("/")
+        ]
+        url: dict[str, Any] = {
+            "raw": "{{base_url}}/" + "/".join(segments),
+            "host": ["{{base_url}}"],
+            "path": segments,
+        }
+        if ":id" in segments:
+            url["variable"] = [{"key": "id", "value": str(index + 1)}]
+        elif method == "get":
+            url["query"] = [
+                {"key": "page", "value": "1"},
+                {"key": "size", "value": "20"},
+            ]
+        request: dict[str, Any] = {
+            "method": method.upper(),
+            "header": [{"key": "X-Request-ID", "value": f"req-{index}"}],
+            "url": url,
+        }
+        if method in ("post", "put"):
+            request["body"] = {
+                "mode": "raw",
+                "raw": '{"name": "item", "labels": ["a", "b"]}',
+                "options": {"raw": {"language": "json"}},
+            }
+        folders.setdefault(tag, []).append(
+            {
+                "name": summary,
+                "request": request,
+                "response": [
+                    {
+                        "name": "OK",
+                        "code": 200,
+                        "body": f'{{"id": {index + 1}, "name": "item"}}',
+                    }
+                ],
+            }
+        )
+
+    return {
+        "info": {
+            "name": "Synthetic",
+            "schema": "https://schema.getpostman.com/json/collection/v2.1.0/collection.json",
+        },
+        "auth": {
+            "type": "bearer",
+            "bearer": [{"key": "token", "value": "{{token}}", "type": "string"}],
+        },
+        "item": [{"name": tag, "item": items} for tag, items in folders.items()],
+    }
@@ -0,0 +1,121 @@
+"""Content-addressed on-disk cache for LLM responses.
+
+Entries are plain text files named by the SHA-256 of the request that produced
+them, so an unchanged spec, skill set and prompt template resolve to the same
+files on every run. The total size is capped; when a write pushes the cache over
+its limit, the least recently used entries (by modification time, refreshed on
+every hit) are evicted first.
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+EVICTION_TARGET_RATIO = 0.9
+
+
+def default_cache_dir() -> Path:
+    """Return the per-user cache directory, honouring ``XDG_CACHE_HOME``."""
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "api-test-gen"
+
+
+def cache_key(*parts: str) -> str:
+    """Hash request parts into a stable key; parts are length-prefixed."""
+    digest = hashlib.sha256()
+    for part in parts:
+        encoded = part.encode("utf-8")
+        digest.update(f"{len(encoded)}:".encode("ascii"))
+        digest.update(encoded)
+    return digest.hexdigest()
+
+
+class ResponseCache:
+    """Size-capped LRU cache of response texts stored under one directory."""
+
+    def __init__(self, directory: Path, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._size: int | None = None
+
+    def get(self, key: str) -> str | None:
+        """Return the cached text for key and mark it as recently used."""
+        path = self._path(key)
+        try:
+            text = path.read_text(encoding="utf-8")
+            os.utime(path)
+        except (FileNotFoundError, UnicodeDecodeError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return text
+
+    def put(self, key: str, text: str) -> None:
+        """Store text under key atomically, evicting old entries if needed."""
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = text.encode("utf-8")
+        previous = path.stat().st_size if path.exists() else 0
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(data)
+            os.replace(tmp_name, path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+        with self._lock:
+            if self._size is None:
+                self._size = self._scan_size()
+            else:
+                self._size += len(data) - previous
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def discard(self, key: str) -> None:
+        """Remove an entry, e.g. when its response turned out to be unusable."""
+        path = self._path(key)
+        try:
+            size = path.stat().st_size
+            path.unlink()
+        except FileNotFoundError:
+            return
+        with self._lock:
+            if self._size is not None:
+                self._size -= size
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.txt"
+
+    def _entries(self) -> list[tuple[float, int, Path]]:
+        entries = []
+        for path in self.directory.glob("*/*.txt"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _scan_size(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def _evict(self) -> None:
+        target = int(self.max_bytes * EVICTION_TARGET_RATIO)
+        entries = sorted(self._entries(), key=lambda entry: entry[0])
+        size = sum(entry_size for _, entry_size, _ in entries)
+        for _, entry_size, path in entries:
+            if size <= target:
+                break
+            path.unlink(missing_ok=True)
+            size -= entry_size
+        self._size = size
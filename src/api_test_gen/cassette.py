@@ -0,0 +1,142 @@
+"""Recorded LLM traffic for offline, reproducible runs.
+
+A cassette is a JSON Lines file: a header line with the format version, then
+one line per distinct request holding the request key (the same hash the
+response cache uses: model, system prompt and user prompt), the model, the
+response text and its token counts. Prompts themselves are not stored, which
+keeps a 600-endpoint run down to the size of its responses.
+
+Recording appends and flushes each response as it arrives, so an interrupted
+run keeps everything received so far. Replaying serves responses from memory
+without touching the network, the rate limiter or the response cache; a
+request the cassette lacks is an error rather than a silent model call.
+"""
+
+import json
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, Self
+
+CASSETTE_FORMAT_VERSION = 1
+
+
+class CassetteError(ValueError):
+    """Raised when a cassette file cannot be read."""
+
+
+@dataclass(frozen=True)
+class CassetteEntry:
+    """One recorded response."""
+
+    response: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+
+class Cassette:
+    """Responses being recorded to, or replayed from, one cassette file."""
+
+    def __init__(
+        self,
+        path: Path,
+        replaying: bool,
+        entries: dict[str, CassetteEntry] | None = None,
+    ):
+        self.path = path
+        self.replaying = replaying
+        self.recorded = 0
+        self.replayed = 0
+        self._entries = entries or {}
+        self._lock = threading.Lock()
+        self._handle: IO[str] | None = None
+
+    @classmethod
+    def record(cls, path: Path) -> Self:
+        """Start a new cassette at ``path``, replacing any earlier recording."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        cassette = cls(path, replaying=False)
+        cassette._handle = path.open("w", encoding="utf-8")
+        cassette._write({"version": CASSETTE_FORMAT_VERSION})
+        return cassette
+
+    @classmethod
+    def replay(cls, path: Path) -> Self:
+        """Load a recorded cassette.
+
+        A torn last line left by an interrupted recording is ignored.
+
+        Raises:
+            CassetteError: if the file is missing, not a cassette, or has a
+                malformed line before its last one.
+        """
+        try:
+            lines = path.read_text(encoding="utf-8").splitlines()
+        except (OSError, UnicodeDecodeError) as error:
+            raise CassetteError(f"Cannot read cassette {path}: {error}") from error
+        try:
+            header = json.loads(lines[0]) if lines else None
+        except json.JSONDecodeError:
+            header = None
+        if not isinstance(header, dict) or "version" not in header:
+            raise CassetteError(f"{path} is not a cassette file")
+        if header["version"] != CASSETTE_FORMAT_VERSION:
+            raise CassetteError(
+                f"Cassette {path} has format version {header['version']}, "
+                f"expected {CASSETTE_FORMAT_VERSION}; record it again"
+            )
+
+        entries = {}
+        for number, line in enumerate(lines[1:], start=2):
+            try:
+                data = json.loads(line)
+                entries[data["key"]] = CassetteEntry(
+                    response=data["response"],
+                    prompt_tokens=data.get("prompt_tokens", 0),
+                    completion_tokens=data.get("completion_tokens", 0),
+                )
+            except (json.JSONDecodeError, KeyError, TypeError) as error:
+                if number == len(lines):
+                    break
+                raise CassetteError(
+                    f"Cassette {path} is corrupted at line {number}; record it again"
+                ) from error
+        return cls(path, replaying=True, entries=entries)
+
+    def get(self, key: str) -> CassetteEntry | None:
+        """Return the recorded response for a request key, if there is one."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            with self._lock:
+                self.replayed += 1
+        return entry
+
+    def put(self, key: str, model: str, entry: CassetteEntry) -> None:
+        """Record a response; repeated requests are stored once."""
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = entry
+            self.recorded += 1
+            self._write(
+                {
+                    "key": key,
+                    "model": model,
+                    "response": entry.response,
+                    "prompt_tokens": entry.prompt_tokens,
+                    "completion_tokens": entry.completion_tokens,
+                }
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            if self._handle is not None:
+                self._handle.close()
+                self._handle = None
+
+    def _write(self, data: dict) -> None:
+        if self._handle is None:
+            raise ValueError(f"Cassette {self.path} is closed")
+        line = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+        self._handle.write(line + "\n")
+        self._handle.flush()
@@ -1,17 +1,29 @@
 """CLI entry point for api-test-gen."""
 
+import functools
+import json
+from collections.abc import Callable, Iterator
 from pathlib import Path
 
 import click
 
+from api_test_gen.cache import DEFAULT_MAX_BYTES, ResponseCache, default_cache_dir
+from api_test_gen.cassette import Cassette, CassetteError
+from api_test_gen.generator.checkpoint import CheckpointJournal, journal_path
 from api_test_gen.generator.common import GenerationError
+from api_test_gen.generator.manifest import MANIFEST_FILENAME, load_manifest
 from api_test_gen.generator.testcase_document import (
     next_case_index,
     parse_testcase_document,
 )
-from api_test_gen.llm import LlmError
+from api_test_gen.generator.validation_cache import (
+    VALIDATION_CACHE_SUBDIR,
+    ValidationCache,
+)
+from api_test_gen.llm import LlmError, LlmOptions
 from api_test_gen.output import (
     OutputError,
+    StreamingTextWriter,
     WriteResult,
     write_generated_files,
     write_text,
@@ -19,11 +31,18 @@ from api_test_gen.output import (
 from api_test_gen.parser.base import ApiEndpoint
 from api_test_gen.pipeline import (
     DocumentParseError,
+    IncrementalPlan,
     filter_endpoints,
     generate_code,
     generate_testcases,
+    generate_testcases_incremental,
     parse_document,
+    plan_incremental,
+    reusable_code_files,
+    stream_testcases,
 )
+from api_test_gen.ratelimit import RateLimiter, RateLimits
+from api_test_gen.stats import tracing
 
 
 @click.group()
@@ -31,6 +50,150 @@ def main():
     """Generate test cases and automation code from API docs."""
 
 
+def _llm_settings(command: Callable) -> Callable:
+    """Attach the LLM runtime options shared by every generating command."""
+    options = [
+        click.option(
+            "--no-cache",
+            is_flag=True,
+            default=False,
+            help="Always call the LLM instead of reusing cached responses.",
+        ),
+        click.option(
+            "--cache-dir",
+            default=None,
+            type=click.Path(file_okay=False, path_type=Path),
+            help="Directory for cached LLM responses.",
+        ),
+        click.option(
+            "--cache-max-mb",
+            default=DEFAULT_MAX_BYTES // (1024 * 1024),
+            type=click.IntRange(min=1),
+            help="Size cap for the response cache; oldest entries are evicted.",
+        ),
+        click.option(
+            "--rpm",
+            default=None,
+            type=click.IntRange(min=1),
+            help="Requests-per-minute budget for each model.",
+        ),
+        click.option(
+            "--tpm",
+            default=None,
+            type=click.IntRange(min=1),
+            help="Tokens-per-minute budget for each model.",
+        ),
+        click.option(
+            "--max-concurrency",
+            default=None,
+            type=click.IntRange(min=1),
+            help="Upper bound for in-flight requests per model; lowered on 429.",
+        ),
+        click.option(
+            "--record",
+            default=None,
+            type=click.Path(dir_okay=False, path_type=Path),
+            help="Save every LLM response to this cassette file for --replay.",
+        ),
+        click.option(
+            "--replay",
+            default=None,
+            type=click.Path(exists=True, dir_okay=False, path_type=Path),
+            help="Serve LLM responses from a recorded cassette, without network "
+            "access; requests it lacks fail.",
+        ),
+    ]
+    for option in reversed(options):
+        command = option(command)
+    return command
+
+
+def _instrumented(command: Callable) -> Callable:
+    """Add ``--stats``/``--trace`` and run the command under a tracer if asked."""
+
+    @functools.wraps(command)
+    def wrapper(*args, stats: bool, trace: Path | None, **kwargs):
+        with tracing(enabled=stats or trace is not None) as tracer:
+            try:
+                return command(*args, **kwargs)
+            finally:
+                if tracer is not None:
+                    if stats:
+                        click.echo(tracer.report(), err=True)
+                    if trace is not None:
+                        tracer.write_trace(trace)
+                        click.echo(f"Trace saved to {trace}", err=True)
+
+    options = [
+        click.option(
+            "--stats",
+            is_flag=True,
+            default=False,
+            help="Print time per stage and tokens and cost per model to stderr.",
+        ),
+        click.option(
+            "--trace",
+            default=None,
+            type=click.Path(dir_okay=False, path_type=Path),
+            help="Write a Chrome trace-event JSON file of every timed span.",
+        ),
+    ]
+    for option in reversed(options):
+        wrapper = option(wrapper)
+    return wrapper
+
+
+@main.command()
+@click.argument("doc_path", type=click.Path(exists=True, path_type=Path))
+@click.option(
+    "-o",
+    "--output",
+    default=None,
+    type=click.Path(path_type=Path),
+    help="Write the endpoints JSON to this file instead of stdout.",
+)
+@click.option("--model", default=None, help="LLM model to use (markdown only).")
+@click.option(
+    "--format",
+    "fmt",
+    default="auto",
+    type=click.Choice(["auto", "swagger", "postman", "markdown"]),
+    help="Document format.",
+)
+@click.option(
+    "--filter",
+    "filters",
+    multiple=True,
+    help="Filter endpoints by pattern, e.g. 'POST /pets' or '/pets/*'.",
+)
+@_llm_settings
+@_instrumented
+def parse(
+    doc_path: Path,
+    output: Path | None,
+    model: str | None,
+    fmt: str,
+    filters: tuple[str, ...],
+    **llm_settings,
+):
+    """Parse API documentation and dump the normalized endpoints as JSON."""
+    llm_options = _build_llm_options(**llm_settings)
+    endpoints = _load_endpoints(
+        doc_path, fmt, model, filters, llm_options, to_stderr=output is None
+    )
+    document = json.dumps(
+        [endpoint.model_dump(mode="json") for endpoint in endpoints],
+        ensure_ascii=False,
+        indent=2,
+    )
+    if output is None:
+        click.echo(document)
+    else:
+        write_text(output, document + "\n")
+        click.echo(f"Endpoints saved to {output}")
+    _echo_llm_summary(llm_options, err=output is None)
+
+
 @main.command()
 @click.argument("doc_path", type=click.Path(exists=True, path_type=Path))
 @click.option(
@@ -67,6 +230,27 @@ def main():
     default=False,
     help="Append to existing file instead of overwriting.",
 )
+@click.option(
+    "--jobs",
+    default=1,
+    type=click.IntRange(min=1),
+    help="Number of concurrent LLM requests for test-case generation.",
+)
+@click.option(
+    "--batch-tokens",
+    default=None,
+    type=click.IntRange(min=1),
+    help="Pack endpoints with the same skills into one request up to this many "
+    "estimated tokens of endpoint JSON.",
+)
+@click.option(
+    "--resume",
+    is_flag=True,
+    default=False,
+    help="Reuse endpoints finished by an interrupted earlier attempt.",
+)
+@_llm_settings
+@_instrumented
 def gen_cases(
     doc_path: Path,
     output: Path,
@@ -75,16 +259,39 @@ def gen_cases(
     fmt: str,
     filters: tuple[str, ...],
     append_mode: bool,
+    jobs: int,
+    batch_tokens: int | None,
+    resume: bool,
+    **llm_settings,
 ):
     """Generate a test-case document from API documentation."""
-    endpoints = _load_endpoints(doc_path, fmt, model, filters)
+    llm_options = _build_llm_options(**llm_settings)
+    endpoints = _load_endpoints(doc_path, fmt, model, filters, llm_options)
     click.echo(f"Generating test cases (depth: {depth})...")
     appended = append_mode and output.exists()
     start_index = _append_start_index(output, append_mode, endpoints)
-    testcases = _generate_testcases(endpoints, depth, model, start_index)
-    write_text(output, testcases, append=append_mode)
+    journal = CheckpointJournal.start(journal_path(output), resume=resume)
+    try:
+        with StreamingTextWriter(output, append=append_mode) as writer:
+            sections = _stream_testcases(
+                endpoints,
+                depth,
+                model,
+                start_index,
+                jobs,
+                llm_options,
+                batch_tokens,
+                journal,
+            )
+            for position, section in enumerate(sections):
+                writer.write(f"\n\n{section}" if position else section)
+    finally:
+        journal.close()
+    journal.discard()
     action = "appended to" if appended else "saved to"
     click.echo(f"Test cases {action} {output}")
+    _echo_resumed(journal)
+    _echo_llm_summary(llm_options)
 
 
 @main.command()
@@ -123,6 +330,14 @@ def gen_cases(
     type=click.Choice(["auto", "swagger", "postman", "markdown"]),
     help="Document format (used with --doc).",
 )
+@click.option(
+    "--jobs",
+    default=1,
+    type=click.IntRange(min=1),
+    help="Number of concurrent LLM requests for layered code generation and repairs.",
+)
+@_llm_settings
+@_instrumented
 def gen_code(
     cases_path: Path,
     output: Path,
@@ -131,14 +346,18 @@ def gen_code(
     arch: str,
     doc: Path | None,
     doc_fmt: str,
+    jobs: int,
+    **llm_settings,
 ):
     """Generate pytest and requests code from a test-case document."""
+    llm_options = _build_llm_options(**llm_settings)
     click.echo(f"Reading test cases from {cases_path}...")
     testcases = cases_path.read_text(encoding="utf-8")
-    endpoints = _load_layered_endpoints(arch, doc, doc_fmt, model)
-    files = _generate_code(testcases, arch, model, endpoints)
+    endpoints = _load_layered_endpoints(arch, doc, doc_fmt, model, llm_options)
+    files = _generate_code(testcases, arch, model, endpoints, llm_options, jobs=jobs)
     result = _write_code(output, files, append_mode)
-    click.echo(f"Generated {len(result.created)} files in {output}")
+    click.echo(f"Generated {len(result.written)} files in {output}")
+    _echo_llm_summary(llm_options)
 
 
 @main.command()
@@ -183,6 +402,33 @@ def gen_code(
     type=click.Choice(["flat", "layered"]),
     help="Code architecture style.",
 )
+@click.option(
+    "--jobs",
+    default=1,
+    type=click.IntRange(min=1),
+    help="Number of concurrent LLM requests for test cases, layered code and repairs.",
+)
+@click.option(
+    "--incremental",
+    is_flag=True,
+    default=False,
+    help="Regenerate only endpoints changed since the last run; reuse the rest.",
+)
+@click.option(
+    "--batch-tokens",
+    default=None,
+    type=click.IntRange(min=1),
+    help="Pack endpoints with the same skills into one request up to this many "
+    "estimated tokens of endpoint JSON.",
+)
+@click.option(
+    "--resume",
+    is_flag=True,
+    default=False,
+    help="Reuse endpoints finished by an interrupted earlier attempt.",
+)
+@_llm_settings
+@_instrumented
 def run(
     doc_path: Path,
     output: Path,
@@ -192,22 +438,173 @@ def run(
     filters: tuple[str, ...],
     append_mode: bool,
     arch: str,
+    jobs: int,
+    incremental: bool,
+    batch_tokens: int | None,
+    resume: bool,
+    **llm_settings,
 ):
     """Run the full parse, test-case, and code generation pipeline."""
-    endpoints = _load_endpoints(doc_path, fmt, model, filters)
+    if incremental and append_mode:
+        raise click.UsageError("--incremental cannot be combined with --append")
+    llm_options = _build_llm_options(**llm_settings)
+    endpoints = _load_endpoints(doc_path, fmt, model, filters, llm_options)
 
     click.echo(f"Generating test cases (depth: {depth})...")
     cases_path = output / "testcases.md"
-    appended = append_mode and cases_path.exists()
-    start_index = _append_start_index(cases_path, append_mode, endpoints)
-    testcases = _generate_testcases(endpoints, depth, model, start_index)
-    write_text(cases_path, testcases, append=append_mode)
-    action = "appended to" if appended else "saved to"
-    click.echo(f"  Test cases {action} {cases_path}")
+    manifest_path = output / MANIFEST_FILENAME
+    plan = _plan_run(
+        endpoints, cases_path, manifest_path, incremental, depth, model, arch
+    )
+    journal = CheckpointJournal.start(journal_path(cases_path), resume=resume)
+    try:
+        reusable = None
+        if incremental:
+            click.echo(f"  Reusing {len(plan.reused_sections)} unchanged endpoints")
+            testcases = _generate_testcases_incremental(
+                endpoints,
+                plan,
+                depth,
+                model,
+                jobs,
+                llm_options,
+                batch_tokens,
+                journal=journal,
+            )
+            reusable = reusable_code_files(output, testcases, endpoints, plan, arch)
+        else:
+            start_index = _append_start_index(cases_path, append_mode, endpoints)
+            testcases = _generate_testcases(
+                endpoints,
+                depth,
+                model,
+                start_index,
+                jobs,
+                llm_options,
+                batch_tokens,
+                journal=journal,
+            )
+        appended = append_mode and cases_path.exists()
+        if not append_mode:
+            # Until the code stage succeeds, the old manifest would vouch for
+            # code files that no longer match the new sections.
+            manifest_path.unlink(missing_ok=True)
+        write_text(cases_path, testcases, append=append_mode)
+        action = "appended to" if appended else "saved to"
+        click.echo(f"  Test cases {action} {cases_path}")
+        _echo_resumed(journal)
 
-    files = _generate_code(testcases, arch, model, endpoints)
-    result = _write_code(output, files, append_mode)
-    click.echo(f"Done! Generated {len(result.created) + 1} files in {output}")
+        files = _generate_code(
+            testcases, arch, model, endpoints, llm_options, reusable, jobs
+        )
+        result = _write_code(output, files, append_mode)
+        if not append_mode:
+            write_text(manifest_path, plan.manifest.to_json())
+    finally:
+        journal.close()
+    # The journal outlives a failed code stage so --resume skips the LLM
+    # calls for test cases that were already generated.
+    journal.discard()
+    click.echo(f"Done! Generated {len(result.written) + 1} files in {output}")
+    _echo_llm_summary(llm_options)
+
+
+def _plan_run(
+    endpoints: list[ApiEndpoint],
+    cases_path: Path,
+    manifest_path: Path,
+    incremental: bool,
+    depth: str,
+    model: str | None,
+    arch: str,
+) -> IncrementalPlan:
+    previous_testcases = None
+    previous_manifest = None
+    if incremental and cases_path.exists():
+        previous_testcases = cases_path.read_text(encoding="utf-8")
+        previous_manifest = load_manifest(manifest_path)
+    try:
+        return plan_incremental(
+            endpoints,
+            previous_testcases,
+            previous_manifest,
+            depth=depth,
+            model=model,
+            arch=arch,
+        )
+    except GenerationError as error:
+        raise click.ClickException(
+            f"Cannot reuse invalid test-case document: {error}"
+        ) from error
+
+
+def _build_llm_options(
+    no_cache: bool,
+    cache_dir: Path | None,
+    cache_max_mb: int,
+    rpm: int | None,
+    tpm: int | None,
+    max_concurrency: int | None,
+    record: Path | None,
+    replay: Path | None,
+) -> LlmOptions:
+    if record is not None and replay is not None:
+        raise click.UsageError("--record cannot be combined with --replay")
+    rate_limiter = RateLimiter(
+        RateLimits(
+            requests_per_minute=rpm,
+            tokens_per_minute=tpm,
+            max_concurrency=max_concurrency,
+        )
+    )
+    cassette = None
+    if replay is not None:
+        try:
+            cassette = Cassette.replay(replay)
+        except CassetteError as error:
+            raise click.ClickException(str(error)) from error
+    elif record is not None:
+        cassette = Cassette.record(record)
+        # Closed when the command ends, also when it fails.
+        click.get_current_context().call_on_close(cassette.close)
+    if no_cache:
+        return LlmOptions(rate_limiter=rate_limiter, cassette=cassette)
+    cache = ResponseCache(
+        cache_dir or default_cache_dir(), max_bytes=cache_max_mb * 1024 * 1024
+    )
+    return LlmOptions(cache=cache, rate_limiter=rate_limiter, cassette=cassette)
+
+
+def _echo_llm_summary(llm_options: LlmOptions, err: bool = False) -> None:
+    echo = functools.partial(click.echo, err=err)
+    cassette = llm_options.cassette
+    if cassette is not None and cassette.replaying:
+        echo(f"LLM cassette: replayed {cassette.replayed} responses")
+    elif cassette is not None:
+        echo(f"LLM cassette: recorded {cassette.recorded} responses to {cassette.path}")
+    cache = llm_options.cache
+    if cache is not None and cache.hits + cache.misses:
+        echo(f"LLM cache: {cache.hits} hits, {cache.misses} misses")
+    shared = llm_options.single_flight.shared
+    if shared:
+        echo(f"LLM single-flight: {shared} requests shared an in-flight response")
+    for model, limiter in llm_options.rate_limiter.models().items():
+        stats = limiter.stats
+        if not stats.requests:
+            continue
+        line = (
+            f"LLM {model}: {stats.requests} requests, {stats.retries} retries, "
+            f"{stats.throttled} throttled, {stats.waited_seconds:.1f}s waiting"
+        )
+        limit = limiter.concurrency_limit
+        if limit is not None:
+            line += f", concurrency limit {limit}"
+        if stats.cached_prompt_tokens:
+            line += (
+                f", {stats.cached_prompt_tokens}/{stats.prompt_tokens} "
+                "prompt tokens from cache"
+            )
+        echo(line)
 
 
 def _load_endpoints(
@@ -215,25 +612,31 @@ def _load_endpoints(
     fmt: str,
     model: str | None,
     filters: tuple[str, ...] = (),
+    llm_options: LlmOptions | None = None,
+    to_stderr: bool = False,
 ) -> list[ApiEndpoint]:
-    click.echo(f"Parsing {doc_path} (format: {fmt})...")
+    click.echo(f"Parsing {doc_path} (format: {fmt})...", err=to_stderr)
     try:
-        parsed = parse_document(doc_path, fmt, model=model)
+        parsed = parse_document(doc_path, fmt, model=model, llm_options=llm_options)
     except (DocumentParseError, LlmError) as error:
         raise click.ClickException(str(error)) from error
     endpoints = filter_endpoints(parsed, filters)
-    click.echo(f"Found {len(endpoints)} endpoints.")
+    click.echo(f"Found {len(endpoints)} endpoints.", err=to_stderr)
     return endpoints
 
 
 def _load_layered_endpoints(
-    arch: str, doc: Path | None, doc_fmt: str, model: str | None
+    arch: str,
+    doc: Path | None,
+    doc_fmt: str,
+    model: str | None,
+    llm_options: LlmOptions | None = None,
 ) -> list[ApiEndpoint] | None:
     if arch == "flat":
         return None
     if doc is None:
         raise click.UsageError("--doc is required when using --arch layered")
-    return _load_endpoints(doc, doc_fmt, model)
+    return _load_endpoints(doc, doc_fmt, model, llm_options=llm_options)
 
 
 def _generate_code(
@@ -241,13 +644,41 @@ def _generate_code(
     arch: str,
     model: str | None,
     endpoints: list[ApiEndpoint] | None,
+    llm_options: LlmOptions | None = None,
+    reusable: dict[str, str] | None = None,
+    jobs: int = 1,
 ) -> dict[str, str]:
     label = "layered code" if arch == "layered" else "code"
     click.echo(f"Generating {label}...")
+    validation_cache = _build_validation_cache(llm_options)
     try:
-        return generate_code(testcases, arch=arch, model=model, endpoints=endpoints)
+        files = generate_code(
+            testcases,
+            arch=arch,
+            model=model,
+            endpoints=endpoints,
+            llm_options=llm_options,
+            reusable=reusable,
+            jobs=jobs,
+            validation_cache=validation_cache,
+        )
     except (GenerationError, LlmError) as error:
         raise click.ClickException(str(error)) from error
+    if validation_cache.hits:
+        click.echo(
+            f"  Validation cache: {validation_cache.hits} hits, "
+            f"{validation_cache.misses} misses"
+        )
+    return files
+
+
+def _build_validation_cache(llm_options: LlmOptions | None) -> ValidationCache:
+    """Keep validation results next to cached responses, in memory otherwise."""
+    if llm_options is None or llm_options.cache is None:
+        return ValidationCache()
+    return ValidationCache.on_disk(
+        llm_options.cache.directory / VALIDATION_CACHE_SUBDIR
+    )
 
 
 def _generate_testcases(
@@ -255,15 +686,81 @@ def _generate_testcases(
     depth: str,
     model: str | None,
     start_index: int,
+    jobs: int = 1,
+    llm_options: LlmOptions | None = None,
+    batch_tokens: int | None = None,
+    journal: CheckpointJournal | None = None,
 ) -> str:
     try:
         return generate_testcases(
-            endpoints, depth=depth, model=model, start_index=start_index
+            endpoints,
+            depth=depth,
+            model=model,
+            start_index=start_index,
+            jobs=jobs,
+            llm_options=llm_options,
+            batch_tokens=batch_tokens,
+            journal=journal,
         )
     except (GenerationError, LlmError) as error:
         raise click.ClickException(str(error)) from error
 
 
+def _stream_testcases(
+    endpoints: list[ApiEndpoint],
+    depth: str,
+    model: str | None,
+    start_index: int,
+    jobs: int,
+    llm_options: LlmOptions,
+    batch_tokens: int | None,
+    journal: CheckpointJournal,
+) -> Iterator[str]:
+    try:
+        yield from stream_testcases(
+            endpoints,
+            depth=depth,
+            model=model,
+            start_index=start_index,
+            jobs=jobs,
+            llm_options=llm_options,
+            batch_tokens=batch_tokens,
+            journal=journal,
+        )
+    except (GenerationError, LlmError) as error:
+        raise click.ClickException(str(error)) from error
+
+
+def _generate_testcases_incremental(
+    endpoints: list[ApiEndpoint],
+    plan: IncrementalPlan,
+    depth: str,
+    model: str | None,
+    jobs: int,
+    llm_options: LlmOptions,
+    batch_tokens: int | None = None,
+    journal: CheckpointJournal | None = None,
+) -> str:
+    try:
+        return generate_testcases_incremental(
+            endpoints,
+            plan,
+            depth=depth,
+            model=model,
+            jobs=jobs,
+            llm_options=llm_options,
+            batch_tokens=batch_tokens,
+            journal=journal,
+        )
+    except (GenerationError, LlmError) as error:
+        raise click.ClickException(str(error)) from error
+
+
+def _echo_resumed(journal: CheckpointJournal) -> None:
+    if journal.reused:
+        click.echo(f"  Resumed {journal.reused} endpoints from {journal.path}")
+
+
 def _append_start_index(
     output: Path, append_mode: bool, endpoints: list[ApiEndpoint]
 ) -> int:
@@ -302,6 +799,10 @@ def _write_code(output: Path, files: dict[str, str], append_mode: bool) -> Write
 
     for file_path in result.created:
         click.echo(f"  Created {file_path}")
+    for file_path in result.updated:
+        click.echo(f"  Updated {file_path}")
     for file_path in result.skipped:
         click.echo(f"  Skipped {file_path} (already exists)")
+    if result.unchanged:
+        click.echo(f"  Unchanged {len(result.unchanged)} files")
     return result
@@ -0,0 +1,118 @@
+"""Append-only journal of per-endpoint test-case drafts for resumable runs.
+
+Drafts are appended as one JSON line per endpoint the moment a request
+finishes, so an interrupted run loses at most the requests in flight. Entries
+carry the endpoint's test-case fingerprint; a resumed run reuses only entries
+whose endpoint, depth, model, skills and template are unchanged. A torn last
+line left by a crash is ignored when the journal is read back.
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import IO, Self
+
+from api_test_gen.generator.testcase_document import (
+    TestCaseDocumentError,
+    TestCaseDraft,
+    validate_drafts,
+)
+
+JOURNAL_SUFFIX = ".journal.jsonl"
+
+JournalEntries = dict[str, tuple[str, list[TestCaseDraft]]]
+
+
+def journal_path(output: Path) -> Path:
+    """Return the journal location for a test-case document path."""
+    return output.with_name(output.name + JOURNAL_SUFFIX)
+
+
+class CheckpointJournal:
+    """Drafts restored from a previous attempt plus the journal being written."""
+
+    def __init__(self, path: Path, restored: JournalEntries | None = None):
+        self.path = path
+        self._restored = restored or {}
+        self.reused = 0
+        self._lock = threading.Lock()
+        self._handle: IO[str] | None = None
+
+    @classmethod
+    def start(cls, path: Path, resume: bool = False) -> Self:
+        """Open a journal, keeping earlier entries only when resuming.
+
+        Kept entries are rewritten to a fresh file first, which also drops a
+        torn line so new entries never get glued onto it.
+        """
+        restored = _read_entries(path) if resume else {}
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        tmp_path.write_text(
+            "".join(
+                _entry_line(key, fingerprint, drafts)
+                for key, (fingerprint, drafts) in restored.items()
+            ),
+            encoding="utf-8",
+        )
+        os.replace(tmp_path, path)
+        journal = cls(path, restored)
+        journal._handle = path.open("a", encoding="utf-8")
+        return journal
+
+    def restored(self, key: str, fingerprint: str) -> list[TestCaseDraft] | None:
+        """Return journaled drafts for an endpoint whose fingerprint still matches."""
+        entry = self._restored.get(key)
+        if entry is None or entry[0] != fingerprint:
+            return None
+        self.reused += 1
+        return entry[1]
+
+    def record(self, key: str, fingerprint: str, drafts: list[TestCaseDraft]) -> None:
+        """Append an endpoint's drafts and push them to disk."""
+        line = _entry_line(key, fingerprint, drafts)
+        with self._lock:
+            if self._handle is None:
+                raise ValueError(f"Checkpoint journal {self.path} is closed")
+            self._handle.write(line)
+            self._handle.flush()
+            os.fsync(self._handle.fileno())
+
+    def close(self) -> None:
+        with self._lock:
+            if self._handle is not None:
+                self._handle.close()
+                self._handle = None
+
+    def discard(self) -> None:
+        """Close and delete the journal once its output has been written."""
+        self.close()
+        self.path.unlink(missing_ok=True)
+
+
+def _entry_line(key: str, fingerprint: str, drafts: list[TestCaseDraft]) -> str:
+    entry = {
+        "key": key,
+        "fingerprint": fingerprint,
+        "drafts": [draft.model_dump(mode="json") for draft in drafts],
+    }
+    return json.dumps(entry, ensure_ascii=False) + "\n"
+
+
+def _read_entries(path: Path) -> JournalEntries:
+    try:
+        lines = path.read_text(encoding="utf-8").splitlines()
+    except (FileNotFoundError, UnicodeDecodeError):
+        return {}
+    entries = {}
+    for line in lines:
+        try:
+            data = json.loads(line)
+            entries[data["key"]] = (
+                data["fingerprint"],
+                validate_drafts(data["drafts"]),
+            )
+        except (json.JSONDecodeError, KeyError, TypeError, TestCaseDocumentError):
+            continue
+    return entries
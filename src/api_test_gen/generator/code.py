@@ -1,8 +1,11 @@
 """Code generator — converts test case documents into pytest+requests code."""
 
+from collections.abc import Mapping
 from pathlib import Path
 
 from api_test_gen.generator.common import (
+    GenerationValidationError,
+    PromptLog,
     add_generated_file,
     extract_fenced_content,
     validate_and_repair,
@@ -12,7 +15,8 @@ from api_test_gen.generator.testcase_document import (
     EndpointSection,
     parse_testcase_document,
 )
-from api_test_gen.llm import LlmClient
+from api_test_gen.generator.validation_cache import ValidationCache
+from api_test_gen.llm import LlmClient, LlmOptions
 
 PROMPTS_DIR = Path(__file__).parent.parent / "prompts"
 
@@ -20,15 +24,30 @@ PROMPTS_DIR = Path(__file__).parent.parent / "prompts"
 class CodeGenerator:
     """Generates pytest + requests code files from test case Markdown documents."""
 
-    def __init__(self, model: str | None = None):
-        self.client = LlmClient(model=model)
+    def __init__(
+        self,
+        model: str | None = None,
+        llm_options: LlmOptions | None = None,
+        jobs: int = 1,
+        validation_cache: ValidationCache | None = None,
+    ):
+        self.jobs = jobs
+        self.validation_cache = validation_cache
+        self.client = LlmClient(model=model, options=llm_options)
+        self.prompts = PromptLog(self.client)
         self.prompt_template = (PROMPTS_DIR / "code.md").read_text(encoding="utf-8")
 
-    def generate(self, testcases_markdown: str) -> dict[str, str]:
+    def generate(
+        self,
+        testcases_markdown: str,
+        reusable: Mapping[str, str] | None = None,
+    ) -> dict[str, str]:
         """Generate code files from test case Markdown.
 
-        Returns a dict of {filename: code_content}.
+        Files named in ``reusable`` are taken verbatim instead of asking the
+        LLM again. Returns a dict of {filename: code_content}.
         """
+        reusable = reusable or {}
         files: dict[str, str] = {}
         document = parse_testcase_document(testcases_markdown)
         filenames = assign_endpoint_filenames(document.sections)
@@ -37,10 +56,18 @@ class CodeGenerator:
 
         for section in document.sections:
             filename = filenames[section.key]
-            code = self._generate_test_file(section, filename)
+            code = reusable.get(filename)
+            if code is None:
+                code = self._generate_test_file(section, filename)
             add_generated_file(files, filename, code)
 
-        return validate_and_repair(files, self._retry_failed)
+        try:
+            return validate_and_repair(
+                files, self._repair_file, jobs=self.jobs, cache=self.validation_cache
+            )
+        except GenerationValidationError as error:
+            self.prompts.discard(error.errors)
+            raise
 
     def _render_conftest(self) -> str:
         return """import os
@@ -60,7 +87,8 @@ def auth_headers():
 """
 
     def _generate_test_file(self, section: EndpointSection, filename: str) -> str:
-        response = self.client.call(
+        response = self.prompts.call(
+            filename,
             system=self.prompt_template,
             user=(
                 f"Generate the contents of {filename} for the following endpoint. "
@@ -74,20 +102,16 @@ def auth_headers():
         """Extract Python code from Markdown code blocks."""
         return extract_fenced_content(response, "python")
 
-    def _retry_failed(
-        self, files: dict[str, str], errors: dict[str, str]
-    ) -> dict[str, str]:
-        """Re-generate files that failed validation."""
-        for filename, error_msg in errors.items():
-            if filename == "_collect":
-                continue
-            if filename.endswith(".py") and filename in files:
-                response = self.client.call(
-                    system=self.prompt_template,
-                    user=(
-                        f"上次生成的 {filename} 有错误：{error_msg}\n\n"
-                        f"请修复并重新生成。原始代码：\n```python\n{files[filename]}\n```"
-                    ),
-                )
-                files[filename] = self._extract_code(response)
-        return files
+    def _repair_file(self, filename: str, content: str, error_msg: str) -> str:
+        """Re-generate one file that failed validation."""
+        if not filename.endswith(".py"):
+            return content
+        response = self.prompts.call(
+            filename,
+            system=self.prompt_template,
+            user=(
+                f"上次生成的 {filename} 有错误：{error_msg}\n\n"
+                f"请修复并重新生成。原始代码：\n```python\n{content}\n```"
+            ),
+        )
+        return self._extract_code(response)
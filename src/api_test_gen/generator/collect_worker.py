@@ -0,0 +1,352 @@
+"""Long-lived pytest collection worker used by the validator.
+
+Starting an interpreter and pytest for every validate/repair round dominates
+validation time, and most rounds only change one or two files. The worker is a
+subprocess that keeps pytest imported and a mirror of the generated files on
+disk. Each request carries only the files that changed since the previous
+request; the worker re-collects just the changed test modules (or everything
+when a conftest, helper module or data file changed) and answers with
+per-file errors taken from pytest's collection reports.
+
+Protocol: one JSON object per line in each direction. Requests are
+``{"files": {path: content | null}, "targets": [path, ...] | null}`` where
+``null`` content deletes a file and ``targets`` names the modules to collect
+instead of the ones picked from the change; responses are
+``{"errors": {path: message}, "collected": [path, ...]}``.
+"""
+
+import atexit
+import collections
+import contextlib
+import importlib
+import io
+import json
+import linecache
+import os
+import queue
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any
+
+COLLECT_TIMEOUT_SECONDS = 30
+MAX_ERROR_CHARS = 1500
+STDERR_EXCERPT_LINES = 20
+
+
+class CollectWorker:
+    """Client side of a warm pytest collection subprocess.
+
+    The subprocess is started lazily and restarted after a crash or timeout.
+    Calls are serialized, so one worker can be shared between threads. An
+    excerpt of its stderr is attached to crash and timeout errors, so a
+    traceback from the worker is not lost.
+    """
+
+    def __init__(self, timeout: float = COLLECT_TIMEOUT_SECONDS):
+        self.timeout = timeout
+        self.last_collected: list[str] = []
+        self._lock = threading.Lock()
+        self._process: subprocess.Popen[str] | None = None
+        self._responses: queue.Queue[str | None] = queue.Queue()
+        self._stderr: _StreamExcerpt | None = None
+        self._workdir: Path | None = None
+        self._sent: dict[str, str] = {}
+
+    def collect(
+        self, files: dict[str, str], targets: list[str] | None = None
+    ) -> dict[str, str]:
+        """Collect tests for the given file set.
+
+        ``targets`` restricts collection to those test modules; errors are
+        then reported for them only. Returns dict of {filename: error_message};
+        errors that cannot be tied to a file are reported under ``_collect``.
+        """
+        with self._lock:
+            if self._process is None or self._process.poll() is not None:
+                self._start()
+            assert self._process is not None and self._process.stdin is not None
+
+            delta: dict[str, str | None] = {
+                name: content
+                for name, content in files.items()
+                if self._sent.get(name) != content
+            }
+            delta.update({name: None for name in self._sent if name not in files})
+            try:
+                request = {"files": delta, "targets": targets}
+                self._process.stdin.write(json.dumps(request) + "\n")
+                self._process.stdin.flush()
+                line = self._responses.get(timeout=self.timeout)
+            except queue.Empty:
+                return {
+                    "_collect": self._stop_with_output(
+                        f"pytest collection timed out after {self.timeout:g} seconds"
+                    )
+                }
+            except OSError:
+                line = None
+            if line is None:
+                return {
+                    "_collect": self._stop_with_output(
+                        "pytest collection worker exited unexpectedly"
+                    )
+                }
+
+            self._sent = dict(files)
+            response = json.loads(line)
+            self.last_collected = response["collected"]
+            errors = response["errors"]
+            if targets is not None:
+                errors = {
+                    name: message
+                    for name, message in errors.items()
+                    if name in targets or name == "_collect"
+                }
+            return errors
+
+    def close(self) -> None:
+        """Stop the subprocess and remove its working directory."""
+        with self._lock:
+            self._stop()
+
+    def _start(self) -> None:
+        self._stop()
+        self._workdir = Path(tempfile.mkdtemp(prefix="api-test-gen-collect-"))
+        self._responses = queue.Queue()
+        self._process = subprocess.Popen(
+            [sys.executable, "-m", __name__, str(self._workdir)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            cwd=self._workdir,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+        )
+        threading.Thread(
+            target=_pump_lines,
+            args=(self._process.stdout, self._responses),
+            daemon=True,
+        ).start()
+        self._stderr = _StreamExcerpt(self._process.stderr)
+
+    def _stop_with_output(self, message: str) -> str:
+        """Stop the subprocess and return ``message`` with its stderr excerpt."""
+        stderr = self._stderr
+        self._stop()
+        output = stderr.text(wait=1) if stderr is not None else ""
+        return f"{message}; worker stderr:\n{output}" if output else message
+
+    def _stop(self) -> None:
+        process, self._process = self._process, None
+        if process is not None:
+            process.kill()
+            process.wait()
+            for stream in (process.stdin, process.stdout):
+                if stream is not None:
+                    stream.close()
+        if self._workdir is not None:
+            shutil.rmtree(self._workdir, ignore_errors=True)
+            self._workdir = None
+        self._stderr = None
+        self._sent = {}
+
+
+_shared_worker: CollectWorker | None = None
+_shared_lock = threading.Lock()
+
+
+def shared_worker() -> CollectWorker:
+    """Return the process-wide worker, creating it on first use."""
+    global _shared_worker
+    with _shared_lock:
+        if _shared_worker is None:
+            _shared_worker = CollectWorker()
+            atexit.register(_shared_worker.close)
+        return _shared_worker
+
+
+def _pump_lines(stream: Any, lines: "queue.Queue[str | None]") -> None:
+    for line in stream:
+        lines.put(line)
+    lines.put(None)
+
+
+class _StreamExcerpt:
+    """First and last lines of a stream, drained on a thread.
+
+    Draining keeps the worker from blocking on a full pipe; a crash report
+    starts at the head (``Fatal Python error``) while a Python traceback ends
+    at the tail, so both are kept.
+    """
+
+    def __init__(self, stream: Any, lines: int = STDERR_EXCERPT_LINES):
+        self.head: list[str] = []
+        self.tail: collections.deque[str] = collections.deque(maxlen=lines)
+        self.skipped = 0
+        self._lines = lines
+        self._thread = threading.Thread(target=self._drain, args=(stream,), daemon=True)
+        self._thread.start()
+
+    def text(self, wait: float = 0) -> str:
+        """Return the excerpt, first waiting up to ``wait`` seconds for EOF."""
+        self._thread.join(timeout=wait)
+        skipped = [f"... {self.skipped} lines skipped ...\n"] if self.skipped else []
+        text = "".join([*self.head, *skipped, *self.tail]).strip()
+        if len(text) > MAX_ERROR_CHARS:
+            half = MAX_ERROR_CHARS // 2
+            text = f"{text[:half]}\n...\n{text[-half:]}"
+        return text
+
+    def _drain(self, stream: Any) -> None:
+        with stream:
+            for line in stream:
+                if len(self.head) < self._lines:
+                    self.head.append(line)
+                    continue
+                if len(self.tail) == self.tail.maxlen:
+                    self.skipped += 1
+                self.tail.append(line)
+
+
+# -- worker side --------------------------------------------------------------
+
+
+class _Workspace:
+    """Mirror of the client's files plus the last collection result per module."""
+
+    def __init__(self, root: Path):
+        self.root = root
+        self.errors: dict[str, str] = {}
+        self.general_error: str | None = None
+        # Set after collecting chosen targets only: other modules' results may
+        # be outdated, so the next automatic round re-collects everything.
+        self.partial = False
+
+    def update(
+        self, delta: dict[str, str | None], targets: list[str] | None = None
+    ) -> tuple[dict[str, str], list[str]]:
+        for name, content in delta.items():
+            path = self.root / name
+            if content is None:
+                path.unlink(missing_ok=True)
+                self.errors.pop(name, None)
+                continue
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(content, encoding="utf-8")
+
+        changed = [name for name, content in delta.items() if content is not None]
+        if targets is not None:
+            targets = sorted(targets)
+            for name in targets:
+                self.errors.pop(name, None)
+            self.partial = True
+        elif (
+            self.general_error is None
+            and not self.partial
+            and all(map(is_test_module, delta))
+        ):
+            targets = sorted(changed)
+            for name in targets:
+                self.errors.pop(name, None)
+        else:
+            targets = sorted(
+                str(path.relative_to(self.root).as_posix())
+                for path in self.root.rglob("*.py")
+                if is_test_module(path.name)
+            )
+            self.errors = {}
+            self.partial = False
+
+        self.general_error = None
+        if targets:
+            self._collect(targets)
+        errors = dict(self.errors)
+        if self.general_error is not None:
+            errors["_collect"] = self.general_error
+        return errors, targets
+
+    def _collect(self, targets: list[str]) -> None:
+        import pytest
+
+        self._forget_modules()
+        recorder = _CollectRecorder()
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+            exit_code = pytest.main(
+                [
+                    "--collect-only",
+                    "-q",
+                    "-p",
+                    "no:cacheprovider",
+                    f"--rootdir={self.root}",
+                    *targets,
+                ],
+                plugins=[recorder],
+            )
+
+        for name, message in recorder.errors.items():
+            self.errors[name] = self._clean(message)
+        if exit_code not in (0, 5) and not recorder.errors:
+            self.general_error = self._clean(output.getvalue()) or (
+                f"pytest collection failed with exit code {int(exit_code)}"
+            )
+
+    def _forget_modules(self) -> None:
+        """Drop generated modules from caches so changed files are re-imported."""
+        root = str(self.root)
+        for name, module in list(sys.modules.items()):
+            locations = [getattr(module, "__file__", None) or ""]
+            locations.extend(getattr(module, "__path__", []) or [])
+            if any(str(location).startswith(root) for location in locations):
+                del sys.modules[name]
+        importlib.invalidate_caches()
+        linecache.clearcache()
+
+    def _clean(self, message: str) -> str:
+        text = message.replace(f"{self.root}{os.sep}", "").strip()
+        return text[-MAX_ERROR_CHARS:]
+
+
+class _CollectRecorder:
+    """pytest plugin that records failed collection reports by file."""
+
+    def __init__(self):
+        self.errors: dict[str, str] = {}
+
+    def pytest_collectreport(self, report: Any) -> None:
+        if report.failed and report.nodeid:
+            filename = report.nodeid.split("::", 1)[0]
+            self.errors.setdefault(filename, report.longreprtext)
+
+
+def is_test_module(name: str) -> bool:
+    """Return whether pytest's default patterns collect ``name`` as tests."""
+    basename = name.rsplit("/", 1)[-1]
+    return basename.endswith(".py") and (
+        basename.startswith("test_") or basename.endswith("_test.py")
+    )
+
+
+def main() -> None:
+    root = Path(sys.argv[1]).resolve()
+    protocol = os.fdopen(os.dup(1), "w", encoding="utf-8")
+    os.dup2(2, 1)  # keep stray output off the protocol channel
+    sys.dont_write_bytecode = True
+    sys.path.insert(0, str(root))
+
+    workspace = _Workspace(root)
+    for line in sys.stdin:
+        request = json.loads(line)
+        targets = request.get("targets")
+        errors, collected = workspace.update(request["files"], targets)
+        protocol.write(json.dumps({"errors": errors, "collected": collected}) + "\n")
+        protocol.flush()
+
+
+if __name__ == "__main__":
+    main()
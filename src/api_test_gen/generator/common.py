@@ -2,10 +2,15 @@
 
 import keyword
 import re
-from collections.abc import Callable
+import threading
+from collections.abc import Callable, Hashable, Iterable, Iterator, Mapping, Sequence
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from pathlib import Path
 
-from api_test_gen.generator.validator import validate_files
+from api_test_gen.generator.validation_cache import ValidationCache
+from api_test_gen.generator.validator import validate_files, validate_static
+from api_test_gen.llm import LlmClient
+from api_test_gen.stats import span
 
 MAX_RETRIES = 2
 
@@ -27,27 +32,174 @@ class GenerationValidationError(GenerationError):
         super().__init__(f"Generated files failed validation: {details}")
 
 
-RepairFiles = Callable[[dict[str, str], dict[str, str]], dict[str, str]]
+RepairFile = Callable[[str, str, str], str]
+
+
+class PromptLog:
+    """The prompts whose responses went into each generated file.
+
+    Drafts and repairs come from fixed prompts, so the responses behind a file
+    that never passes validation would be replayed from the response cache on
+    every rerun. :meth:`discard` drops them so the next run samples anew.
+    """
+
+    def __init__(self, client: LlmClient):
+        self.client = client
+        self._prompts: dict[str, list[tuple[str, str]]] = {}
+        self._lock = threading.Lock()
+
+    def call(self, path: str, system: str, user: str) -> str:
+        """Send a prompt for ``path`` through the client and remember it."""
+        with self._lock:
+            self._prompts.setdefault(path, []).append((system, user))
+        return self.client.call(system=system, user=user)
+
+    def discard(self, paths: Iterable[str]) -> None:
+        """Drop the cached responses behind the given files."""
+        for path in paths:
+            with self._lock:
+                prompts = self._prompts.pop(path, [])
+            for system, user in prompts:
+                self.client.discard(system, user)
 
 
 def validate_and_repair(
-    files: dict[str, str], repair: RepairFiles, max_retries: int = MAX_RETRIES
+    files: dict[str, str],
+    repair: RepairFile,
+    max_retries: int = MAX_RETRIES,
+    jobs: int = 1,
+    cache: ValidationCache | None = None,
 ) -> dict[str, str]:
-    """Validate generated files and repair failures up to max_retries times."""
+    """Validate generated files and repair failing ones, up to max_retries each.
+
+    ``repair(path, content, error)`` returns new content for one file, or the
+    same content if it cannot repair that kind of file. Failing files are
+    repaired on up to ``jobs`` threads. Each repaired file is syntax-checked
+    on its own right away and repaired again while that check fails, so a
+    round waits for the slowest file rather than the sum of all of them. The
+    whole set is validated once per round afterwards. Results are cached by
+    content (and, for test modules, the content of their dependencies), so
+    later rounds re-check only what changed; pass a persistent ``cache`` to
+    reuse results across runs.
+    """
+    cache = cache or ValidationCache()
     current = dict(files)
-    for attempt in range(max_retries + 1):
-        errors = validate_files(current)
-        if not errors:
-            return current
-        if attempt == max_retries:
+    attempts: dict[str, int] = {}
+    errors = validate_files(current, cache)
+    while errors:
+        failing = {
+            path: message
+            for path, message in errors.items()
+            if path in current and attempts.get(path, 0) < max_retries
+        }
+        if not failing:
             raise GenerationValidationError(errors)
 
-        repaired = repair(dict(current), errors)
-        if repaired == current:
+        def repair_one(item: tuple[str, str]) -> tuple[str, int]:
+            path, error = item
+            budget = max_retries - attempts.get(path, 0)
+            return _repair_file(repair, path, current[path], error, budget)
+
+        changed = False
+        with span("repair_round", files=len(failing)):
+            results = list(map_ordered(repair_one, list(failing.items()), jobs=jobs))
+        for path, (content, used) in zip(failing, results, strict=True):
+            attempts[path] = attempts.get(path, 0) + used
+            if content != current[path]:
+                current[path] = content
+                changed = True
+        if not changed:
             raise GenerationValidationError(errors)
-        current = repaired
-
-    raise AssertionError("unreachable")
+        errors = validate_files(current, cache)
+    return current
+
+
+def _repair_file(
+    repair: RepairFile, path: str, content: str, error: str, budget: int
+) -> tuple[str, int]:
+    """Repair one file until it passes static checks; return content and attempts."""
+    used = 0
+    while used < budget:
+        repaired = repair(path, content, error)
+        used += 1
+        if repaired == content:
+            break
+        content = repaired
+        static_error = validate_static(path, content)
+        if static_error is None:
+            break
+        error = static_error
+    return content, used
+
+
+def map_ordered[T, R](
+    func: Callable[[T], R], items: Iterable[T], jobs: int = 1
+) -> Iterator[R]:
+    """Apply func to items on up to ``jobs`` threads, yielding results in input order.
+
+    With ``jobs <= 1`` items are processed lazily one at a time. Otherwise all
+    items are submitted up front; if a result raises, pending work is cancelled
+    and the error propagates once in-flight calls finish.
+    """
+    if jobs <= 1:
+        for item in items:
+            yield func(item)
+        return
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = [executor.submit(func, item) for item in items]
+        try:
+            for future in futures:
+                yield future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+
+def run_task_graph[K: Hashable, R](
+    tasks: Mapping[K, tuple[Callable[..., R], Sequence[K]]], jobs: int = 1
+) -> dict[K, R]:
+    """Run dependent tasks on up to ``jobs`` threads and return results by key.
+
+    Each task is ``(func, dependencies)``; ``func`` receives the results of its
+    dependencies as positional arguments and starts as soon as they are all
+    available. Dependencies must be listed before the tasks that need them.
+    With ``jobs <= 1`` tasks run one at a time in the given order. If a task
+    raises, no further tasks start and the error propagates once in-flight
+    tasks finish.
+    """
+    seen: set[K] = set()
+    for key, (_, dependencies) in tasks.items():
+        missing = [dependency for dependency in dependencies if dependency not in seen]
+        if missing:
+            raise ValueError(
+                f"Task {key!r} depends on unknown or later tasks {missing}"
+            )
+        seen.add(key)
+
+    results: dict[K, R] = {}
+    if jobs <= 1:
+        for key, (func, dependencies) in tasks.items():
+            results[key] = func(*(results[dependency] for dependency in dependencies))
+        return results
+
+    waiting = dict(tasks)
+    running: dict[Future[R], K] = {}
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        while waiting or running:
+            ready = [
+                key
+                for key, (_, dependencies) in waiting.items()
+                if all(dependency in results for dependency in dependencies)
+            ]
+            for key in ready:
+                func, dependencies = waiting.pop(key)
+                args = [results[dependency] for dependency in dependencies]
+                running[executor.submit(func, *args)] = key
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[running.pop(future)] = future.result()
+    return {key: results[key] for key in tasks}
 
 
 def extract_fenced_content(response: str, language: str = "python") -> str:
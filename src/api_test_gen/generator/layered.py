@@ -1,29 +1,55 @@
 """Layered code generator — produces 5-layer API automation project."""
 
+from collections.abc import Callable, Mapping
 from pathlib import Path
 
 from api_test_gen.generator.common import (
+    GenerationValidationError,
+    PromptLog,
     add_generated_file,
     extract_fenced_content,
+    run_task_graph,
     validate_and_repair,
 )
 from api_test_gen.generator.naming import group_endpoints_by_tag
+from api_test_gen.generator.prompt_json import endpoints_json
 from api_test_gen.generator.testcase_document import (
     TestCaseDocument,
     TestCaseDocumentError,
     parse_testcase_document,
 )
-from api_test_gen.llm import LlmClient
+from api_test_gen.generator.validation_cache import ValidationCache
+from api_test_gen.llm import LlmClient, LlmOptions
 from api_test_gen.parser.base import ApiEndpoint
 
 PROMPTS_DIR = Path(__file__).parent.parent / "prompts"
+LAYERS = ("api", "data", "services", "tests")
+
+
+def tag_layer_paths(tag: str) -> tuple[str, str, str, str]:
+    """Return the api, data, services and tests paths generated for a tag."""
+    return (
+        f"api/{tag}_api.py",
+        f"data/{tag}.yaml",
+        f"services/{tag}_flow.py",
+        f"tests/test_{tag}.py",
+    )
 
 
 class LayeredCodeGenerator:
     """Generates pytest code organized into a 5-layer architecture."""
 
-    def __init__(self, model: str | None = None):
-        self.client = LlmClient(model=model)
+    def __init__(
+        self,
+        model: str | None = None,
+        jobs: int = 1,
+        llm_options: LlmOptions | None = None,
+        validation_cache: ValidationCache | None = None,
+    ):
+        self.client = LlmClient(model=model, options=llm_options)
+        self.prompts = PromptLog(self.client)
+        self.jobs = jobs
+        self.validation_cache = validation_cache
 
     def _group_by_tag(
         self, endpoints: list[ApiEndpoint]
@@ -155,12 +181,21 @@ pyyaml>=6.0
     # -- orchestration --------------------------------------------------------
 
     def generate(
-        self, testcases_md: str, endpoints: list[ApiEndpoint]
+        self,
+        testcases_md: str,
+        endpoints: list[ApiEndpoint],
+        reusable: Mapping[str, str] | None = None,
     ) -> dict[str, str]:
         """Generate all files for the layered architecture.
 
+        Layers are scheduled as a dependency graph on up to ``jobs`` threads:
+        every tag's api and data layers start immediately, services waits for
+        its api layer and tests for both. Output is identical to a sequential
+        run. A tag whose four layer files are all in ``reusable`` keeps them
+        verbatim instead of asking the LLM again.
         Returns dict of {filepath: content} with paths like 'base/config.py'.
         """
+        reusable = reusable or {}
         files: dict[str, str] = {}
         document = parse_testcase_document(testcases_md)
         groups = self._group_by_tag(endpoints)
@@ -181,36 +216,55 @@ pyyaml>=6.0
         add_generated_file(files, "tests/__init__.py", "")
 
         # Dynamic: per-tag generation
+        tasks = {}
         for tag in tag_names:
+            if all(path in reusable for path in tag_layer_paths(tag)):
+                continue
             tag_endpoints = groups[tag]
             testcases_section = self._select_sections(document, tag_endpoints)
+            tasks.update(self._tag_tasks(tag, tag_endpoints, testcases_section))
+        layers = run_task_graph(tasks, jobs=self.jobs)
 
-            # API layer
-            api_filename, api_code = self._generate_api_layer(tag, tag_endpoints)
-            add_generated_file(files, f"api/{api_filename}", api_code)
-
-            # Data layer
-            data_filename, data_content = self._generate_data_layer(
-                tag, testcases_section
-            )
-            add_generated_file(files, f"data/{data_filename}", data_content)
-
-            # Services layer
-            svc_filename, svc_code = self._generate_services_layer(
-                tag, tag_endpoints, api_code
-            )
-            add_generated_file(files, f"services/{svc_filename}", svc_code)
-
-            # Tests layer
-            test_filename, test_code = self._generate_tests_layer(
-                tag, testcases_section, api_code, data_content
-            )
-            add_generated_file(files, f"tests/{test_filename}", test_code)
+        for tag in tag_names:
+            for layer, path in zip(LAYERS, tag_layer_paths(tag), strict=True):
+                if (tag, layer) in layers:
+                    _, content = layers[(tag, layer)]
+                else:
+                    content = reusable[path]
+                add_generated_file(files, path, content)
 
         # Static: conftest (needs tag_names for fixtures)
         add_generated_file(files, "tests/conftest.py", self._render_conftest(tag_names))
 
-        return validate_and_repair(files, self._retry_failed)
+        try:
+            return validate_and_repair(
+                files, self._repair_file, jobs=self.jobs, cache=self.validation_cache
+            )
+        except GenerationValidationError as error:
+            self.prompts.discard(error.errors)
+            raise
+
+    def _tag_tasks(
+        self, tag: str, endpoints: list[ApiEndpoint], testcases_section: str
+    ) -> dict[tuple[str, str], tuple[Callable[..., tuple[str, str]], tuple]]:
+        """Build the layer tasks of one tag for :func:`run_task_graph`."""
+        api, data = (tag, "api"), (tag, "data")
+        return {
+            api: (lambda: self._generate_api_layer(tag, endpoints), ()),
+            data: (lambda: self._generate_data_layer(tag, testcases_section), ()),
+            (tag, "services"): (
+                lambda api_layer: self._generate_services_layer(
+                    tag, endpoints, api_layer[1]
+                ),
+                (api,),
+            ),
+            (tag, "tests"): (
+                lambda api_layer, data_layer: self._generate_tests_layer(
+                    tag, testcases_section, api_layer[1], data_layer[1]
+                ),
+                (api, data),
+            ),
+        }
 
     # -- shared helpers -------------------------------------------------------
 
@@ -218,34 +272,31 @@ pyyaml>=6.0
         """Extract code from markdown code block."""
         return extract_fenced_content(response, lang)
 
-    def _retry_failed(
-        self, files: dict[str, str], errors: dict[str, str]
-    ) -> dict[str, str]:
-        """Re-generate files that failed validation."""
-        for filepath, error_msg in errors.items():
-            if filepath == "_collect" or filepath not in files:
-                continue
-            if filepath.endswith(".py"):
-                response = self.client.call(
-                    system="你是一个代码修复助手。只输出一个 ```python 代码块，不要任何解释。",
-                    user=(
-                        f"请修复以下 Python 代码的错误并重新生成。\n\n"
-                        f"错误信息：{error_msg}\n\n"
-                        f"原始代码：\n```python\n{files[filepath]}\n```"
-                    ),
-                )
-                files[filepath] = self._extract_code(response, "python")
-            elif filepath.endswith((".yaml", ".yml")):
-                response = self.client.call(
-                    system="你是一个代码修复助手。只输出一个 ```yaml 代码块，不要任何解释。",
-                    user=(
-                        f"请修复以下 YAML 文件的格式错误并重新生成。\n\n"
-                        f"错误信息：{error_msg}\n\n"
-                        f"原始内容：\n```yaml\n{files[filepath]}\n```"
-                    ),
-                )
-                files[filepath] = self._extract_code(response, "yaml")
-        return files
+    def _repair_file(self, filepath: str, content: str, error_msg: str) -> str:
+        """Re-generate one file that failed validation."""
+        if filepath.endswith(".py"):
+            response = self.prompts.call(
+                filepath,
+                system="你是一个代码修复助手。只输出一个 ```python 代码块，不要任何解释。",
+                user=(
+                    f"请修复以下 Python 代码的错误并重新生成。\n\n"
+                    f"错误信息：{error_msg}\n\n"
+                    f"原始代码：\n```python\n{content}\n```"
+                ),
+            )
+            return self._extract_code(response, "python")
+        if filepath.endswith((".yaml", ".yml")):
+            response = self.prompts.call(
+                filepath,
+                system="你是一个代码修复助手。只输出一个 ```yaml 代码块，不要任何解释。",
+                user=(
+                    f"请修复以下 YAML 文件的格式错误并重新生成。\n\n"
+                    f"错误信息：{error_msg}\n\n"
+                    f"原始内容：\n```yaml\n{content}\n```"
+                ),
+            )
+            return self._extract_code(response, "yaml")
+        return content
 
     # -- LLM-based layer generation -------------------------------------------
 
@@ -254,10 +305,11 @@ pyyaml>=6.0
     ) -> tuple[str, str]:
         """Generate API wrapper class for a tag group. Returns (filename, code)."""
         prompt = (PROMPTS_DIR / "layered_api.md").read_text(encoding="utf-8")
-        endpoints_json = "\n".join(ep.model_dump_json(indent=2) for ep in endpoints)
-        response = self.client.call(
+        definitions = endpoints_json(endpoints)
+        response = self.prompts.call(
+            tag_layer_paths(tag)[0],
             system=prompt,
-            user=f"为 tag '{tag}' 下的以下接口生成封装类：\n\n{endpoints_json}",
+            user=f"为 tag '{tag}' 下的以下接口生成封装类：\n\n{definitions}",
         )
         code = self._extract_code(response, "python")
         return f"{tag}_api.py", code
@@ -265,7 +317,8 @@ pyyaml>=6.0
     def _generate_data_layer(self, tag: str, testcases_section: str) -> tuple[str, str]:
         """Generate YAML test data file for a tag group. Returns (filename, content)."""
         prompt = (PROMPTS_DIR / "layered_data.md").read_text(encoding="utf-8")
-        response = self.client.call(
+        response = self.prompts.call(
+            tag_layer_paths(tag)[1],
             system=prompt,
             user=f"为 tag '{tag}' 从以下测试用例中提取测试数据：\n\n{testcases_section}",
         )
@@ -277,13 +330,14 @@ pyyaml>=6.0
     ) -> tuple[str, str]:
         """Generate business flow class for a tag group. Returns (filename, code)."""
         prompt = (PROMPTS_DIR / "layered_services.md").read_text(encoding="utf-8")
-        endpoints_json = "\n".join(ep.model_dump_json(indent=2) for ep in endpoints)
-        response = self.client.call(
+        definitions = endpoints_json(endpoints)
+        response = self.prompts.call(
+            tag_layer_paths(tag)[2],
             system=prompt,
             user=(
                 f"为 tag '{tag}' 生成业务编排类。\n\n"
                 f"已有的接口封装类：\n```python\n{api_code}\n```\n\n"
-                f"接口定义：\n{endpoints_json}"
+                f"接口定义：\n{definitions}"
             ),
         )
         code = self._extract_code(response, "python")
@@ -294,7 +348,8 @@ pyyaml>=6.0
     ) -> tuple[str, str]:
         """Generate test file for a tag group. Returns (filename, code)."""
         prompt = (PROMPTS_DIR / "layered_tests.md").read_text(encoding="utf-8")
-        response = self.client.call(
+        response = self.prompts.call(
+            tag_layer_paths(tag)[3],
             system=prompt,
             user=(
                 f"为 tag '{tag}' 生成测试代码。\n\n"
@@ -0,0 +1,117 @@
+"""Per-endpoint fingerprints recorded between runs for incremental regeneration.
+
+A fingerprint covers everything that shapes an endpoint's generated artifacts:
+the normalized endpoint itself, the depth and model, the skills selected for it
+and the prompt templates of the test-case and code stages. The manifest stores
+the fingerprints of the last successful run next to ``testcases.md`` so the next
+run can regenerate only endpoints whose fingerprint changed.
+"""
+
+import hashlib
+import json
+from dataclasses import dataclass, field
+from functools import cache
+from pathlib import Path
+
+from api_test_gen.parser.base import ApiEndpoint
+from api_test_gen.skills.loader import load_skill_content, select_skills
+
+MANIFEST_FILENAME = "testcases.manifest.json"
+MANIFEST_VERSION = 1
+PROMPTS_DIR = Path(__file__).parent.parent / "prompts"
+STAGE_PROMPTS = {
+    "flat": ("testcase.md", "code.md"),
+    "layered": (
+        "testcase.md",
+        "layered_api.md",
+        "layered_data.md",
+        "layered_services.md",
+        "layered_tests.md",
+    ),
+}
+
+
+@dataclass(frozen=True)
+class GenerationManifest:
+    """Fingerprints of the endpoints and tag groups of one successful run."""
+
+    endpoints: dict[str, str] = field(default_factory=dict)
+    groups: dict[str, str] = field(default_factory=dict)
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {
+                "version": MANIFEST_VERSION,
+                "endpoints": self.endpoints,
+                "groups": self.groups,
+            },
+            ensure_ascii=False,
+            indent=2,
+            sort_keys=True,
+        )
+
+
+def endpoint_key(endpoint: ApiEndpoint) -> str:
+    """Return the manifest key of an endpoint, e.g. ``GET /pets``."""
+    return f"{endpoint.method} {endpoint.path}"
+
+
+def endpoint_fingerprint(
+    endpoint: ApiEndpoint, depth: str, model: str | None, arch: str
+) -> str:
+    """Hash an endpoint together with the skills and prompts used to generate it."""
+    skill_names = select_skills(endpoint, depth)
+    return _hash_parts(
+        endpoint.model_dump_json(),
+        depth,
+        model or "",
+        arch,
+        "\n".join(skill_names),
+        load_skill_content(skill_names),
+        *(_prompt_text(name) for name in STAGE_PROMPTS[arch]),
+    )
+
+
+def testcase_fingerprint(endpoint: ApiEndpoint, depth: str, model: str | None) -> str:
+    """Hash the inputs of an endpoint's test-case stage only."""
+    skill_names = select_skills(endpoint, depth)
+    return _hash_parts(
+        endpoint.model_dump_json(),
+        depth,
+        model or "",
+        "\n".join(skill_names),
+        load_skill_content(skill_names),
+        _prompt_text("testcase.md"),
+    )
+
+
+def group_fingerprint(fingerprints: list[str]) -> str:
+    """Hash the ordered member fingerprints of a tag group."""
+    return hashlib.sha256("\n".join(fingerprints).encode("ascii")).hexdigest()
+
+
+def load_manifest(path: Path) -> GenerationManifest | None:
+    """Read a manifest, treating missing or incompatible files as absent."""
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError, UnicodeDecodeError):
+        return None
+    if not isinstance(data, dict) or data.get("version") != MANIFEST_VERSION:
+        return None
+    endpoints = data.get("endpoints")
+    groups = data.get("groups", {})
+    if not isinstance(endpoints, dict) or not isinstance(groups, dict):
+        return None
+    return GenerationManifest(endpoints=endpoints, groups=groups)
+
+
+def _hash_parts(*parts: str) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(hashlib.sha256(part.encode("utf-8")).digest())
+    return digest.hexdigest()
+
+
+@cache
+def _prompt_text(name: str) -> str:
+    return (PROMPTS_DIR / name).read_text(encoding="utf-8")
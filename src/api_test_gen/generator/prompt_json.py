@@ -0,0 +1,294 @@
+"""Compact JSON rendering of endpoints for LLM prompts.
+
+Swagger schemas reach the generators fully inlined, so the same object
+schema can appear in the request body, in every response and in every
+endpoint of a tag. Sent as ``model_dump_json(indent=2)`` that repetition and
+the indentation dominate the prompt. The rendering here:
+
+- leaves out endpoint, parameter and response fields holding their default
+  (a ``false`` example stays, a ``false`` ``required`` flag goes) and the
+  plain ``application/json`` content type;
+- writes JSON without indentation or spaces after separators;
+- moves schemas that occur more than once into a ``$defs`` block and refers
+  to them as ``{"$ref": "#/$defs/S1"}``;
+- cuts descriptions longer than :data:`MAX_DESCRIPTION_CHARS`.
+
+When the result is still above the request's token budget, examples are
+dropped, descriptions shortened and then removed, and finally deeply nested
+schemas are collapsed to their type, until it fits or nothing is left to cut.
+"""
+
+import json
+from collections import Counter
+from collections.abc import Callable
+from typing import Any
+
+from pydantic import BaseModel
+
+from api_test_gen.parser.base import ApiEndpoint, Param
+from api_test_gen.ratelimit import estimate_tokens
+
+MAX_DESCRIPTION_CHARS = 300
+ENDPOINT_TOKEN_BUDGET = 4000
+TAG_TOKEN_BUDGET = 16000
+# A $ref costs about 20 characters, so smaller schemas stay inline.
+MIN_SHARED_SCHEMA_CHARS = 64
+
+_DEFAULT_CONTENT_TYPES = ["application/json"]
+_DEFS_PREFIX = "#/$defs/"
+# Maps from names to schemas: their entries can be shared, the maps cannot.
+_NAMED_MAPS = frozenset({"properties", "patternProperties", "definitions", "$defs"})
+
+Data = dict[str, Any]
+
+
+def _model_defaults(model: type[BaseModel], keep: frozenset[str] = frozenset()) -> Data:
+    return {
+        name: field.get_default(call_default_factory=True)
+        for name, field in model.model_fields.items()
+        if not field.is_required() and name not in keep
+    }
+
+
+# Field values that tell the model nothing; any other value is sent.
+_ENDPOINT_DEFAULTS = _model_defaults(ApiEndpoint)
+# The parameter type defaults to "string" but is worth stating.
+_PARAM_DEFAULTS = _model_defaults(Param, keep=frozenset({"param_type"}))
+_RESPONSE_DEFAULTS: Data = {"description": "", "content_types": []}
+
+
+def endpoint_json(
+    endpoint: ApiEndpoint, token_budget: int = ENDPOINT_TOKEN_BUDGET
+) -> str:
+    """Render one endpoint; shared schemas go to its own ``$defs`` key."""
+    return _render([_endpoint_data(endpoint)], token_budget, single=True)
+
+
+def endpoints_json(
+    endpoints: list[ApiEndpoint], token_budget: int = TAG_TOKEN_BUDGET
+) -> str:
+    """Render endpoints as ``{"endpoints": [...], "$defs": {...}}``.
+
+    Schemas are shared across all the endpoints, which is where a tag's
+    repeated request and response objects collapse.
+    """
+    return _render(
+        [_endpoint_data(endpoint) for endpoint in endpoints], token_budget, single=False
+    )
+
+
+def _render(items: list[Data], token_budget: int, single: bool) -> str:
+    text = ""
+    for reduce in _REDUCTIONS:
+        items = [reduce(item) for item in items]
+        text = _dump(items, single)
+        if estimate_tokens(text) <= token_budget:
+            break
+    return text
+
+
+def _dump(items: list[Data], single: bool) -> str:
+    shared = _SharedSchemas(items)
+    rendered = [shared.replace_in(item) for item in items]
+    document = rendered[0] if single else {"endpoints": rendered}
+    if shared.definitions:
+        document = {**document, "$defs": shared.definitions}
+    return json.dumps(document, ensure_ascii=False, separators=(",", ":"))
+
+
+def _is_default(key: str, value: Any, defaults: Data) -> bool:
+    if key not in defaults:
+        return False
+    default = defaults[key]
+    # Compared with the type as well: 0 == False would drop zeros.
+    return type(value) is type(default) and value == default
+
+
+def _without_defaults(data: Data, defaults: Data) -> Data:
+    return {
+        key: value
+        for key, value in data.items()
+        if not _is_default(key, value, defaults)
+    }
+
+
+def _endpoint_data(endpoint: ApiEndpoint) -> Data:
+    """Endpoint fields without their defaults; schemas are left untouched."""
+    data = endpoint.model_dump(mode="json", exclude={"content_type"})
+    if data["content_types"] == _DEFAULT_CONTENT_TYPES:
+        data["content_types"] = []
+    data["parameters"] = [
+        _without_defaults(param, _PARAM_DEFAULTS) for param in data["parameters"]
+    ]
+    responses = {}
+    for status, response in data["responses"].items():
+        if response.get("content_types") == _DEFAULT_CONTENT_TYPES:
+            response = {**response, "content_types": []}
+        responses[status] = _without_defaults(response, _RESPONSE_DEFAULTS)
+    data["responses"] = responses
+    return _without_defaults(data, _ENDPOINT_DEFAULTS)
+
+
+def _map_schemas(item: Data, func: Callable[[Any], Any]) -> Data:
+    """Copy an endpoint with ``func`` applied to its body and response schemas."""
+    item = dict(item)
+    if "request_body" in item:
+        item["request_body"] = func(item["request_body"])
+    if "responses" in item:
+        item["responses"] = {
+            status: {**response, "schema": func(response["schema"])}
+            if "schema" in response
+            else response
+            for status, response in item["responses"].items()
+        }
+    return item
+
+
+class _SharedSchemas:
+    """Schemas occurring more than once among some endpoints' schemas."""
+
+    def __init__(self, items: list[Data]):
+        self._keys: dict[int, str] = {}
+        self._names: dict[str, str] = {}
+        self.definitions: Data = {}
+        counts: Counter[str] = Counter()
+        seen: set[str] = set()
+        for item in items:
+            _map_schemas(item, lambda schema: self._count(schema, counts, seen))
+        self._shared = {
+            key
+            for key, count in counts.items()
+            if count > 1 and len(key) >= MIN_SHARED_SCHEMA_CHARS
+        }
+
+    def replace_in(self, item: Data) -> Data:
+        """Copy an endpoint with its shared schemas replaced by references."""
+        return _map_schemas(item, self._replace)
+
+    def _count(
+        self, node: Any, counts: Counter[str], seen: set[str], named: bool = False
+    ) -> None:
+        # Repeats are not descended into, so a schema nested in a shared one
+        # counts once per place it would still appear after replacement.
+        if isinstance(node, dict):
+            if not named:
+                key = self._key(node)
+                counts[key] += 1
+                if key in seen:
+                    return
+                seen.add(key)
+            for name, child in node.items():
+                self._count(child, counts, seen, named=name in _NAMED_MAPS)
+        elif isinstance(node, list):
+            for child in node:
+                self._count(child, counts, seen)
+
+    def _key(self, node: Any) -> str:
+        """Canonical JSON of a node, memoized per container object."""
+        if not isinstance(node, dict | list):
+            return json.dumps(node, ensure_ascii=False)
+        key = self._keys.get(id(node))
+        if key is None:
+            if isinstance(node, dict):
+                members = (
+                    f"{json.dumps(name, ensure_ascii=False)}:{self._key(node[name])}"
+                    for name in sorted(node)
+                )
+                key = "{" + ",".join(members) + "}"
+            else:
+                key = "[" + ",".join(self._key(value) for value in node) + "]"
+            self._keys[id(node)] = key
+        return key
+
+    def _replace(self, node: Any, named: bool = False) -> Any:
+        if isinstance(node, dict):
+            if not named and self._key(node) in self._shared:
+                return {"$ref": _DEFS_PREFIX + self._define(node)}
+            return {
+                key: self._replace(value, named=key in _NAMED_MAPS)
+                for key, value in node.items()
+            }
+        if isinstance(node, list):
+            return [self._replace(value) for value in node]
+        return node
+
+    def _define(self, node: Data) -> str:
+        key = self._key(node)
+        name = self._names.get(key)
+        if name is None:
+            name = self._names[key] = f"S{len(self._names) + 1}"
+            # Reserve the slot so definitions list outer schemas first.
+            self.definitions[name] = {}
+            self.definitions[name] = {
+                field: self._replace(value, named=field in _NAMED_MAPS)
+                for field, value in node.items()
+            }
+        return name
+
+
+# -- Budget reductions, applied cumulatively until a prompt fits ---------------
+
+
+def _map_strings(node: Any, field: str, func: Callable[[str], str | None]) -> Any:
+    """Rewrite every string under ``field`` keys; ``None`` removes the key."""
+    if isinstance(node, list):
+        return [_map_strings(value, field, func) for value in node]
+    if not isinstance(node, dict):
+        return node
+    result = {}
+    for key, value in node.items():
+        if key == field and isinstance(value, str):
+            value = func(value)
+            if value is None:
+                continue
+        else:
+            value = _map_strings(value, field, func)
+        result[key] = value
+    return result
+
+
+def _shorten_descriptions(limit: int) -> Callable[[Data], Data]:
+    def shorten(text: str) -> str | None:
+        if not limit:
+            return None
+        return text if len(text) <= limit else text[: limit - 1] + "…"
+
+    return lambda item: _map_strings(item, "description", shorten)
+
+
+def _drop_examples(node: Any, named: bool = False) -> Any:
+    if isinstance(node, list):
+        return [_drop_examples(value) for value in node]
+    if not isinstance(node, dict):
+        return node
+    # Keys of a named map are field names, not schema keywords.
+    return {
+        key: _drop_examples(value, named=not named and key in _NAMED_MAPS)
+        for key, value in node.items()
+        if named or key not in ("example", "examples")
+    }
+
+
+def _collapse(node: Any, depth: int) -> Any:
+    if isinstance(node, list):
+        return [_collapse(value, depth) for value in node]
+    if not isinstance(node, dict):
+        return node
+    if depth <= 0:
+        return {"type": node["type"]} if isinstance(node.get("type"), str) else {}
+    return {key: _collapse(value, depth - 1) for key, value in node.items()}
+
+
+def _collapse_schemas(depth: int) -> Callable[[Data], Data]:
+    return lambda item: _map_schemas(item, lambda schema: _collapse(schema, depth))
+
+
+_REDUCTIONS: tuple[Callable[[Data], Data], ...] = (
+    _shorten_descriptions(MAX_DESCRIPTION_CHARS),
+    _drop_examples,
+    _shorten_descriptions(80),
+    _shorten_descriptions(0),
+    _collapse_schemas(6),
+    _collapse_schemas(4),
+    _collapse_schemas(2),
+)
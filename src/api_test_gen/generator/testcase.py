@@ -1,25 +1,42 @@
 """Test case generator — uses LLM + skills to produce test case documents."""
 
+from collections.abc import Iterator
 from pathlib import Path
 
-from api_test_gen.llm import LlmClient
+from api_test_gen.generator.common import map_ordered
+from api_test_gen.generator.checkpoint import CheckpointJournal
+from api_test_gen.generator.manifest import endpoint_key, testcase_fingerprint
+from api_test_gen.generator.prompt_json import endpoint_json
+from api_test_gen.llm import LlmClient, LlmOptions
+from api_test_gen.ratelimit import estimate_tokens
 from api_test_gen.parser.base import ApiEndpoint
 from api_test_gen.skills.loader import select_skills, load_skill_content
 from api_test_gen.generator.testcase_document import (
     TestCaseDocumentError,
     TestCaseDraft,
+    parse_batch_drafts,
     parse_drafts,
     render_endpoint_section,
 )
 
 PROMPTS_DIR = Path(__file__).parent.parent / "prompts"
+DISPATCH_WINDOW = 64
 
 
 class TestCaseGenerator:
     """Generates test case Markdown documents from API endpoint definitions."""
 
-    def __init__(self, model: str | None = None):
-        self.client = LlmClient(model=model)
+    def __init__(
+        self,
+        model: str | None = None,
+        jobs: int = 1,
+        llm_options: LlmOptions | None = None,
+        batch_tokens: int | None = None,
+    ):
+        self.client = LlmClient(model=model, options=llm_options)
+        self.model = model
+        self.jobs = jobs
+        self.batch_tokens = batch_tokens
         self.prompt_template = (PROMPTS_DIR / "testcase.md").read_text(encoding="utf-8")
 
     def generate(
@@ -27,36 +44,200 @@ class TestCaseGenerator:
         endpoints: list[ApiEndpoint],
         depth: str = "quick",
         start_index: int = 1,
+        journal: CheckpointJournal | None = None,
     ) -> str:
-        """Generate test cases for all endpoints, returns Markdown string."""
-        results = []
+        """Generate test cases for all endpoints, returns Markdown string.
+
+        See :meth:`iter_sections` for scheduling, batching and checkpoints.
+        """
+        return "\n\n".join(
+            self.iter_sections(
+                endpoints, depth=depth, start_index=start_index, journal=journal
+            )
+        )
+
+    def iter_sections(
+        self,
+        endpoints: list[ApiEndpoint],
+        depth: str = "quick",
+        start_index: int = 1,
+        journal: CheckpointJournal | None = None,
+    ) -> Iterator[str]:
+        """Yield rendered endpoint sections in input order as they become ready.
+
+        Up to ``jobs`` requests run concurrently; finished sections wait in a
+        buffer until every earlier endpoint is done, so sections and ``TC-xxx``
+        numbers always follow the input endpoint order. With ``batch_tokens``
+        set, endpoints sharing a skill set are packed into one request while
+        their JSON stays within that many estimated tokens. With a ``journal``,
+        endpoints it already holds are not requested again and every finished
+        request is recorded in it immediately.
+        """
+        _check_unique_endpoints(endpoints)
+        skill_sets = [tuple(select_skills(endpoint, depth)) for endpoint in endpoints]
+        keys = [endpoint_key(endpoint) for endpoint in endpoints]
+        drafts_by_index: dict[int, list[TestCaseDraft]] = {}
+        fingerprints: list[str] = []
+        if journal is not None:
+            fingerprints = [
+                testcase_fingerprint(endpoint, depth, self.model)
+                for endpoint in endpoints
+            ]
+            for index, (key, fingerprint) in enumerate(zip(keys, fingerprints)):
+                restored = journal.restored(key, fingerprint)
+                if restored is not None:
+                    drafts_by_index[index] = restored
+
+        def generate_batch(batch: list[int]) -> list[list[TestCaseDraft]]:
+            batch_drafts = self._generate_batch(
+                [endpoints[index] for index in batch], depth, skill_sets[batch[0]]
+            )
+            if journal is not None:
+                for index, drafts in zip(batch, batch_drafts, strict=True):
+                    journal.record(keys[index], fingerprints[index], drafts)
+            return batch_drafts
+
+        # Endpoints with the same skills share the whole system prompt. Sending
+        # them back to back lets the provider's prompt cache serve that prefix;
+        # sorting only within a window keeps early sections from waiting on
+        # the whole spec.
+        pending = [i for i in range(len(endpoints)) if i not in drafts_by_index]
+        order = [
+            index
+            for window in range(0, len(pending), DISPATCH_WINDOW)
+            for index in sorted(
+                pending[window : window + DISPATCH_WINDOW],
+                key=lambda index: skill_sets[index],
+            )
+        ]
+        batches = self._batches(order, endpoints, skill_sets)
+        results = zip(
+            batches, map_ordered(generate_batch, batches, jobs=self.jobs), strict=True
+        )
+
         next_index = start_index
-        seen_endpoints: set[tuple[str, str]] = set()
-        for endpoint in endpoints:
-            key = (endpoint.method, endpoint.path)
-            if key in seen_endpoints:
-                raise TestCaseDocumentError(
-                    f"Duplicate endpoint definition: {endpoint.method} {endpoint.path}"
-                )
-            seen_endpoints.add(key)
-
-            drafts = self._generate_for_endpoint(endpoint, depth)
-            section, next_index = render_endpoint_section(endpoint, drafts, next_index)
-            results.append(section)
-        return "\n\n".join(results)
+        for index, endpoint in enumerate(endpoints):
+            while index not in drafts_by_index:
+                batch, batch_drafts = next(results)
+                drafts_by_index.update(zip(batch, batch_drafts, strict=True))
+            section, next_index = render_endpoint_section(
+                endpoint, drafts_by_index.pop(index), next_index
+            )
+            yield section
+
+    def _batches(
+        self,
+        order: list[int],
+        endpoints: list[ApiEndpoint],
+        skill_sets: list[tuple[str, ...]],
+    ) -> list[list[int]]:
+        """Split endpoint indexes into request batches of one skill set each."""
+        if self.batch_tokens is None:
+            return [[index] for index in order]
+
+        batches: list[list[int]] = []
+        batch_tokens = 0
+        for index in order:
+            tokens = estimate_tokens(endpoint_json(endpoints[index]))
+            if (
+                batches
+                and skill_sets[batches[-1][0]] == skill_sets[index]
+                and batch_tokens + tokens <= self.batch_tokens
+            ):
+                batches[-1].append(index)
+                batch_tokens += tokens
+            else:
+                batches.append([index])
+                batch_tokens = tokens
+        return batches
+
+    def _generate_batch(
+        self,
+        endpoints: list[ApiEndpoint],
+        depth: str,
+        skill_names: tuple[str, ...],
+    ) -> list[list[TestCaseDraft]]:
+        """Request drafts for endpoints sharing skill_names in one LLM call.
+
+        Endpoints missing from the response or with invalid drafts are
+        regenerated with a single-endpoint request each.
+        """
+        if len(endpoints) == 1:
+            return [self._generate_for_endpoint(endpoints[0], depth, skill_names)]
+
+        system_prompt, cache_breakpoints = self._system_prompt(skill_names)
+        keys = [endpoint_key(endpoint) for endpoint in endpoints]
+        sections = "\n\n".join(
+            f"### {key}\n\n```json\n{endpoint_json(endpoint)}\n```"
+            for key, endpoint in zip(keys, endpoints, strict=True)
+        )
+        user_prompt = (
+            f"请为以下 {len(endpoints)} 个接口分别生成测试用例，深度级别：{depth}\n\n"
+            "只输出一个 JSON 对象：键为接口标识（即各小节标题，如 "
+            '"GET /pets"），值为该接口的用例数组，数组格式与上文要求相同。\n\n'
+            f"{sections}"
+        )
+
+        response = self.client.call(
+            system=system_prompt, user=user_prompt, cache_breakpoints=cache_breakpoints
+        )
+        try:
+            drafts = parse_batch_drafts(response, keys)
+        except TestCaseDocumentError:
+            drafts = {}
+        if not drafts:
+            self.client.discard(system_prompt, user_prompt)
+        return [
+            drafts[key]
+            if key in drafts
+            else self._generate_for_endpoint(endpoint, depth, skill_names)
+            for key, endpoint in zip(keys, endpoints, strict=True)
+        ]
 
     def _generate_for_endpoint(
-        self, endpoint: ApiEndpoint, depth: str
+        self, endpoint: ApiEndpoint, depth: str, skill_names: tuple[str, ...]
     ) -> list[TestCaseDraft]:
-        skill_names = select_skills(endpoint, depth)
-        skill_content = load_skill_content(skill_names)
-
-        system_prompt = f"{skill_content}\n\n---\n\n{self.prompt_template}"
+        system_prompt, cache_breakpoints = self._system_prompt(skill_names)
 
         user_prompt = (
             f"请为以下接口生成测试用例，深度级别：{depth}\n\n"
-            f"```json\n{endpoint.model_dump_json(indent=2)}\n```"
+            f"```json\n{endpoint_json(endpoint)}\n```"
+        )
+
+        response = self.client.call(
+            system=system_prompt, user=user_prompt, cache_breakpoints=cache_breakpoints
         )
+        try:
+            return parse_drafts(response)
+        except TestCaseDocumentError:
+            self.client.discard(system_prompt, user_prompt)
+            raise
+
+    def _system_prompt(
+        self, skill_names: tuple[str, ...]
+    ) -> tuple[str, tuple[int, ...]]:
+        """Build the system prompt and the offsets that end its shared prefixes.
+
+        The template and the always-loaded first skill come first, so every
+        endpoint shares them; the remaining skills follow in selection order,
+        so endpoints with the same skill set share the whole prompt.
+        """
+        first_skill = load_skill_content(list(skill_names[:1]))
+        common = f"{self.prompt_template}\n\n---\n\n{first_skill}"
+        if len(skill_names) == 1:
+            return common, (len(common),)
+        system_prompt = (
+            f"{common}\n\n---\n\n{load_skill_content(list(skill_names[1:]))}"
+        )
+        return system_prompt, (len(common), len(system_prompt))
+
 
-        response = self.client.call(system=system_prompt, user=user_prompt)
-        return parse_drafts(response)
+def _check_unique_endpoints(endpoints: list[ApiEndpoint]) -> None:
+    seen_endpoints: set[tuple[str, str]] = set()
+    for endpoint in endpoints:
+        key = (endpoint.method, endpoint.path)
+        if key in seen_endpoints:
+            raise TestCaseDocumentError(
+                f"Duplicate endpoint definition: {endpoint.method} {endpoint.path}"
+            )
+        seen_endpoints.add(key)
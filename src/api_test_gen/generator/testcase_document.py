@@ -1,5 +1,6 @@
 """Structured test-case document models and Markdown conversion."""
 
+import contextlib
 import json
 import re
 from dataclasses import dataclass
@@ -78,14 +79,49 @@ def parse_drafts(response: str) -> list[TestCaseDraft]:
     payload = extract_fenced_content(response, "json")
     try:
         data = json.loads(payload)
+    except json.JSONDecodeError as error:
+        raise TestCaseDocumentError(f"Invalid test-case JSON: {error}") from error
+    return validate_drafts(data)
+
+
+def validate_drafts(data: Any) -> list[TestCaseDraft]:
+    """Validate decoded JSON as a non-empty list of test-case drafts."""
+    try:
         drafts = TypeAdapter(list[TestCaseDraft]).validate_python(data)
-    except (json.JSONDecodeError, ValidationError) as error:
+    except ValidationError as error:
         raise TestCaseDocumentError(f"Invalid test-case JSON: {error}") from error
     if not drafts:
         raise TestCaseDocumentError("Test-case JSON must contain at least one case")
     return drafts
 
 
+def parse_batch_drafts(
+    response: str, keys: list[str]
+) -> dict[str, list[TestCaseDraft]]:
+    """Parse a batched response mapping endpoint keys to draft arrays.
+
+    Only keys whose drafts validate are returned; the caller regenerates
+    missing or invalid endpoints on their own.
+
+    Raises:
+        TestCaseDocumentError: if the response is not a JSON object.
+    """
+    payload = extract_fenced_content(response, "json")
+    try:
+        data = json.loads(payload)
+    except json.JSONDecodeError as error:
+        raise TestCaseDocumentError(f"Invalid test-case JSON: {error}") from error
+    if not isinstance(data, dict):
+        raise TestCaseDocumentError("Batched test-case JSON must be an object")
+
+    drafts = {}
+    for key in keys:
+        if key in data:
+            with contextlib.suppress(TestCaseDocumentError):
+                drafts[key] = validate_drafts(data[key])
+    return drafts
+
+
 def render_endpoint_section(
     endpoint: ApiEndpoint, drafts: list[TestCaseDraft], start_index: int
 ) -> tuple[str, int]:
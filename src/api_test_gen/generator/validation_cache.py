@@ -0,0 +1,191 @@
+"""Validation results keyed by file content and the content of dependencies.
+
+Repair rounds and incremental runs validate mostly unchanged files again. A
+syntax or YAML check depends only on the file's own content; a test module's
+collection result also depends on the conftest and ``__init__`` files above
+it, on the generated modules it imports (transitively, e.g. ``api/client.py``)
+and on the data files tests may load. Keys hash exactly those inputs plus the
+Python, PyYAML and pytest versions, so a cached result is reused only when
+nothing that could change it has changed.
+
+Results live in memory for one run and, when a store is given, in a
+:class:`~api_test_gen.cache.ResponseCache` directory so later runs can reuse
+them. A cached value is the error message, or an empty string for a pass.
+Failed collections stay in memory only: they may come from the environment
+(a third-party package not installed yet, a different ``sys.path``) rather
+than from the hashed files, and a later run should see the fix.
+"""
+
+import ast
+import sys
+import threading
+from collections.abc import Iterable, Mapping
+from functools import cache
+from importlib import metadata
+from pathlib import Path
+
+from api_test_gen.cache import ResponseCache, cache_key
+
+CACHE_FORMAT_VERSION = "1"
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+VALIDATION_CACHE_SUBDIR = "validation"
+
+
+class ValidationCache:
+    """Validation outcomes by key, kept in memory and optionally on disk."""
+
+    def __init__(self, store: ResponseCache | None = None):
+        self.store = store
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._memory: dict[str, str] = {}
+
+    @classmethod
+    def on_disk(
+        cls, directory: Path, max_bytes: int = DEFAULT_MAX_BYTES
+    ) -> "ValidationCache":
+        """Create a cache persisted under ``directory``."""
+        return cls(ResponseCache(directory, max_bytes=max_bytes))
+
+    def get(self, key: str) -> str | None:
+        """Return the cached error ("" for a pass), or ``None`` on a miss."""
+        with self._lock:
+            result = self._memory.get(key)
+        if result is None and self.store is not None:
+            result = self.store.get(key)
+            if result is not None:
+                with self._lock:
+                    self._memory[key] = result
+        with self._lock:
+            if result is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return result
+
+    def put(self, key: str, error: str, persist: bool = True) -> None:
+        """Remember a result; ``error`` is empty when the check passed.
+
+        With ``persist=False`` the result is kept for this run only.
+        """
+        with self._lock:
+            self._memory[key] = error
+        if persist and self.store is not None:
+            self.store.put(key, error)
+
+
+def static_key(filename: str, content: str) -> str:
+    """Key of a syntax (``.py``) or YAML check of one file."""
+    kind = "python" if filename.endswith(".py") else "yaml"
+    return cache_key("static", CACHE_FORMAT_VERSION, _toolchain(), kind, content)
+
+
+def collect_keys(files: Mapping[str, str], modules: Iterable[str]) -> dict[str, str]:
+    """Key the collection result of each test module by everything it depends on."""
+    data_files = [name for name in files if not name.endswith(".py")]
+    return _dependency_keys("collect", files, modules, data_files)
+
+
+def reference_keys(files: Mapping[str, str], modules: Iterable[str]) -> dict[str, str]:
+    """Key the import/fixture check of each module by its Python dependencies."""
+    return _dependency_keys("references", files, modules, [])
+
+
+def _dependency_keys(
+    purpose: str,
+    files: Mapping[str, str],
+    modules: Iterable[str],
+    extra: list[str],
+) -> dict[str, str]:
+    digests = {name: cache_key(content) for name, content in files.items()}
+    imports: dict[str, set[str]] = {}
+    keys = {}
+    for module in modules:
+        dependencies = _dependencies(module, files, imports) | set(extra)
+        parts = [purpose, CACHE_FORMAT_VERSION, _toolchain(), module]
+        for name in sorted(dependencies):
+            parts.extend((name, digests[name]))
+        keys[module] = cache_key(*parts)
+    return keys
+
+
+def _dependencies(
+    module: str, files: Mapping[str, str], imports: dict[str, set[str]]
+) -> set[str]:
+    """Return the module, its conftest/``__init__`` chain and local imports."""
+    directories = _directories(module)
+    pending = [module]
+    for directory in directories:
+        for name in ("conftest.py", "__init__.py"):
+            path = "/".join([*directory, name])
+            if path in files:
+                pending.append(path)
+
+    seen: set[str] = set()
+    while pending:
+        name = pending.pop()
+        if name in seen:
+            continue
+        seen.add(name)
+        if name not in imports:
+            imports[name] = _local_imports(name, files)
+        pending.extend(imports[name] - seen)
+    return seen
+
+
+def _local_imports(name: str, files: Mapping[str, str]) -> set[str]:
+    """Resolve the imports of one generated module to files of the set."""
+    try:
+        tree = ast.parse(files[name], filename=name)
+    except SyntaxError:
+        return set()
+
+    found: set[str] = set()
+    roots = _directories(name)
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                for root in roots:
+                    found |= _module_files([*root, *alias.name.split(".")], files)
+        elif isinstance(node, ast.ImportFrom):
+            dotted = node.module.split(".") if node.module else []
+            if node.level:
+                package = roots[-1][: len(roots[-1]) - (node.level - 1)]
+                bases = [[*package, *dotted]]
+            else:
+                bases = [[*root, *dotted] for root in roots]
+            for base in bases:
+                found |= _module_files(base, files)
+                for alias in node.names:
+                    found |= _module_files([*base, alias.name], files)
+    found.discard(name)
+    return found
+
+
+def _module_files(parts: list[str], files: Mapping[str, str]) -> set[str]:
+    """Files that importing ``parts`` as a dotted name would execute."""
+    found = set()
+    for end in range(1, len(parts) + 1):
+        path = "/".join(parts[:end])
+        for candidate in (f"{path}.py", f"{path}/__init__.py"):
+            if candidate in files:
+                found.add(candidate)
+    return found
+
+
+def _directories(name: str) -> list[list[str]]:
+    """Return the directories containing ``name``, from the root downwards."""
+    parts = name.split("/")[:-1]
+    return [parts[:end] for end in range(len(parts) + 1)]
+
+
+@cache
+def _toolchain() -> str:
+    versions = [f"python={sys.version_info.major}.{sys.version_info.minor}"]
+    for package in ("pyyaml", "pytest"):
+        try:
+            versions.append(f"{package}={metadata.version(package)}")
+        except metadata.PackageNotFoundError:
+            versions.append(f"{package}=missing")
+    return ";".join(versions)
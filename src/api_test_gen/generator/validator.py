@@ -1,116 +1,618 @@
-"""Validates generated code files for syntax and structural correctness."""
+"""Validates generated code files for syntax and structural correctness.
+
+Syntax and YAML checks of large outputs (hundreds of files in a layered
+project) fan out over a shared process pool sized to the available cores;
+smaller sets are checked in-process, where starting workers would cost more
+than it saves. Either way errors are returned in the order of the input files.
+YAML is parsed with libyaml when PyYAML was built with it.
+"""
 
 import ast
-import subprocess
-import sys
-import tempfile
-from pathlib import Path
+import atexit
+import functools
+import importlib.util
+import multiprocessing
+import os
+import threading
+from collections.abc import Callable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from importlib import metadata
 
 import yaml
 
-COLLECT_TIMEOUT_SECONDS = 30
+from api_test_gen.generator.collect_worker import is_test_module, shared_worker
+from api_test_gen.generator.validation_cache import (
+    ValidationCache,
+    collect_keys,
+    reference_keys,
+    static_key,
+)
+from api_test_gen.stats import span
+
+PARALLEL_MIN_FILES = 200
+BUILTIN_FIXTURES = frozenset(
+    {
+        "cache",
+        "capfd",
+        "capfdbinary",
+        "caplog",
+        "capsys",
+        "capsysbinary",
+        "doctest_namespace",
+        "monkeypatch",
+        "pytestconfig",
+        "record_property",
+        "record_testsuite_property",
+        "record_xml_attribute",
+        "recwarn",
+        "request",
+        "subtests",
+        "tmp_path",
+        "tmp_path_factory",
+        "tmpdir",
+        "tmpdir_factory",
+    }
+)
+CHUNKS_PER_WORKER = 4
+# libyaml's loader is several times faster; PyYAML may be built without it.
+_FAST_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+_pool: ProcessPoolExecutor | None = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
 
 
-def validate_python(files: dict[str, str]) -> dict[str, str]:
+def validate_python(
+    files: dict[str, str], workers: int | None = None
+) -> dict[str, str]:
     """Check Python files for syntax errors.
 
+    ``workers`` caps the processes used for large file sets; ``None`` uses
+    every available core and 1 keeps the check in-process.
     Returns dict of {filename: error_message} for files with errors.
     """
-    errors = {}
-    for filename, content in files.items():
-        if not filename.endswith(".py"):
-            continue
-        if not content.strip():
-            continue
-        try:
-            ast.parse(content, filename=filename)
-        except SyntaxError as e:
-            errors[filename] = f"SyntaxError: {e.msg} (line {e.lineno})"
-    return errors
+    candidates = {
+        filename: content
+        for filename, content in files.items()
+        if filename.endswith(".py") and content.strip()
+    }
+    with span("validate_python", files=len(candidates)):
+        return _run_checks(_python_error, candidates, workers)
 
 
-def validate_yaml(files: dict[str, str]) -> dict[str, str]:
+def validate_yaml(files: dict[str, str], workers: int | None = None) -> dict[str, str]:
     """Check YAML files for format errors.
 
+    ``workers`` works as in :func:`validate_python`.
     Returns dict of {filename: error_message} for files with errors.
     """
-    errors = {}
-    for filename, content in files.items():
-        if not filename.endswith((".yaml", ".yml")):
-            continue
+    candidates = {
+        filename: content
+        for filename, content in files.items()
+        if filename.endswith((".yaml", ".yml"))
+    }
+    with span("validate_yaml", files=len(candidates)):
+        return _run_checks(_yaml_error, candidates, workers)
+
+
+def _python_error(filename: str, content: str) -> str | None:
+    try:
+        ast.parse(content, filename=filename)
+    except SyntaxError as e:
+        return f"SyntaxError: {e.msg} (line {e.lineno})"
+    return None
+
+
+def _yaml_error(filename: str, content: str) -> str | None:
+    try:
+        yaml.load(content, Loader=_FAST_YAML_LOADER)
+    except yaml.YAMLError as fast_error:
+        # Re-parse in pure Python for its error message, which quotes the
+        # offending line and gives the repair prompt more to work with.
         try:
             yaml.safe_load(content)
         except yaml.YAMLError as e:
-            errors[filename] = f"YAMLError: {e}"
-    return errors
+            return f"YAMLError: {e}"
+        return f"YAMLError: {fast_error}"
+    return None
 
 
-def validate_collect(files: dict[str, str]) -> dict[str, str]:
-    """Run pytest --collect-only to verify tests can be discovered.
+def _run_checks(
+    check: Callable[[str, str], str | None],
+    files: dict[str, str],
+    workers: int | None,
+) -> dict[str, str]:
+    """Apply check to every file, in worker processes when the set is large."""
+    workers = workers or os.process_cpu_count() or 1
+    names = list(files)
+    contents = list(files.values())
+    results = None
+    if workers > 1 and len(names) >= PARALLEL_MIN_FILES:
+        chunksize = max(1, len(names) // (workers * CHUNKS_PER_WORKER))
+        try:
+            results = list(
+                _shared_pool(workers).map(check, names, contents, chunksize=chunksize)
+            )
+        except BrokenProcessPool:
+            _reset_pool()
+    if results is None:
+        results = list(map(check, names, contents))
+    return {name: error for name, error in zip(names, results) if error is not None}
+
+
+def _shared_pool(workers: int) -> ProcessPoolExecutor:
+    """Return the process-wide pool, (re)creating it for a new worker count."""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False, cancel_futures=True)
+            # spawn: forking a process that runs generator threads can deadlock.
+            _pool = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            )
+            _pool_workers = workers
+        return _pool
 
-    Writes files to a temp directory and runs pytest collection.
+
+def _reset_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+atexit.register(_reset_pool)
+
+
+def validate_static(filename: str, content: str) -> str | None:
+    """Run the syntax or YAML check of a single file; return its error, if any."""
+    errors = validate_python({filename: content})
+    errors.update(validate_yaml({filename: content}))
+    return errors.get(filename)
+
+
+def validate_static_files(
+    files: dict[str, str], cache: ValidationCache
+) -> dict[str, str]:
+    """Syntax and YAML checks that skip files whose content was checked before."""
+    keys = {
+        filename: static_key(filename, content)
+        for filename, content in files.items()
+        if filename.endswith((".py", ".yaml", ".yml"))
+    }
+    cached = {filename: cache.get(key) for filename, key in keys.items()}
+    missing = {
+        filename: files[filename] for filename, error in cached.items() if error is None
+    }
+    checked = validate_python(missing)
+    checked.update(validate_yaml(missing))
+    for filename in missing:
+        cached[filename] = checked.get(filename, "")
+        cache.put(keys[filename], cached[filename])
+    return {filename: error for filename, error in cached.items() if error}
+
+
+def validate_references(
+    files: dict[str, str], cache: ValidationCache | None = None
+) -> dict[str, str]:
+    """Check imports between generated modules and the fixtures tests request.
+
+    Catches the usual collection failures without starting pytest: imports of
+    generated modules that do not exist, names (classes, functions, constants)
+    a generated module does not define, and test parameters that are neither
+    parametrized nor fixtures from the module, a conftest above it, pytest
+    itself or an installed pytest plugin. Only modules of the generated set are
+    resolved; third-party imports are left to collection. Files must already
+    parse. Failures are not persisted, since installing a plugin can fix them.
     Returns dict of {filename: error_message} for files with errors.
     """
-    test_files = {f: c for f, c in files.items() if f.endswith(".py") and c.strip()}
-    if not test_files:
-        return {}
+    with span("validate_references", files=len(files)):
+        modules = [f for f, c in files.items() if f.endswith(".py") and c.strip()]
+        keys = reference_keys(files, modules) if cache is not None else {}
+        index = _ModuleIndex(files)
+        errors = {}
+        for module in modules:
+            error = cache.get(keys[module]) if cache is not None else None
+            if error is None:
+                problems = index.import_problems(module)
+                if is_test_module(module):
+                    problems.extend(index.fixture_problems(module))
+                error = "; ".join(problems)
+                if cache is not None:
+                    cache.put(keys[module], error, persist=not error)
+            if error:
+                errors[module] = error
+        return errors
 
-    errors = {}
-    with tempfile.TemporaryDirectory() as tmpdir:
-        tmppath = Path(tmpdir)
-        for filename, content in files.items():
-            filepath = tmppath / filename
-            filepath.parent.mkdir(parents=True, exist_ok=True)
-            filepath.write_text(content, encoding="utf-8")
 
-        try:
-            result = subprocess.run(
-                [
-                    sys.executable,
-                    "-m",
-                    "pytest",
-                    "--collect-only",
-                    "-q",
-                    str(tmppath),
-                ],
-                capture_output=True,
-                text=True,
-                cwd=tmpdir,
-                timeout=COLLECT_TIMEOUT_SECONDS,
+class _ModuleIndex:
+    """Parsed generated modules and the names they define, built lazily."""
+
+    def __init__(self, files: dict[str, str]):
+        self.files = files
+        self._trees: dict[str, ast.Module | None] = {}
+        self._exports: dict[str, set[str] | None] = {}
+        self._fixtures: dict[str, tuple[set[str], bool]] = {}
+        self._top_level = {name.split("/")[0].removesuffix(".py") for name in files}
+
+    def import_problems(self, module: str) -> list[str]:
+        tree = self._tree(module)
+        if tree is None:
+            return []
+        package = module.split("/")[:-1]
+        guarded = _guarded_imports(tree)
+        problems = []
+        for node in ast.walk(tree):
+            if id(node) in guarded:
+                continue
+            if isinstance(node, ast.Import):
+                for alias in node.names:
+                    parts = alias.name.split(".")
+                    if parts[0] in self._top_level:
+                        problems.extend(self._missing_modules(parts, node.lineno))
+            elif isinstance(node, ast.ImportFrom):
+                problems.extend(self._from_import_problems(node, package))
+        return problems
+
+    def fixture_problems(self, module: str) -> list[str]:
+        tree = self._tree(module)
+        if tree is None:
+            return []
+        available, opaque = self._module_fixtures(module)
+        plugin_fixtures, plugins_opaque = _plugin_fixtures()
+        available |= plugin_fixtures
+        opaque = opaque or plugins_opaque
+        for directory in _parent_directories(module):
+            conftest = "/".join([*directory, "conftest.py"])
+            if conftest in self.files:
+                fixtures, conftest_opaque = self._module_fixtures(conftest)
+                available |= fixtures
+                opaque = opaque or conftest_opaque
+        if opaque:
+            return []
+
+        problems = []
+        for test, class_decorators in _test_functions(tree):
+            parametrized = _parametrized_names(
+                [*test.decorator_list, *(class_decorators or [])]
+            )
+            if parametrized is None:
+                continue
+            arguments = [*test.args.posonlyargs, *test.args.args]
+            required = arguments[: len(arguments) - len(test.args.defaults)]
+            if class_decorators is not None and required:
+                required = required[1:]  # self
+            for argument in required:
+                name = argument.arg
+                if name not in available and name not in parametrized:
+                    problems.append(
+                        f"fixture '{name}' not found for {test.name} "
+                        f"(line {test.lineno})"
+                    )
+        return problems
+
+    def _from_import_problems(
+        self, node: ast.ImportFrom, package: list[str]
+    ) -> list[str]:
+        dotted = node.module.split(".") if node.module else []
+        if node.level:
+            if node.level - 1 > len(package):
+                return []
+            base = [*package[: len(package) - (node.level - 1)], *dotted]
+        elif dotted and dotted[0] in self._top_level:
+            base = dotted
+        else:
+            return []
+
+        missing = self._missing_modules(base, node.lineno)
+        if missing:
+            return missing
+        source = self._module_file(base)
+        exports = self._module_exports(source) if source is not None else set()
+        problems = []
+        for alias in node.names:
+            if alias.name == "*" or exports is None or alias.name in exports:
+                continue
+            if self._is_module([*base, alias.name]):
+                continue
+            problems.append(
+                f"ImportError: cannot import name '{alias.name}' from "
+                f"'{'.'.join(base) or '.'}' (line {node.lineno})"
             )
-        except subprocess.TimeoutExpired:
-            return {
-                "_collect": (
-                    "pytest collection timed out after "
-                    f"{COLLECT_TIMEOUT_SECONDS} seconds"
+        return problems
+
+    def _missing_modules(self, parts: list[str], lineno: int) -> list[str]:
+        for end in range(1, len(parts) + 1):
+            if not self._is_module(parts[:end]):
+                name = ".".join(parts[:end])
+                return [
+                    f"ModuleNotFoundError: No module named '{name}' (line {lineno})"
+                ]
+        return []
+
+    def _is_module(self, parts: list[str]) -> bool:
+        if self._module_file(parts) is not None:
+            return True
+        prefix = "/".join(parts) + "/"
+        return any(name.startswith(prefix) for name in self.files)
+
+    def _module_file(self, parts: list[str]) -> str | None:
+        path = "/".join(parts)
+        for candidate in (f"{path}.py", f"{path}/__init__.py"):
+            if candidate in self.files:
+                return candidate
+        return None
+
+    def _tree(self, module: str) -> ast.Module | None:
+        if module not in self._trees:
+            try:
+                self._trees[module] = ast.parse(self.files[module], filename=module)
+            except SyntaxError:
+                self._trees[module] = None
+        return self._trees[module]
+
+    def _module_exports(self, module: str) -> set[str] | None:
+        """Top-level names of a module; ``None`` when they cannot be known."""
+        if module not in self._exports:
+            tree = self._tree(module)
+            self._exports[module] = None if tree is None else _defined_names(tree)
+        return self._exports[module]
+
+    def _module_fixtures(self, module: str) -> tuple[set[str], bool]:
+        """Fixture names a module provides and whether it may provide others."""
+        if module not in self._fixtures:
+            tree = self._tree(module)
+            if tree is None:
+                self._fixtures[module] = (set(), True)
+            else:
+                self._fixtures[module] = _defined_fixtures(tree)
+        fixtures, opaque = self._fixtures[module]
+        return set(fixtures), opaque
+
+
+def _guarded_imports(tree: ast.Module) -> set[int]:
+    """Imports inside ``try`` blocks, which may be optional by design."""
+    guarded = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Try) and node.handlers:
+            for statement in node.body:
+                guarded.update(id(child) for child in ast.walk(statement))
+    return guarded
+
+
+def _defined_names(tree: ast.Module) -> set[str] | None:
+    names: set[str] = set()
+    pending: list[ast.stmt] = list(tree.body)
+    while pending:
+        node = pending.pop()
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            if node.name == "__getattr__":
+                return None
+            names.add(node.name)
+        elif isinstance(node, ast.Import):
+            names.update((a.asname or a.name).split(".")[0] for a in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            if any(alias.name == "*" for alias in node.names):
+                return None
+            names.update(alias.asname or alias.name for alias in node.names)
+        elif isinstance(node, (ast.Assign, ast.AnnAssign, ast.AugAssign, ast.For)):
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            for target in targets:
+                names.update(
+                    child.id
+                    for child in ast.walk(target)
+                    if isinstance(child, ast.Name)
                 )
-            }
-        if result.returncode != 0:
-            stderr = result.stderr + result.stdout
-            for filename in test_files:
-                if filename in stderr:
-                    lines = [
-                        line
-                        for line in stderr.splitlines()
-                        if filename in line or "ERROR" in line or "Error" in line
-                    ]
-                    errors[filename] = "\n".join(lines[:5]) if lines else stderr[:500]
-            if not errors and stderr.strip():
-                errors["_collect"] = stderr[:500]
-    return errors
+        elif isinstance(node, (ast.With, ast.AsyncWith)):
+            for item in node.items:
+                if item.optional_vars is not None:
+                    names.update(
+                        child.id
+                        for child in ast.walk(item.optional_vars)
+                        if isinstance(child, ast.Name)
+                    )
+        elif isinstance(node, ast.TypeAlias):
+            names.add(node.name.id)
+        elif isinstance(node, ast.Match):
+            for case in node.cases:
+                pending.extend(case.body)
+        # Statements nested in if/try/with/for blocks still run at import time.
+        if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            for field in ("body", "orelse", "finalbody", "handlers"):
+                pending.extend(getattr(node, field, []))
+    return names
+
+
+def _defined_fixtures(tree: ast.Module) -> tuple[set[str], bool]:
+    """Fixtures defined (or imported) by a module and whether others may exist.
+
+    Imported names count as fixtures since a conftest may re-export them;
+    ``pytest_plugins`` and ``pytest_generate_tests`` make the set unknowable.
+    """
+    fixtures: set[str] = set()
+    opaque = False
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            if node.name == "pytest_generate_tests":
+                opaque = True
+            for decorator in node.decorator_list:
+                call = decorator if isinstance(decorator, ast.Call) else None
+                target = call.func if call is not None else decorator
+                if _dotted_name(target) not in (
+                    "fixture",
+                    "pytest.fixture",
+                    "yield_fixture",
+                    "pytest.yield_fixture",
+                ):
+                    continue
+                name = node.name
+                for keyword in call.keywords if call is not None else []:
+                    if keyword.arg == "name" and isinstance(
+                        keyword.value, ast.Constant
+                    ):
+                        name = str(keyword.value.value)
+                fixtures.add(name)
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            if any(alias.name == "*" for alias in node.names):
+                opaque = True
+            fixtures.update(alias.asname or alias.name for alias in node.names)
+        elif isinstance(node, ast.Name) and node.id == "pytest_plugins":
+            opaque = True
+    return fixtures, opaque
+
+
+@functools.cache
+def _plugin_fixtures() -> tuple[frozenset[str], bool]:
+    """Fixtures of pytest and its installed plugins, and whether others may exist.
+
+    Plugins are found through their ``pytest11`` entry points and read rather
+    than imported; a plugin whose source cannot be read makes the set
+    unknowable, so the fixture check is left to collection.
+    """
+    fixtures = set(BUILTIN_FIXTURES)
+    opaque = False
+    for entry_point in metadata.entry_points(group="pytest11"):
+        tree = _module_source_tree(entry_point.module)
+        if tree is None:
+            opaque = True
+            continue
+        plugin_fixtures, plugin_opaque = _defined_fixtures(tree)
+        fixtures |= plugin_fixtures
+        opaque = opaque or plugin_opaque
+    return frozenset(fixtures), opaque
 
 
-def validate_files(files: dict[str, str]) -> dict[str, str]:
+def _module_source_tree(name: str) -> ast.Module | None:
+    try:
+        spec = importlib.util.find_spec(name)
+        if spec is None or spec.origin is None:
+            return None
+        with open(spec.origin, encoding="utf-8") as source:
+            return ast.parse(source.read())
+    except (ImportError, ValueError, OSError, SyntaxError):
+        return None
+
+
+def _test_functions(
+    tree: ast.Module,
+) -> Iterator[tuple[ast.FunctionDef | ast.AsyncFunctionDef, list[ast.expr] | None]]:
+    """Yield collected test functions with their class decorators (None at top level)."""
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            if node.name.startswith("test"):
+                yield node, None
+        elif isinstance(node, ast.ClassDef) and node.name.startswith("Test"):
+            for child in node.body:
+                if isinstance(
+                    child, (ast.FunctionDef, ast.AsyncFunctionDef)
+                ) and child.name.startswith("test"):
+                    if any(
+                        _dotted_name(d) in ("staticmethod", "classmethod")
+                        for d in child.decorator_list
+                    ):
+                        continue
+                    yield child, node.decorator_list
+
+
+def _parametrized_names(decorators: list[ast.expr]) -> set[str] | None:
+    """Argument names supplied by ``parametrize`` marks; ``None`` if not literal."""
+    names: set[str] = set()
+    for decorator in decorators:
+        if not (
+            isinstance(decorator, ast.Call)
+            and _dotted_name(decorator.func).endswith("parametrize")
+        ):
+            continue
+        argnames = decorator.args[0] if decorator.args else None
+        for keyword in decorator.keywords:
+            if keyword.arg == "argnames":
+                argnames = keyword.value
+        if isinstance(argnames, ast.Constant) and isinstance(argnames.value, str):
+            names.update(part.strip() for part in argnames.value.split(","))
+        elif isinstance(argnames, (ast.List, ast.Tuple)) and all(
+            isinstance(item, ast.Constant) and isinstance(item.value, str)
+            for item in argnames.elts
+        ):
+            names.update(item.value for item in argnames.elts)
+        else:
+            return None
+    return names
+
+
+def _dotted_name(node: ast.expr) -> str:
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        return f"{_dotted_name(node.value)}.{node.attr}"
+    return ""
+
+
+def _parent_directories(name: str) -> list[list[str]]:
+    parts = name.split("/")[:-1]
+    return [parts[:end] for end in range(len(parts) + 1)]
+
+
+def validate_collect(
+    files: dict[str, str], cache: ValidationCache | None = None
+) -> dict[str, str]:
+    """Run pytest collection to verify tests can be discovered.
+
+    Files are handed to a warm collection worker that keeps them on disk
+    between rounds and re-collects only the modules that changed. With a
+    cache, test modules whose content and dependencies are unchanged are not
+    collected at all.
+    Returns dict of {filename: error_message} for files with errors.
+    """
+    with span("validate_collect", files=len(files)):
+        test_files = {f: c for f, c in files.items() if f.endswith(".py") and c.strip()}
+        if not test_files:
+            return {}
+        if cache is None:
+            return shared_worker().collect(files)
+
+        keys = collect_keys(files, sorted(filter(is_test_module, files)))
+        cached = {module: cache.get(key) for module, key in keys.items()}
+        errors = {module: error for module, error in cached.items() if error}
+        missing = [module for module, error in cached.items() if error is None]
+        if not missing:
+            return errors
+
+        collected = shared_worker().collect(files, targets=missing)
+        # Errors that belong to no requested module (a broken conftest, a crash)
+        # say nothing reliable about individual modules; keep them uncached.
+        # Module errors may depend on installed packages, so only passes are
+        # persisted across runs.
+        if set(collected) <= set(missing):
+            for module in missing:
+                error = collected.get(module, "")
+                cache.put(keys[module], error, persist=not error)
+        errors.update(collected)
+        return errors
+
+
+def validate_files(
+    files: dict[str, str], cache: ValidationCache | None = None
+) -> dict[str, str]:
     """Run all validations on generated files.
 
     Returns dict of {filename: error_message} for all files with errors.
-    Runs syntax/YAML checks first, then pytest collect only if syntax passes.
+    Runs syntax/YAML checks first, then the static import/fixture check, and
+    pytest collect only once both pass.
+    With a cache, results of unchanged files are reused instead of recomputed.
     """
     errors = {}
-    errors.update(validate_python(files))
-    errors.update(validate_yaml(files))
+    if cache is None:
+        errors.update(validate_python(files))
+        errors.update(validate_yaml(files))
+    else:
+        errors.update(validate_static_files(files, cache))
 
     if not errors:
-        errors.update(validate_collect(files))
+        errors.update(validate_references(files, cache))
+    if not errors:
+        errors.update(validate_collect(files, cache))
 
     return errors
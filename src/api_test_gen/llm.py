@@ -3,20 +3,139 @@
 Provides a unified interface for calling any LLM model supported by litellm,
 with a per-request timeout, bounded retries, and response validation so that
 network hiccups or empty completions surface as a clear error instead of
-crashing deep inside the generation pipeline.
+crashing deep inside the generation pipeline. Requests pass through the
+run-wide :class:`~api_test_gen.ratelimit.RateLimiter`, which paces them against
+the model's budgets and retries transient failures with jittered backoff.
+Identical requests in flight at the same time share one completion, and
+responses can be recorded to a :class:`~api_test_gen.cassette.Cassette` and
+replayed from it later without network access.
+
+litellm takes seconds to import, so it is loaded on the first request rather
+than with this module; commands that never call a model do not pay for it.
 """
 
-from litellm import completion
+import asyncio
+import threading
+from collections.abc import Sequence
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from functools import cache
+from typing import Any
+
+from api_test_gen.cache import ResponseCache, cache_key
+from api_test_gen.cassette import Cassette, CassetteEntry
+from api_test_gen.ratelimit import FATAL, RateLimiter, classify_error, estimate_tokens
+from api_test_gen.stats import span
 
 DEFAULT_MODEL = "claude-sonnet-4-20250514"
 DEFAULT_TIMEOUT_SECONDS = 120.0
 DEFAULT_NUM_RETRIES = 2
+MAX_CACHE_BREAKPOINTS = 4  # Anthropic's limit of cache_control blocks
+
+
+def completion(**kwargs: Any) -> Any:
+    """Call ``litellm.completion``, importing litellm on first use."""
+    from litellm import completion as litellm_completion
+
+    return litellm_completion(**kwargs)
+
+
+async def acompletion(**kwargs: Any) -> Any:
+    """Call ``litellm.acompletion``, importing litellm on first use."""
+    from litellm import acompletion as litellm_acompletion
+
+    return await litellm_acompletion(**kwargs)
+
+
+@cache
+def supports_prompt_caching(model: str) -> bool:
+    """Return whether litellm knows the model to honour ``cache_control`` markers."""
+    from litellm.utils import supports_prompt_caching as litellm_supports
+
+    return bool(litellm_supports(model))
+
+
+@cache
+def model_prices(model: str) -> tuple[float, float] | None:
+    """Return litellm's (prompt, completion) USD price per token, if it knows them."""
+    from litellm import model_cost
+
+    prices = model_cost.get(model) or {}
+    prompt = prices.get("input_cost_per_token")
+    completion = prices.get("output_cost_per_token")
+    if prompt is None or completion is None:
+        return None
+    return float(prompt), float(completion)
 
 
 class LlmError(RuntimeError):
     """Raised when the LLM request fails or returns no usable content."""
 
 
+class FlightAbandoned(Exception):
+    """The leader of a flight was cancelled or interrupted before it landed."""
+
+
+class SingleFlight:
+    """Requests in flight by key, so identical concurrent requests run once.
+
+    The first caller of a key leads the flight and sends the request; callers
+    arriving before it lands wait for its response (or error) instead of
+    sending their own. A leader that is cancelled or interrupted abandons the
+    flight, and its waiting callers join or lead a new one. A finished flight
+    is forgotten at once; later repeats are the response cache's business.
+    """
+
+    def __init__(self):
+        self.shared = 0
+        self._lock = threading.Lock()
+        self._flights: dict[str, Future[str]] = {}
+
+    def join(self, key: str) -> tuple[Future[str], bool]:
+        """Return the flight for key and whether the caller has to lead it."""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                self.shared += 1
+                return flight, False
+            flight = self._flights[key] = Future()
+            # A running future cannot be cancelled, so a cancelled async
+            # waiter cannot take the flight down with it.
+            flight.set_running_or_notify_cancel()
+            return flight, True
+
+    def land(
+        self,
+        key: str,
+        flight: Future[str],
+        result: str | None = None,
+        error: BaseException | None = None,
+    ) -> None:
+        """Finish a led flight and hand its outcome to every waiting caller.
+
+        Only request errors are handed on; the leader's own cancellation or
+        interrupt reaches waiting callers as :class:`FlightAbandoned`.
+        """
+        with self._lock:
+            del self._flights[key]
+        if error is not None and not isinstance(error, Exception):
+            error = FlightAbandoned()
+        if error is not None:
+            flight.set_exception(error)
+        else:
+            flight.set_result(result)
+
+
+@dataclass(frozen=True)
+class LlmOptions:
+    """Run-wide settings shared by every client created for one command."""
+
+    cache: ResponseCache | None = None
+    rate_limiter: RateLimiter = field(default_factory=RateLimiter)
+    cassette: Cassette | None = None
+    single_flight: SingleFlight = field(default_factory=SingleFlight)
+
+
 class LlmClient:
     """Wrapper for LLM API calls via litellm."""
 
@@ -25,36 +144,309 @@ class LlmClient:
         model: str | None = None,
         timeout: float = DEFAULT_TIMEOUT_SECONDS,
         num_retries: int = DEFAULT_NUM_RETRIES,
+        api_base: str | None = None,
+        options: LlmOptions | None = None,
     ):
         self.model = model or DEFAULT_MODEL
         self.timeout = timeout
         self.num_retries = num_retries
+        self.api_base = api_base
+        self.options = options or LlmOptions()
+        self._session: Any = None
+        self._session_loop: asyncio.AbstractEventLoop | None = None
 
-    def call(self, system: str, user: str) -> str:
+    def call(
+        self, system: str, user: str, cache_breakpoints: Sequence[int] = ()
+    ) -> str:
         """Send a system+user message to the LLM and return the response text.
 
-        Retries transient failures up to ``num_retries`` times and aborts each
-        attempt after ``timeout`` seconds.
+        ``cache_breakpoints`` are offsets into ``system`` that end a stable
+        prefix shared with other requests. For models with prompt caching each
+        prefix is sent as its own content block marked cacheable, so repeated
+        prefixes are read from the provider's cache instead of being processed
+        again; other models receive the plain system text.
+
+        Retries throttling, timeouts and server errors up to ``num_retries``
+        times with jittered exponential backoff and aborts each attempt after
+        ``timeout`` seconds. When a response cache is configured, a previously
+        stored answer for the same model and prompts is returned without a
+        network call. A call identical to one still in flight waits for that
+        call's response instead of sending its own. With a cassette, every
+        response is recorded to it, or when replaying, served from it alone.
 
         Raises:
-            LlmError: if the request fails or the response carries no text.
+            LlmError: if the request fails, the response carries no text or
+                a replayed cassette has no response for the request.
         """
-        try:
-            response = completion(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system},
-                    {"role": "user", "content": user},
-                ],
-                timeout=self.timeout,
-                num_retries=self.num_retries,
+        with span("llm", model=self.model) as trace:
+            key = self._cache_key(system, user)
+            known = self._known_response(key, trace)
+            if known is not None:
+                return known
+            while True:
+                flight, leader = self.options.single_flight.join(key)
+                if leader:
+                    break
+                try:
+                    text = flight.result()
+                except FlightAbandoned:
+                    continue
+                trace.set(shared=True)
+                return text
+            try:
+                text = self._complete(key, system, user, cache_breakpoints, trace)
+            except BaseException as error:
+                self.options.single_flight.land(key, flight, error=error)
+                raise
+            self.options.single_flight.land(key, flight, text)
+            return text
+
+    async def acall(
+        self, system: str, user: str, cache_breakpoints: Sequence[int] = ()
+    ) -> str:
+        """Async counterpart of :meth:`call` built on ``litellm.acompletion``.
+
+        Applies the same timeout, retry and error rules. Calls made on one event
+        loop share a single HTTP session, so many requests can be awaited
+        concurrently without a thread or connection pool per request.
+
+        Raises:
+            LlmError: if the request fails, the response carries no text or
+                a replayed cassette has no response for the request.
+        """
+        with span("llm", model=self.model) as trace:
+            key = self._cache_key(system, user)
+            known = self._known_response(key, trace)
+            if known is not None:
+                return known
+            while True:
+                flight, leader = self.options.single_flight.join(key)
+                if leader:
+                    break
+                try:
+                    text = await asyncio.wrap_future(flight)
+                except FlightAbandoned:
+                    continue
+                trace.set(shared=True)
+                return text
+            try:
+                text = await self._acomplete(
+                    key, system, user, cache_breakpoints, trace
+                )
+            except BaseException as error:
+                self.options.single_flight.land(key, flight, error=error)
+                raise
+            self.options.single_flight.land(key, flight, text)
+            return text
+
+    def _complete(
+        self,
+        key: str,
+        system: str,
+        user: str,
+        cache_breakpoints: Sequence[int],
+        trace: Any,
+    ) -> str:
+        limiter = self.options.rate_limiter.for_model(self.model)
+        tokens = estimate_tokens(system, user)
+        attempt = 0
+        while True:
+            try:
+                with limiter.slot(tokens) as slot:
+                    response = completion(
+                        **self._request(system, user, cache_breakpoints)
+                    )
+                    slot.record_usage(response)
+            except Exception as error:
+                if not self._should_retry(error, attempt):
+                    raise self._request_error(error) from error
+                limiter.sleep(limiter.retry_delay(attempt))
+                attempt += 1
+                continue
+            return self._finish(key, response, trace, attempt)
+
+    async def _acomplete(
+        self,
+        key: str,
+        system: str,
+        user: str,
+        cache_breakpoints: Sequence[int],
+        trace: Any,
+    ) -> str:
+        limiter = self.options.rate_limiter.for_model(self.model)
+        tokens = estimate_tokens(system, user)
+        attempt = 0
+        while True:
+            try:
+                async with limiter.slot(tokens) as slot:
+                    response = await acompletion(
+                        **self._request(system, user, cache_breakpoints),
+                        shared_session=self._async_session(),
+                    )
+                    slot.record_usage(response)
+            except Exception as error:
+                if not self._should_retry(error, attempt):
+                    raise self._request_error(error) from error
+                await asyncio.sleep(limiter.retry_delay(attempt))
+                attempt += 1
+                continue
+            return self._finish(key, response, trace, attempt)
+
+    def discard(self, system: str, user: str) -> None:
+        """Drop a cached response the caller found unusable."""
+        if self.options.cache is not None:
+            self.options.cache.discard(self._cache_key(system, user))
+
+    async def aclose(self) -> None:
+        """Close the HTTP session shared by :meth:`acall`, if one was opened."""
+        session, self._session = self._session, None
+        self._session_loop = None
+        if session is not None and not session.closed:
+            await session.close()
+
+    def _request(
+        self, system: str, user: str, cache_breakpoints: Sequence[int] = ()
+    ) -> dict[str, Any]:
+        request: dict[str, Any] = {
+            "model": self.model,
+            "messages": [
+                {
+                    "role": "system",
+                    "content": self._system_content(system, cache_breakpoints),
+                },
+                {"role": "user", "content": user},
+            ],
+            "timeout": self.timeout,
+            # Retries are paced by the rate limiter instead of litellm.
+            "num_retries": 0,
+        }
+        if self.api_base:
+            request["api_base"] = self.api_base
+        return request
+
+    def _system_content(
+        self, system: str, cache_breakpoints: Sequence[int]
+    ) -> str | list[dict[str, Any]]:
+        offsets = sorted(
+            {offset for offset in cache_breakpoints if 0 < offset <= len(system)}
+        )
+        if not offsets or not supports_prompt_caching(self.model):
+            return system
+        blocks: list[dict[str, Any]] = []
+        start = 0
+        for offset in offsets[-MAX_CACHE_BREAKPOINTS:]:
+            blocks.append(
+                {
+                    "type": "text",
+                    "text": system[start:offset],
+                    "cache_control": {"type": "ephemeral"},
+                }
             )
-        except Exception as error:
-            raise LlmError(
-                f"LLM request failed for model {self.model!r}: {error}"
-            ) from error
+            start = offset
+        if start < len(system):
+            blocks.append({"type": "text", "text": system[start:]})
+        return blocks
 
+    def _cache_key(self, system: str, user: str) -> str:
+        return cache_key(self.model, system, user)
+
+    def _cached(self, key: str) -> str | None:
+        if self.options.cache is None:
+            return None
+        return self.options.cache.get(key)
+
+    def _known_response(self, key: str, trace: Any) -> str | None:
+        """Answer from the cassette being replayed or the response cache."""
+        cassette = self.options.cassette
+        if cassette is not None and cassette.replaying:
+            entry = cassette.get(key)
+            if entry is None:
+                raise LlmError(
+                    f"Cassette {cassette.path} has no response for this request "
+                    f"to model {self.model!r}; record the run again with --record"
+                )
+            trace.set(
+                replayed=True,
+                prompt_tokens=entry.prompt_tokens,
+                completion_tokens=entry.completion_tokens,
+            )
+            return entry.response
+        cached = self._cached(key)
+        if cached is not None:
+            trace.set(cached=True)
+            self._record(key, CassetteEntry(cached))
+        return cached
+
+    def _finish(self, key: str, response: Any, trace: Any, retries: int) -> str:
+        self._trace_usage(trace, response, retries)
+        text = self._response_text(response)
+        prompt_tokens, completion_tokens = _token_counts(response)
+        self._record(key, CassetteEntry(text, prompt_tokens, completion_tokens))
+        return self._store(key, text)
+
+    def _record(self, key: str, entry: CassetteEntry) -> None:
+        cassette = self.options.cassette
+        if cassette is not None and not cassette.replaying:
+            cassette.put(key, self.model, entry)
+
+    def _store(self, key: str, text: str) -> str:
+        if self.options.cache is not None:
+            self.options.cache.put(key, text)
+        return text
+
+    def _async_session(self) -> Any:
+        loop = asyncio.get_running_loop()
+        if (
+            self._session is None
+            or self._session.closed
+            or self._session_loop is not loop
+        ):
+            import aiohttp
+
+            self._session = aiohttp.ClientSession()
+            self._session_loop = loop
+        return self._session
+
+    def _should_retry(self, error: Exception, attempt: int) -> bool:
+        return attempt < self.num_retries and classify_error(error) != FATAL
+
+    def _request_error(self, error: Exception) -> LlmError:
+        return LlmError(f"LLM request failed for model {self.model!r}: {error}")
+
+    def _trace_usage(self, trace: Any, response: Any, retries: int) -> None:
+        """Attach token counts and cost to the request's span when tracing."""
+        if not trace.recording:
+            return
+        prompt_tokens, completion_tokens = _token_counts(response)
+        trace.set(
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            retries=retries,
+        )
+        # litellm prices the response itself, including cache discounts; fall
+        # back to its per-token list prices when it could not.
+        hidden = getattr(response, "_hidden_params", None)
+        cost = hidden.get("response_cost") if isinstance(hidden, dict) else None
+        if not isinstance(cost, int | float):
+            prices = model_prices(self.model)
+            if prices is None:
+                return
+            cost = prompt_tokens * prices[0] + completion_tokens * prices[1]
+        trace.set(cost=float(cost))
+
+    def _response_text(self, response: Any) -> str:
         content = response.choices[0].message.content
         if content is None or not content.strip():
             raise LlmError(f"LLM returned empty response for model {self.model!r}")
         return content
+
+
+def _token_counts(response: Any) -> tuple[int, int]:
+    """Return the prompt and completion tokens a response reports, or zeros."""
+    usage = getattr(response, "usage", None)
+    prompt_tokens = getattr(usage, "prompt_tokens", None)
+    completion_tokens = getattr(usage, "completion_tokens", None)
+    return (
+        prompt_tokens if isinstance(prompt_tokens, int) else 0,
+        completion_tokens if isinstance(completion_tokens, int) else 0,
+    )
@@ -1,7 +1,20 @@
-"""Safe filesystem output helpers for generated artifacts."""
+"""Safe filesystem output helpers for generated artifacts.
 
+Files whose content is already on disk are left alone, so re-running a
+command does not bump mtimes, invalidate ``__pycache__`` and pytest caches,
+or wake file watchers. Changed files are written to a temporary file next to
+the target and renamed over it, so readers never see a half-written file.
+"""
+
+import contextlib
+import os
+import shutil
 from dataclasses import dataclass
 from pathlib import Path
+from types import TracebackType
+from typing import IO, Self
+
+PARTIAL_SUFFIX = ".partial"
 
 
 class OutputError(ValueError):
@@ -21,8 +34,15 @@ class WriteResult:
     """Summary of a generated-files write operation."""
 
     created: tuple[Path, ...]
+    updated: tuple[Path, ...]
+    unchanged: tuple[Path, ...]
     skipped: tuple[Path, ...]
 
+    @property
+    def written(self) -> tuple[Path, ...]:
+        """Files whose content was written by this operation."""
+        return self.created + self.updated
+
 
 def write_text(path: Path, content: str, append: bool = False) -> None:
     """Write text to a file, optionally appending after existing content."""
@@ -30,7 +50,58 @@ def write_text(path: Path, content: str, append: bool = False) -> None:
     if append and path.exists():
         existing = path.read_text(encoding="utf-8")
         content = f"{existing}\n{content}"
-    path.write_text(content, encoding="utf-8")
+    _write_if_changed(path, content.encode("utf-8"))
+
+
+class StreamingTextWriter:
+    """Write a text file piece by piece and move it into place when complete.
+
+    Chunks go to ``<name>.partial`` next to the target and are flushed right
+    away, so progress can be followed while a long generation runs. Leaving
+    the ``with`` block normally replaces the target atomically; an exception
+    removes the partial file and leaves any existing target untouched. With
+    ``append`` the new text follows the existing content as in
+    :func:`write_text`.
+    """
+
+    def __init__(self, path: Path, append: bool = False):
+        self.path = path
+        self.append = append
+        self.partial_path = path.with_name(path.name + PARTIAL_SUFFIX)
+        self._handle: IO[str] | None = None
+
+    def __enter__(self) -> Self:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._handle = self.partial_path.open("w", encoding="utf-8")
+        if self.append and self.path.exists():
+            self._handle.write(self.path.read_text(encoding="utf-8") + "\n")
+        return self
+
+    def write(self, text: str) -> None:
+        if self._handle is None:
+            raise OutputError(f"{self.path} is not open for writing")
+        self._handle.write(text)
+        self._handle.flush()
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        handle, self._handle = self._handle, None
+        if handle is None:
+            return
+        if exc is None:
+            os.fsync(handle.fileno())
+        handle.close()
+        if exc is None:
+            # Like _replace_atomically: a replaced file keeps its mode.
+            with contextlib.suppress(FileNotFoundError):
+                shutil.copymode(self.path, self.partial_path)
+            os.replace(self.partial_path, self.path)
+        else:
+            self.partial_path.unlink(missing_ok=True)
 
 
 def write_generated_files(
@@ -44,19 +115,55 @@ def write_generated_files(
     if len(set(paths.values())) != len(paths):
         raise OutputPathConflictError("Generated paths resolve to the same output file")
 
-    created = []
-    skipped = []
+    outcomes: dict[str, list[Path]] = {
+        "created": [],
+        "updated": [],
+        "unchanged": [],
+        "skipped": [],
+    }
     output_dir.mkdir(parents=True, exist_ok=True)
     for relative_path, content in files.items():
         file_path = paths[relative_path]
         if append and file_path.exists():
-            skipped.append(file_path)
+            outcomes["skipped"].append(file_path)
             continue
         file_path.parent.mkdir(parents=True, exist_ok=True)
-        file_path.write_text(content, encoding="utf-8")
-        created.append(file_path)
-
-    return WriteResult(created=tuple(created), skipped=tuple(skipped))
+        outcome = _write_if_changed(file_path, content.encode("utf-8"))
+        outcomes[outcome].append(file_path)
+
+    return WriteResult(**{name: tuple(paths) for name, paths in outcomes.items()})
+
+
+def _write_if_changed(path: Path, data: bytes) -> str:
+    """Atomically write data unless the file already holds exactly that.
+
+    Returns ``"created"``, ``"updated"`` or ``"unchanged"``. A size check
+    settles most changed files without reading them.
+    """
+    try:
+        size = path.stat().st_size
+    except FileNotFoundError:
+        _replace_atomically(path, data, existing=False)
+        return "created"
+    if size == len(data) and path.read_bytes() == data:
+        return "unchanged"
+    _replace_atomically(path, data, existing=True)
+    return "updated"
+
+
+def _replace_atomically(path: Path, data: bytes, existing: bool) -> None:
+    # Opened normally (not via mkstemp) so new files get the usual umask-based
+    # permissions; replaced files keep their previous mode.
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with tmp_path.open("wb") as handle:
+            handle.write(data)
+        if existing:
+            shutil.copymode(path, tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
 
 
 def _resolve_output_path(output_dir: Path, relative_path: str) -> Path:
@@ -1,20 +1,35 @@
 """Auto-detect API documentation format."""
 
+import re
 from pathlib import Path
 
 import yaml
 
+from .document import LoadedDocument, as_document
 
-def detect_format(file_path: Path) -> str:
+SNIFF_CHARS = 4096
+_YAML_SPEC_KEY = re.compile(r"""^["']?(?:openapi|swagger)["']?[ \t]*:""", re.MULTILINE)
+_YAML_MAPPING_LINE = re.compile(r"""^["']?[\w$.-]+["']?[ \t]*:""")
+_JSON_SPEC_KEY = re.compile(r'"(?:openapi|swagger)"\s*:\s*"')
+_JSON_POSTMAN_MARKER = re.compile(r'"_postman_id"\s*:|schema\.getpostman\.com')
+
+
+def detect_format(source: Path | LoadedDocument) -> str:
     """Detect the format of an API documentation file.
 
+    The first few KB are sniffed for an unambiguous OpenAPI/Swagger or Postman
+    marker; only when that is inconclusive is the whole document parsed.
+
     Returns: 'swagger', 'postman', or 'markdown'.
     """
-    text = file_path.read_text(encoding="utf-8")
+    document = as_document(source)
+    sniffed = sniff_format(document.text[:SNIFF_CHARS])
+    if sniffed is not None:
+        return sniffed
 
     # Try YAML/JSON parsing
     try:
-        data = yaml.safe_load(text)
+        data = document.data
         if isinstance(data, dict):
             if "openapi" in data or "swagger" in data:
                 return "swagger"
@@ -26,6 +41,51 @@ def detect_format(file_path: Path) -> str:
     return "markdown"
 
 
+def sniff_format(head: str) -> str | None:
+    """Guess the format from the start of a document without parsing it.
+
+    Returns ``None`` when the head carries no unambiguous marker.
+    """
+    stripped = head.lstrip("﻿ \t\r\n")
+    if stripped.startswith("{"):
+        if _JSON_SPEC_KEY.search(stripped):
+            return "swagger"
+        if _JSON_POSTMAN_MARKER.search(stripped):
+            return "postman"
+        return None
+
+    first_line = next(
+        (
+            line
+            for line in stripped.splitlines()
+            if line.strip()
+            and not line.lstrip().startswith("#")
+            and line.rstrip() != "---"
+        ),
+        "",
+    )
+    if _YAML_MAPPING_LINE.match(first_line) and _YAML_SPEC_KEY.search(
+        _yaml_front(stripped)
+    ):
+        return "swagger"
+    return None
+
+
+def _yaml_front(text: str) -> str:
+    """Leading lines of ``text`` that can belong to a YAML mapping.
+
+    Stops at the first unindented line that is neither a key, a list item nor
+    a comment, so a spec key further down a Markdown page is not counted.
+    """
+    lines = []
+    for line in text.splitlines():
+        yaml_like = line[:1] in ("", " ", "\t", "#", "-")
+        if not yaml_like and not _YAML_MAPPING_LINE.match(line):
+            break
+        lines.append(line)
+    return "\n".join(lines)
+
+
 def _is_postman_collection(data: dict) -> bool:
     info = data.get("info", {})
     schema = info.get("schema", "") if isinstance(info, dict) else ""
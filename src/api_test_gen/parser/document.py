@@ -0,0 +1,61 @@
+"""API documents read from disk and parsed at most once."""
+
+import json
+import re
+from functools import cached_property
+from pathlib import Path
+from typing import Any
+
+import yaml
+
+try:
+    from yaml import CSafeLoader as YamlLoader
+except ImportError:  # PyYAML built without LibYAML
+    from yaml import SafeLoader as YamlLoader  # type: ignore[assignment]
+
+_FIRST_CHAR = re.compile(r"[\s﻿]*(\S)")
+
+
+class LoadedDocument:
+    """The text of an API document plus its lazily parsed YAML/JSON value.
+
+    Format detection and the format parsers share one instance, so the
+    expensive structured parse happens at most once per command.
+    """
+
+    def __init__(self, path: Path, text: str):
+        self.path = path
+        self.text = text
+
+    @classmethod
+    def read(cls, path: Path) -> "LoadedDocument":
+        return cls(path, path.read_text(encoding="utf-8"))
+
+    @cached_property
+    def data(self) -> Any:
+        """The parsed document; raises ``yaml.YAMLError`` for invalid input."""
+        return load_structured(self.text)
+
+
+def load_structured(text: str) -> Any:
+    """Parse JSON or YAML text with the fastest loader that fits.
+
+    Text that starts like JSON goes through ``json.loads``; anything else, or
+    JSON that fails to decode (YAML flow mappings also start with a brace),
+    goes through LibYAML's ``CSafeLoader`` when PyYAML was built with it and
+    the pure-Python ``SafeLoader`` otherwise.
+    """
+    first = _FIRST_CHAR.match(text)
+    if first and first.group(1) in "{[":
+        try:
+            return json.loads(text.lstrip("﻿"))
+        except json.JSONDecodeError:
+            pass
+    return yaml.load(text, Loader=YamlLoader)
+
+
+def as_document(source: "Path | LoadedDocument") -> LoadedDocument:
+    """Accept either a path or an already loaded document."""
+    if isinstance(source, LoadedDocument):
+        return source
+    return LoadedDocument.read(source)
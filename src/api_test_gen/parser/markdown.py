@@ -8,7 +8,7 @@ import json
 import re
 from pathlib import Path
 
-from api_test_gen.llm import LlmClient
+from api_test_gen.llm import LlmClient, LlmOptions
 from api_test_gen.parser.base import ApiEndpoint
 
 SYSTEM_PROMPT = """You are an API documentation parser. Extract all API endpoints from the given document.
@@ -31,18 +31,26 @@ Output a JSON array of endpoint objects. Each object must have these fields:
 Output ONLY the JSON array, no other text."""
 
 
-def parse_markdown(file_path: Path, model: str | None = None) -> list[ApiEndpoint]:
+def parse_markdown(
+    file_path: Path,
+    model: str | None = None,
+    llm_options: LlmOptions | None = None,
+) -> list[ApiEndpoint]:
     """Parse a Markdown/text API document using LLM extraction."""
     text = file_path.read_text(encoding="utf-8")
 
-    client = LlmClient(model=model)
+    client = LlmClient(model=model, options=llm_options)
     response = client.call(system=SYSTEM_PROMPT, user=text)
 
     # Extract JSON from response (might be wrapped in code blocks)
     json_str = _extract_json(response)
-    data = json.loads(json_str)
-
-    return [ApiEndpoint(**item) for item in data]
+    try:
+        data = json.loads(json_str)
+        return [ApiEndpoint(**item) for item in data]
+    except (ValueError, TypeError):
+        # Keep the unusable response from being replayed on the next run.
+        client.discard(SYSTEM_PROMPT, text)
+        raise
 
 
 def _extract_json(text: str) -> str:
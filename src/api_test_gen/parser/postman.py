@@ -7,11 +7,12 @@ from typing import Any
 from urllib.parse import urlsplit
 
 from .base import ApiEndpoint, Param
+from .document import LoadedDocument, as_document
 
 
-def parse_postman(file_path: Path) -> list[ApiEndpoint]:
+def parse_postman(source: Path | LoadedDocument) -> list[ApiEndpoint]:
     """Parse a Postman Collection v2.1 file into normalized endpoints."""
-    collection = json.loads(file_path.read_text(encoding="utf-8"))
+    collection = as_document(source).data
     endpoints: list[ApiEndpoint] = []
     _parse_items(
         collection.get("item", []),
@@ -1,12 +1,17 @@
-"""OpenAPI 3.x and Swagger 2.0 document parser."""
+"""OpenAPI 3.x and Swagger 2.0 document parser.
+
+Local ``$ref`` pointers are resolved once per document and the resolved
+subtrees are shared between every place that references them. Parsed schemas
+may therefore alias each other and must be treated as read-only; code that
+needs a modified schema builds a new dict instead of changing one in place.
+"""
 
 from copy import deepcopy
 from pathlib import Path
 from typing import Any
 
-import yaml
-
 from .base import ApiEndpoint, Param
+from .document import LoadedDocument, as_document
 
 HTTP_METHODS = {"GET", "POST", "PUT", "DELETE", "PATCH", "HEAD", "OPTIONS", "TRACE"}
 PREFERRED_CONTENT_TYPES = (
@@ -33,9 +38,9 @@ CONSTRAINT_KEYS = (
 RESERVED_HEADER_PARAMETERS = {"accept", "content-type", "authorization"}
 
 
-def parse_openapi(file_path: Path) -> list[ApiEndpoint]:
+def parse_openapi(source: Path | LoadedDocument) -> list[ApiEndpoint]:
     """Parse an OpenAPI or Swagger file into normalized endpoints."""
-    document = yaml.safe_load(file_path.read_text(encoding="utf-8"))
+    document = as_document(source).data
     if not isinstance(document, dict):
         raise ValueError("OpenAPI document must be a mapping")
 
@@ -44,8 +49,9 @@ def parse_openapi(file_path: Path) -> list[ApiEndpoint]:
     if not isinstance(paths, dict):
         raise ValueError("OpenAPI paths must be a mapping")
 
+    refs = _RefResolver(document)
     for path, raw_path_item in paths.items():
-        path_item = _resolve_local_refs(raw_path_item, document)
+        path_item = refs.resolve(raw_path_item)
         if not isinstance(path_item, dict):
             continue
         path_parameters = path_item.get("parameters", [])
@@ -56,13 +62,13 @@ def parse_openapi(file_path: Path) -> list[ApiEndpoint]:
             ):
                 continue
 
-            operation = _resolve_local_refs(raw_operation, document)
+            operation = refs.resolve(raw_operation)
             raw_parameters = _merge_parameters(
-                path_parameters, operation.get("parameters", []), document
+                path_parameters, operation.get("parameters", []), refs
             )
             parameters = _parse_parameters(raw_parameters)
             request_body, body_required, content_types = _parse_request_body(
-                operation, raw_parameters, document
+                operation, raw_parameters, refs
             )
 
             endpoints.append(
@@ -75,9 +81,7 @@ def parse_openapi(file_path: Path) -> list[ApiEndpoint]:
                     parameters=parameters,
                     request_body=request_body,
                     request_body_required=body_required,
-                    responses=_parse_responses(
-                        operation.get("responses", {}), document
-                    ),
+                    responses=_parse_responses(operation.get("responses", {}), refs),
                     auth_required=_requires_auth(operation, document),
                     tags=operation.get("tags", []),
                     content_types=content_types or ["application/json"],
@@ -88,11 +92,11 @@ def parse_openapi(file_path: Path) -> list[ApiEndpoint]:
 
 
 def _merge_parameters(
-    path_parameters: Any, operation_parameters: Any, document: dict[str, Any]
+    path_parameters: Any, operation_parameters: Any, refs: "_RefResolver"
 ) -> list[dict[str, Any]]:
     merged: dict[tuple[str, str], dict[str, Any]] = {}
     for raw_parameter in [*(path_parameters or []), *(operation_parameters or [])]:
-        parameter = _resolve_local_refs(raw_parameter, document)
+        parameter = refs.resolve(raw_parameter)
         if not isinstance(parameter, dict):
             continue
         key = (str(parameter.get("name", "")), str(parameter.get("in", "query")))
@@ -142,10 +146,11 @@ def _parse_parameters(parameters: list[dict[str, Any]]) -> list[Param]:
 def _parse_request_body(
     operation: dict[str, Any],
     parameters: list[dict[str, Any]],
-    document: dict[str, Any],
+    refs: "_RefResolver",
 ) -> tuple[dict[str, Any] | None, bool, list[str]]:
+    document = refs.document
     if "requestBody" in operation:
-        body = _resolve_local_refs(operation["requestBody"], document)
+        body = refs.resolve(operation["requestBody"])
         if not isinstance(body, dict):
             return None, False, []
         if isinstance(body.get("$ref"), str):
@@ -186,15 +191,13 @@ def _parse_request_body(
     return None, False, content_types
 
 
-def _parse_responses(
-    responses: Any, document: dict[str, Any]
-) -> dict[str, dict[str, Any]]:
+def _parse_responses(responses: Any, refs: "_RefResolver") -> dict[str, dict[str, Any]]:
     result = {}
     if not isinstance(responses, dict):
         return result
 
     for status_code, raw_response in responses.items():
-        response = _resolve_local_refs(raw_response, document)
+        response = refs.resolve(raw_response)
         if not isinstance(response, dict):
             continue
         parsed: dict[str, Any] = {"description": response.get("description", "")}
@@ -269,28 +272,78 @@ def _schema_type(schema: Any) -> str:
     return schema_type or ("object" if "properties" in schema else "string")
 
 
-def _resolve_local_refs(
-    value: Any, document: dict[str, Any], stack: tuple[str, ...] = ()
-) -> Any:
-    if isinstance(value, list):
-        return [_resolve_local_refs(item, document, stack) for item in value]
-    if not isinstance(value, dict):
-        return value
-
-    reference = value.get("$ref")
-    if isinstance(reference, str) and reference.startswith("#/"):
-        if reference in stack:
-            return deepcopy(value)
-        resolved = _resolve_json_pointer(document, reference)
-        siblings = {key: item for key, item in value.items() if key != "$ref"}
-        merged = deepcopy(resolved)
-        if isinstance(merged, dict):
-            merged.update(siblings)
-        return _resolve_local_refs(merged, document, (*stack, reference))
-
-    return {
-        key: _resolve_local_refs(item, document, stack) for key, item in value.items()
-    }
+class _RefResolver:
+    """Resolve local ``$ref`` pointers of one document, memoized by pointer.
+
+    A cycle is cut by leaving the ``{"$ref": ...}`` node that closes it in
+    place. Where that cut happens depends on which pointer the walk entered
+    the cycle from, so only subtrees resolved without any cut are cached;
+    those are shared by every later reference to the same pointer. Containers
+    known to hold no local references are returned as-is when passed in
+    again, so re-resolving a resolved tree does not walk its shared subtrees.
+    """
+
+    def __init__(self, document: dict[str, Any]):
+        self.document = document
+        self._resolved: dict[str, Any] = {}
+        self._complete: dict[int, Any] = {}
+        self._stack: list[str] = []
+
+    def resolve(self, value: Any) -> Any:
+        return self._resolve(value)[0]
+
+    def _resolve(self, value: Any) -> tuple[Any, bool]:
+        """Return the resolved value and whether a cycle was cut inside it."""
+        if self._complete.get(id(value)) is value:
+            return value, False
+        resolved, cut = self._resolve_uncached(value)
+        if not cut and isinstance(resolved, (dict, list)):
+            self._complete[id(resolved)] = resolved
+        return resolved, cut
+
+    def _resolve_uncached(self, value: Any) -> tuple[Any, bool]:
+        if isinstance(value, list):
+            pairs = [self._resolve(item) for item in value]
+            items = [item for item, _ in pairs]
+            cut = any(item_cut for _, item_cut in pairs)
+            if all(new is old for new, old in zip(items, value, strict=True)):
+                return value, cut
+            return items, cut
+        if not isinstance(value, dict):
+            return value, False
+
+        reference = value.get("$ref")
+        if isinstance(reference, str) and reference.startswith("#/"):
+            if reference in self._stack:
+                return deepcopy(value), True
+            siblings = {key: item for key, item in value.items() if key != "$ref"}
+            self._stack.append(reference)
+            try:
+                if not siblings:
+                    return self._resolve_pointer(reference)
+                target = _resolve_json_pointer(self.document, reference)
+                if isinstance(target, dict):
+                    target = {**target, **siblings}
+                return self._resolve(target)
+            finally:
+                self._stack.pop()
+
+        resolved = {}
+        cut = False
+        for key, item in value.items():
+            resolved[key], item_cut = self._resolve(item)
+            cut = cut or item_cut
+        if all(resolved[key] is item for key, item in value.items()):
+            return value, cut
+        return resolved, cut
+
+    def _resolve_pointer(self, reference: str) -> tuple[Any, bool]:
+        if reference in self._resolved:
+            return self._resolved[reference], False
+        resolved, cut = self._resolve(_resolve_json_pointer(self.document, reference))
+        if not cut:
+            self._resolved[reference] = resolved
+        return resolved, cut
 
 
 def _resolve_json_pointer(document: dict[str, Any], reference: str) -> Any:
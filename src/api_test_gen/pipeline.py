@@ -1,39 +1,83 @@
 """Application services for parsing API docs and generating artifacts."""
 
 import fnmatch
+from collections.abc import Iterator
+from dataclasses import dataclass
 from pathlib import Path
 
 import yaml
 from pydantic import ValidationError
 
+from api_test_gen.generator.checkpoint import CheckpointJournal
 from api_test_gen.generator.code import CodeGenerator
-from api_test_gen.generator.layered import LayeredCodeGenerator
+from api_test_gen.generator.layered import LayeredCodeGenerator, tag_layer_paths
+from api_test_gen.generator.manifest import (
+    GenerationManifest,
+    endpoint_fingerprint,
+    endpoint_key,
+    group_fingerprint,
+)
+from api_test_gen.generator.naming import (
+    assign_endpoint_filenames,
+    group_endpoints_by_tag,
+)
 from api_test_gen.generator.testcase import TestCaseGenerator
+from api_test_gen.generator.testcase_document import (
+    EndpointSection,
+    next_case_index,
+    parse_testcase_document,
+)
+from api_test_gen.generator.validation_cache import ValidationCache
+from api_test_gen.llm import LlmOptions
 from api_test_gen.parser.base import ApiEndpoint
 from api_test_gen.parser.detect import detect_format
+from api_test_gen.parser.document import LoadedDocument
 from api_test_gen.parser.markdown import parse_markdown
 from api_test_gen.parser.postman import parse_postman
 from api_test_gen.parser.swagger import parse_openapi
+from api_test_gen.stats import span, traced_iterator
 
 
 class DocumentParseError(ValueError):
     """Raised when an API document cannot be normalized."""
 
 
+@dataclass(frozen=True)
+class IncrementalPlan:
+    """Which endpoints of a run can reuse the artifacts of the previous run."""
+
+    manifest: GenerationManifest
+    reused_sections: dict[str, EndpointSection]
+    reusable_groups: frozenset[str]
+
+    def is_reused(self, endpoint: ApiEndpoint) -> bool:
+        return endpoint_key(endpoint) in self.reused_sections
+
+
 def parse_document(
-    file_path: Path, fmt: str = "auto", model: str | None = None
+    file_path: Path,
+    fmt: str = "auto",
+    model: str | None = None,
+    llm_options: LlmOptions | None = None,
 ) -> list[ApiEndpoint]:
-    """Parse an API document into the common endpoint model."""
+    """Parse an API document into the common endpoint model.
+
+    The file is read once; detection and the selected parser share the
+    loaded document, so a structured parse is never repeated.
+    """
     try:
-        resolved_format = detect_format(file_path) if fmt == "auto" else fmt
-
-        if resolved_format == "swagger":
-            return parse_openapi(file_path)
-        if resolved_format == "postman":
-            return parse_postman(file_path)
-        if resolved_format == "markdown":
-            return parse_markdown(file_path, model=model)
-        raise ValueError(f"Unsupported document format: {resolved_format}")
+        with span("parse_document") as stage:
+            document = LoadedDocument.read(file_path)
+            resolved_format = detect_format(document) if fmt == "auto" else fmt
+            stage.set(format=resolved_format)
+
+            if resolved_format == "swagger":
+                return parse_openapi(document)
+            if resolved_format == "postman":
+                return parse_postman(document)
+            if resolved_format == "markdown":
+                return parse_markdown(file_path, model=model, llm_options=llm_options)
+            raise ValueError(f"Unsupported document format: {resolved_format}")
     except (ValueError, yaml.YAMLError, ValidationError) as error:
         raise DocumentParseError(f"Failed to parse {file_path}: {error}") from error
 
@@ -57,11 +101,39 @@ def generate_testcases(
     depth: str = "quick",
     model: str | None = None,
     start_index: int = 1,
+    jobs: int = 1,
+    llm_options: LlmOptions | None = None,
+    batch_tokens: int | None = None,
+    journal: CheckpointJournal | None = None,
 ) -> str:
     """Generate a Markdown test-case document."""
-    return TestCaseGenerator(model=model).generate(
-        endpoints, depth=depth, start_index=start_index
+    generator = TestCaseGenerator(
+        model=model, jobs=jobs, llm_options=llm_options, batch_tokens=batch_tokens
     )
+    with span("generate_testcases", endpoints=len(endpoints)):
+        return generator.generate(
+            endpoints, depth=depth, start_index=start_index, journal=journal
+        )
+
+
+def stream_testcases(
+    endpoints: list[ApiEndpoint],
+    depth: str = "quick",
+    model: str | None = None,
+    start_index: int = 1,
+    jobs: int = 1,
+    llm_options: LlmOptions | None = None,
+    batch_tokens: int | None = None,
+    journal: CheckpointJournal | None = None,
+) -> Iterator[str]:
+    """Yield the sections of a test-case document in order as they complete."""
+    generator = TestCaseGenerator(
+        model=model, jobs=jobs, llm_options=llm_options, batch_tokens=batch_tokens
+    )
+    sections = generator.iter_sections(
+        endpoints, depth=depth, start_index=start_index, journal=journal
+    )
+    return traced_iterator("generate_testcases", sections, endpoints=len(endpoints))
 
 
 def generate_code(
@@ -69,15 +141,155 @@ def generate_code(
     arch: str = "flat",
     model: str | None = None,
     endpoints: list[ApiEndpoint] | None = None,
+    llm_options: LlmOptions | None = None,
+    reusable: dict[str, str] | None = None,
+    jobs: int = 1,
+    validation_cache: ValidationCache | None = None,
 ) -> dict[str, str]:
     """Generate test code using the selected architecture."""
-    if arch == "flat":
-        return CodeGenerator(model=model).generate(testcases)
+    with span("generate_code", arch=arch):
+        if arch == "flat":
+            generator = CodeGenerator(
+                model=model,
+                llm_options=llm_options,
+                jobs=jobs,
+                validation_cache=validation_cache,
+            )
+            return generator.generate(testcases, reusable=reusable)
+        if arch == "layered":
+            if endpoints is None:
+                raise ValueError("endpoints are required for layered generation")
+            generator = LayeredCodeGenerator(
+                model=model,
+                jobs=jobs,
+                llm_options=llm_options,
+                validation_cache=validation_cache,
+            )
+            return generator.generate(testcases, endpoints, reusable=reusable)
+        raise ValueError(f"Unsupported code architecture: {arch}")
+
+
+def plan_incremental(
+    endpoints: list[ApiEndpoint],
+    previous_testcases: str | None,
+    previous_manifest: GenerationManifest | None,
+    depth: str = "quick",
+    model: str | None = None,
+    arch: str = "flat",
+) -> IncrementalPlan:
+    """Compare endpoint fingerprints with the previous run's manifest.
+
+    Endpoints whose fingerprint is unchanged and whose section still exists in
+    the previous test-case document are reused; the rest must be regenerated.
+    """
+    fingerprints = {
+        endpoint_key(endpoint): endpoint_fingerprint(endpoint, depth, model, arch)
+        for endpoint in endpoints
+    }
+    groups = {}
     if arch == "layered":
-        if endpoints is None:
-            raise ValueError("endpoints are required for layered generation")
-        return LayeredCodeGenerator(model=model).generate(testcases, endpoints)
-    raise ValueError(f"Unsupported code architecture: {arch}")
+        groups = {
+            tag: group_fingerprint(
+                [fingerprints[endpoint_key(endpoint)] for endpoint in members]
+            )
+            for tag, members in group_endpoints_by_tag(endpoints).items()
+        }
+    manifest = GenerationManifest(endpoints=fingerprints, groups=groups)
+
+    reused_sections: dict[str, EndpointSection] = {}
+    reusable_groups: frozenset[str] = frozenset()
+    if previous_manifest is not None and previous_testcases:
+        sections = parse_testcase_document(previous_testcases).section_map()
+        for endpoint in endpoints:
+            key = endpoint_key(endpoint)
+            section = sections.get((endpoint.method, endpoint.path))
+            if section and previous_manifest.endpoints.get(key) == fingerprints[key]:
+                reused_sections[key] = section
+        reusable_groups = frozenset(
+            tag
+            for tag, fingerprint in groups.items()
+            if previous_manifest.groups.get(tag) == fingerprint
+        )
+    return IncrementalPlan(
+        manifest=manifest,
+        reused_sections=reused_sections,
+        reusable_groups=reusable_groups,
+    )
+
+
+def generate_testcases_incremental(
+    endpoints: list[ApiEndpoint],
+    plan: IncrementalPlan,
+    depth: str = "quick",
+    model: str | None = None,
+    jobs: int = 1,
+    llm_options: LlmOptions | None = None,
+    batch_tokens: int | None = None,
+    journal: CheckpointJournal | None = None,
+) -> str:
+    """Generate sections for changed endpoints and splice in reused ones.
+
+    Reused sections keep their Markdown and ``TC-xxx`` numbers verbatim; new
+    sections are numbered after the highest reused case.
+    """
+    changed = [endpoint for endpoint in endpoints if not plan.is_reused(endpoint)]
+    reused_markdown = "\n\n".join(
+        section.markdown for section in plan.reused_sections.values()
+    )
+    new_sections = {}
+    if changed:
+        start_index = next_case_index(reused_markdown) if reused_markdown else 1
+        generated = generate_testcases(
+            changed,
+            depth=depth,
+            model=model,
+            start_index=start_index,
+            jobs=jobs,
+            llm_options=llm_options,
+            batch_tokens=batch_tokens,
+            journal=journal,
+        )
+        new_sections = parse_testcase_document(generated).section_map()
+
+    sections = []
+    for endpoint in endpoints:
+        section = plan.reused_sections.get(endpoint_key(endpoint))
+        if section is None:
+            section = new_sections[(endpoint.method, endpoint.path)]
+        sections.append(section.markdown)
+    return "\n\n".join(sections)
+
+
+def reusable_code_files(
+    output_dir: Path,
+    testcases: str,
+    endpoints: list[ApiEndpoint],
+    plan: IncrementalPlan,
+    arch: str = "flat",
+) -> dict[str, str]:
+    """Read previously generated files that belong to unchanged endpoints."""
+    if arch == "layered":
+        paths = [
+            path
+            for tag, members in group_endpoints_by_tag(endpoints).items()
+            if tag in plan.reusable_groups and all(map(plan.is_reused, members))
+            for path in tag_layer_paths(tag)
+        ]
+    else:
+        document = parse_testcase_document(testcases)
+        filenames = assign_endpoint_filenames(document.sections)
+        paths = [
+            filenames[section.key]
+            for section in document.sections
+            if f"{section.method} {section.path}" in plan.reused_sections
+        ]
+
+    files = {}
+    for path in paths:
+        file_path = output_dir / path
+        if file_path.is_file():
+            files[path] = file_path.read_text(encoding="utf-8")
+    return files
 
 
 def _matches_pattern(endpoint: ApiEndpoint, pattern: str) -> bool:
@@ -0,0 +1,321 @@
+"""Client-side rate limiting and retry backoff for LLM requests.
+
+Providers enforce requests-per-minute and tokens-per-minute quotas per model and
+answer with 429 once a quota is exceeded; retrying immediately only makes that
+worse. Every model gets a :class:`ModelLimiter` with a token bucket for each
+configured budget and an adaptive concurrency limit. The limit is halved when
+the provider throttles or times out and grows back by about one slot per round
+of successful requests (additive increase, multiplicative decrease). Failed
+attempts are retried after an exponentially growing delay with full jitter, so
+parallel workers do not retry in lockstep.
+"""
+
+import asyncio
+import math
+import random
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from types import TracebackType
+from typing import Any, Self
+
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 30.0
+SLOT_POLL_SECONDS = 0.05
+CHARS_PER_TOKEN = 4
+
+RETRYABLE_STATUS_CODES = frozenset({408, 409, 429, 500, 502, 503, 504})
+THROTTLE_STATUS_CODES = frozenset({408, 429})
+
+SUCCESS = "success"
+THROTTLED = "throttled"
+RETRYABLE = "retryable"
+FATAL = "fatal"
+
+
+@dataclass(frozen=True)
+class RateLimits:
+    """Per-model budgets; ``None`` leaves a dimension unlimited."""
+
+    requests_per_minute: int | None = None
+    tokens_per_minute: int | None = None
+    max_concurrency: int | None = None
+
+
+@dataclass
+class LimiterStats:
+    """Counters reported in the run summary."""
+
+    requests: int = 0
+    retries: int = 0
+    throttled: int = 0
+    waited_seconds: float = 0.0
+    prompt_tokens: int = 0
+    cached_prompt_tokens: int = 0
+
+
+def classify_error(error: BaseException) -> str:
+    """Sort a provider error into ``THROTTLED``, ``RETRYABLE`` or ``FATAL``.
+
+    litellm exceptions carry the HTTP ``status_code``; timeouts and dropped
+    connections from lower layers are recognised by type.
+    """
+    status = getattr(error, "status_code", None)
+    if status in THROTTLE_STATUS_CODES or isinstance(error, TimeoutError):
+        return THROTTLED
+    if status in RETRYABLE_STATUS_CODES or isinstance(error, ConnectionError):
+        return RETRYABLE
+    return FATAL
+
+
+def estimate_tokens(*texts: str) -> int:
+    """Rough prompt size used to reserve tokens before the real count is known."""
+    return max(1, sum(len(text) for text in texts) // CHARS_PER_TOKEN)
+
+
+class _TokenBucket:
+    """Bucket holding at most one minute of budget, refilled continuously.
+
+    Reservations may drive the level negative; the caller then waits until the
+    bucket has refilled to zero, which keeps waiting callers in FIFO order.
+    """
+
+    def __init__(self, per_minute: int, clock: Callable[[], float]):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self._clock = clock
+        self._level = self.capacity
+        self._updated = clock()
+
+    def reserve(self, amount: float) -> float:
+        """Take amount from the bucket and return the seconds to wait for it."""
+        self._refill()
+        self._level -= amount
+        return max(0.0, -self._level / self.rate)
+
+    def adjust(self, amount: float) -> None:
+        """Charge (positive) or refund (negative) a correction without waiting."""
+        self._refill()
+        self._level = min(self.capacity, self._level - amount)
+
+    def _refill(self) -> None:
+        now = self._clock()
+        elapsed = now - self._updated
+        self._updated = now
+        self._level = min(self.capacity, self._level + elapsed * self.rate)
+
+
+class ModelLimiter:
+    """Budgets, concurrency limit and statistics for one model."""
+
+    def __init__(
+        self,
+        limits: RateLimits,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.limits = limits
+        self.stats = LimiterStats()
+        self._sleep = sleep
+        self._condition = threading.Condition()
+        self._requests = (
+            _TokenBucket(limits.requests_per_minute, clock)
+            if limits.requests_per_minute
+            else None
+        )
+        self._tokens = (
+            _TokenBucket(limits.tokens_per_minute, clock)
+            if limits.tokens_per_minute
+            else None
+        )
+        self._ceiling = float(limits.max_concurrency or math.inf)
+        self._limit = self._ceiling
+        self._in_flight = 0
+        self._generation = 0
+
+    @property
+    def concurrency_limit(self) -> int | None:
+        """Current number of allowed in-flight requests, ``None`` if unbounded."""
+        with self._condition:
+            return None if math.isinf(self._limit) else int(self._limit)
+
+    def slot(self, tokens: int) -> "_Slot":
+        """Reserve one request and ``tokens`` prompt tokens for a ``with`` block.
+
+        Use ``with`` from threads and ``async with`` from coroutines. The block's
+        outcome (success, throttling, other failure) adjusts the concurrency
+        limit when it exits.
+        """
+        return _Slot(self, tokens)
+
+    def retry_delay(self, attempt: int) -> float:
+        """Record a retry and return its backoff, using full jitter."""
+        delay = random.uniform(
+            0.0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2**attempt)
+        )
+        with self._condition:
+            self.stats.retries += 1
+            self.stats.waited_seconds += delay
+        return delay
+
+    def sleep(self, seconds: float) -> None:
+        if seconds > 0:
+            self._sleep(seconds)
+
+    def _try_enter(self, tokens: int) -> tuple[int, float] | None:
+        with self._condition:
+            if self._in_flight >= self._limit:
+                return None
+            self._in_flight += 1
+            self.stats.requests += 1
+            delay = 0.0
+            if self._requests is not None:
+                delay = max(delay, self._requests.reserve(1))
+            if self._tokens is not None:
+                delay = max(delay, self._tokens.reserve(tokens))
+            self.stats.waited_seconds += delay
+            return self._generation, delay
+
+    def _enter(self, tokens: int) -> tuple[int, float]:
+        with self._condition:
+            while self._in_flight >= self._limit:
+                self._condition.wait()
+            entered = self._try_enter(tokens)
+        assert entered is not None
+        return entered
+
+    def _exit(
+        self, generation: int, outcome: str, correction: int, usage: "_Usage"
+    ) -> None:
+        with self._condition:
+            self._in_flight -= 1
+            self.stats.prompt_tokens += usage.prompt_tokens
+            self.stats.cached_prompt_tokens += usage.cached_tokens
+            if self._tokens is not None and correction:
+                self._tokens.adjust(correction)
+            if outcome == THROTTLED:
+                self.stats.throttled += 1
+                # Requests already in flight when the limit dropped report the
+                # same congestion; count it once per generation.
+                if generation == self._generation:
+                    self._generation += 1
+                    current = min(self._limit, self._in_flight + 1)
+                    self._limit = max(1.0, math.floor(current / 2))
+            elif outcome == SUCCESS and self._limit < self._ceiling:
+                self._limit = min(self._ceiling, self._limit + 1 / self._limit)
+            self._condition.notify_all()
+
+
+class _Slot:
+    """Context manager returned by :meth:`ModelLimiter.slot`."""
+
+    def __init__(self, limiter: ModelLimiter, tokens: int):
+        self.limiter = limiter
+        self.tokens = tokens
+        self.usage = _Usage()
+        self._generation = 0
+
+    def __enter__(self) -> Self:
+        self._generation, delay = self.limiter._enter(self.tokens)
+        try:
+            self.limiter.sleep(delay)
+        except BaseException:
+            self.limiter._exit(self._generation, FATAL, 0, _Usage())
+            raise
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self._release(exc)
+
+    async def __aenter__(self) -> Self:
+        while (entered := self.limiter._try_enter(self.tokens)) is None:
+            await asyncio.sleep(SLOT_POLL_SECONDS)
+        self._generation, delay = entered
+        try:
+            if delay > 0:
+                await asyncio.sleep(delay)
+        except BaseException:
+            self.limiter._exit(self._generation, FATAL, 0, _Usage())
+            raise
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self._release(exc)
+
+    def record_usage(self, response: Any) -> None:
+        """Take the token counts reported with a litellm response."""
+        self.usage = _Usage.from_response(response)
+
+    def _release(self, exc: BaseException | None) -> None:
+        outcome = SUCCESS if exc is None else classify_error(exc)
+        correction = 0
+        if self.usage.total_tokens is not None:
+            correction = self.usage.total_tokens - self.tokens
+        self.limiter._exit(self._generation, outcome, correction, self.usage)
+
+
+@dataclass(frozen=True)
+class _Usage:
+    total_tokens: int | None = None
+    prompt_tokens: int = 0
+    cached_tokens: int = 0
+
+    @classmethod
+    def from_response(cls, response: Any) -> "_Usage":
+        usage = getattr(response, "usage", None)
+        details = getattr(usage, "prompt_tokens_details", None)
+        # OpenAI-style details; Anthropic also reports cache_read_input_tokens.
+        cached = _count(getattr(details, "cached_tokens", None)) or _count(
+            getattr(usage, "cache_read_input_tokens", None)
+        )
+        total = getattr(usage, "total_tokens", None)
+        return cls(
+            total_tokens=total if isinstance(total, int) else None,
+            prompt_tokens=_count(getattr(usage, "prompt_tokens", None)),
+            cached_tokens=cached,
+        )
+
+
+def _count(value: Any) -> int:
+    return value if isinstance(value, int) else 0
+
+
+class RateLimiter:
+    """Registry of per-model limiters shared by every client of one run."""
+
+    def __init__(
+        self,
+        limits: RateLimits | None = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.limits = limits or RateLimits()
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._models: dict[str, ModelLimiter] = {}
+
+    def for_model(self, model: str) -> ModelLimiter:
+        """Return the limiter of a model, creating it on first use."""
+        with self._lock:
+            limiter = self._models.get(model)
+            if limiter is None:
+                limiter = ModelLimiter(self.limits, self._clock, self._sleep)
+                self._models[model] = limiter
+            return limiter
+
+    def models(self) -> dict[str, ModelLimiter]:
+        """Return the limiters created so far, keyed by model name."""
+        with self._lock:
+            return dict(self._models)
@@ -0,0 +1,234 @@
+"""Lightweight spans for per-stage timing, token and cost reporting.
+
+Code wraps interesting work in ``with span("validate_collect"):``. While no
+:class:`Tracer` is active, :func:`span` returns a shared no-op object after a
+single global check, so instrumented code costs next to nothing in normal
+runs. An active tracer records every span (name, start, duration, thread and
+attributes such as model, token counts and cost) for the ``--stats`` table
+and the ``--trace`` file, which uses the Chrome trace-event format understood
+by Perfetto and ``chrome://tracing``.
+
+Spans nest freely and overlap across threads; the stage table reports
+inclusive time, so a ``generate_code`` span contains the validation and repair
+spans opened inside it.
+"""
+
+import json
+import os
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import TracebackType
+from typing import Any, Self
+
+
+@dataclass
+class SpanRecord:
+    """One finished span."""
+
+    name: str
+    start: float
+    duration: float
+    thread: int
+    attributes: dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class StageStats:
+    """Aggregated spans of one name."""
+
+    count: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+
+
+@dataclass
+class ModelStats:
+    """Aggregated LLM calls of one model."""
+
+    calls: int = 0
+    cached: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cost: float = 0.0
+    priced_calls: int = 0
+
+
+class Span:
+    """An open span; attributes set before it closes end up in the record."""
+
+    recording = True
+
+    def __init__(self, tracer: "Tracer", name: str, attributes: dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.attributes = attributes
+        self._start = 0.0
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def __enter__(self) -> Self:
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        duration = time.perf_counter() - self._start
+        if exc_type is not None:
+            self.attributes["error"] = exc_type.__name__
+        self.tracer._record(
+            SpanRecord(
+                self.name,
+                self._start,
+                duration,
+                threading.get_ident(),
+                self.attributes,
+            )
+        )
+
+
+class _NullSpan:
+    """Stand-in returned by :func:`span` while tracing is off."""
+
+    recording = False
+
+    def set(self, **attributes: Any) -> None:
+        pass
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    """Collects spans from every thread of one command."""
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.records: list[SpanRecord] = []
+        self._lock = threading.Lock()
+
+    def _record(self, record: SpanRecord) -> None:
+        with self._lock:
+            self.records.append(record)
+
+    def stages(self) -> dict[str, StageStats]:
+        """Span counts and durations by name, in order of first appearance."""
+        stages: dict[str, StageStats] = {}
+        for record in self._snapshot():
+            stage = stages.setdefault(record.name, StageStats())
+            stage.count += 1
+            stage.total_seconds += record.duration
+            stage.max_seconds = max(stage.max_seconds, record.duration)
+        return stages
+
+    def models(self) -> dict[str, ModelStats]:
+        """Token and cost totals of ``llm`` spans by model."""
+        models: dict[str, ModelStats] = {}
+        for record in self._snapshot():
+            model = record.attributes.get("model")
+            if record.name != "llm" or model is None:
+                continue
+            stats = models.setdefault(model, ModelStats())
+            stats.calls += 1
+            stats.cached += bool(record.attributes.get("cached"))
+            stats.prompt_tokens += record.attributes.get("prompt_tokens", 0)
+            stats.completion_tokens += record.attributes.get("completion_tokens", 0)
+            cost = record.attributes.get("cost")
+            if cost is not None:
+                stats.cost += cost
+                stats.priced_calls += 1
+        return models
+
+    def report(self) -> str:
+        """Render the stage and model tables printed by ``--stats``."""
+        lines = [f"{'stage':<24}{'count':>7}{'total s':>10}{'mean s':>10}{'max s':>10}"]
+        for name, stage in self.stages().items():
+            lines.append(
+                f"{name:<24}{stage.count:>7}{stage.total_seconds:>10.3f}"
+                f"{stage.total_seconds / stage.count:>10.3f}{stage.max_seconds:>10.3f}"
+            )
+        models = self.models()
+        if models:
+            lines.append("")
+            lines.append(
+                f"{'model':<32}{'calls':>7}{'cached':>8}{'prompt':>10}"
+                f"{'completion':>12}{'cost $':>10}"
+            )
+            for name, stats in models.items():
+                cost = f"{stats.cost:.4f}" if stats.priced_calls else "-"
+                lines.append(
+                    f"{name:<32}{stats.calls:>7}{stats.cached:>8}"
+                    f"{stats.prompt_tokens:>10}{stats.completion_tokens:>12}{cost:>10}"
+                )
+        return "\n".join(lines)
+
+    def write_trace(self, path: Path) -> None:
+        """Write the spans as a Chrome trace-event JSON file."""
+        threads: dict[int, int] = {}
+        events = []
+        for record in self._snapshot():
+            events.append(
+                {
+                    "name": record.name,
+                    "ph": "X",
+                    "ts": round((record.start - self.origin) * 1_000_000),
+                    "dur": round(record.duration * 1_000_000),
+                    "pid": os.getpid(),
+                    "tid": threads.setdefault(record.thread, len(threads) + 1),
+                    "args": record.attributes,
+                }
+            )
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(
+            json.dumps({"traceEvents": events}, default=str), encoding="utf-8"
+        )
+
+    def _snapshot(self) -> list[SpanRecord]:
+        with self._lock:
+            return sorted(self.records, key=lambda record: record.start)
+
+
+_tracer: Tracer | None = None
+
+
+def span(name: str, **attributes: Any) -> Span | _NullSpan:
+    """Time a block as a span of the active tracer, if there is one."""
+    tracer = _tracer
+    if tracer is None:
+        return _NULL_SPAN
+    return Span(tracer, name, attributes)
+
+
+@contextmanager
+def tracing(enabled: bool = True) -> Iterator[Tracer | None]:
+    """Activate a fresh :class:`Tracer` for the duration of a ``with`` block."""
+    global _tracer
+    if not enabled:
+        yield None
+        return
+    previous, tracer = _tracer, Tracer()
+    _tracer = tracer
+    try:
+        yield tracer
+    finally:
+        _tracer = previous
+
+
+def traced_iterator[T](name: str, items: Iterator[T], **attributes: Any) -> Iterator[T]:
+    """Yield from items inside one span covering the whole iteration."""
+    with span(name, **attributes):
+        yield from items
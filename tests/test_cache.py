@@ -0,0 +1,61 @@
+import os
+
+from api_test_gen.cache import ResponseCache, cache_key, default_cache_dir
+
+
+class TestCacheKey:
+    def test_is_stable_and_content_addressed(self):
+        assert cache_key("model", "sys", "usr") == cache_key("model", "sys", "usr")
+        assert cache_key("model", "sys", "usr") != cache_key("model", "sys", "usr!")
+
+    def test_part_boundaries_are_unambiguous(self):
+        assert cache_key("ab", "c") != cache_key("a", "bc")
+
+
+class TestResponseCache:
+    def test_round_trip(self, tmp_path):
+        cache = ResponseCache(tmp_path)
+        key = cache_key("m", "s", "u")
+
+        assert cache.get(key) is None
+        cache.put(key, "响应内容")
+
+        assert cache.get(key) == "响应内容"
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_persists_across_instances(self, tmp_path):
+        key = cache_key("m", "s", "u")
+        ResponseCache(tmp_path).put(key, "stored")
+
+        assert ResponseCache(tmp_path).get(key) == "stored"
+
+    def test_evicts_least_recently_used_entries(self, tmp_path):
+        cache = ResponseCache(tmp_path, max_bytes=350)
+        keys = [cache_key(str(index)) for index in range(3)]
+        for age, key in enumerate(keys):
+            cache.put(key, "x" * 100)
+            path = tmp_path / key[:2] / f"{key}.txt"
+            os.utime(path, (1_000 + age, 1_000 + age))
+        # Touching the oldest entry makes the middle one least recently used.
+        assert cache.get(keys[0]) == "x" * 100
+
+        cache.put(cache_key("new"), "y" * 100)
+
+        assert cache.get(keys[0]) is not None
+        assert cache.get(keys[1]) is None
+        assert cache.get(cache_key("new")) is not None
+
+    def test_discard_removes_entry(self, tmp_path):
+        cache = ResponseCache(tmp_path)
+        key = cache_key("m", "s", "u")
+        cache.put(key, "bad response")
+
+        cache.discard(key)
+
+        assert cache.get(key) is None
+
+
+def test_default_cache_dir_honours_xdg(monkeypatch, tmp_path):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+
+    assert default_cache_dir() == tmp_path / "api-test-gen"
@@ -0,0 +1,237 @@
+import json
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+from click.testing import CliRunner
+
+from api_test_gen.cache import ResponseCache
+from api_test_gen.cassette import Cassette, CassetteEntry, CassetteError
+from api_test_gen.cli import main
+from api_test_gen.llm import LlmClient, LlmError, LlmOptions
+from api_test_gen.stats import tracing
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def _response(content, prompt_tokens=0, completion_tokens=0):
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+        usage=SimpleNamespace(
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            total_tokens=prompt_tokens + completion_tokens,
+        ),
+    )
+
+
+class TestCassette:
+    def test_round_trip(self, tmp_path):
+        path = tmp_path / "run.cassette"
+        recording = Cassette.record(path)
+        recording.put("k1", "m", CassetteEntry("第一个响应", 10, 2))
+        recording.put("k1", "m", CassetteEntry("ignored"))
+        recording.close()
+
+        replay = Cassette.replay(path)
+
+        assert replay.get("k1") == CassetteEntry("第一个响应", 10, 2)
+        assert replay.get("k2") is None
+        assert (recording.recorded, replay.replayed) == (1, 1)
+        assert len(path.read_text(encoding="utf-8").splitlines()) == 2
+
+    def test_torn_last_line_is_ignored(self, tmp_path):
+        path = tmp_path / "run.cassette"
+        recording = Cassette.record(path)
+        recording.put("k1", "m", CassetteEntry("ok"))
+        recording.close()
+        with path.open("a", encoding="utf-8") as handle:
+            handle.write('{"key": "k2", "resp')
+
+        assert Cassette.replay(path).get("k1") == CassetteEntry("ok")
+
+    def test_rejects_malformed_lines_before_the_last(self, tmp_path):
+        path = tmp_path / "run.cassette"
+        recording = Cassette.record(path)
+        recording.put("k1", "m", CassetteEntry("ok"))
+        recording.put("k2", "m", CassetteEntry("ok"))
+        recording.close()
+        lines = path.read_text(encoding="utf-8").splitlines()
+        lines[1] = lines[1][:20]
+        path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+        with pytest.raises(CassetteError, match="corrupted at line 2"):
+            Cassette.replay(path)
+
+    def test_rejects_other_files(self, tmp_path):
+        path = tmp_path / "notes.txt"
+        path.write_text("hello\n", encoding="utf-8")
+
+        with pytest.raises(CassetteError, match="not a cassette"):
+            Cassette.replay(path)
+
+    def test_rejects_other_versions(self, tmp_path):
+        path = tmp_path / "old.cassette"
+        path.write_text(json.dumps({"version": 0}) + "\n", encoding="utf-8")
+
+        with pytest.raises(CassetteError, match="format version 0"):
+            Cassette.replay(path)
+
+
+class TestClientCassette:
+    @patch("api_test_gen.llm.completion")
+    def test_replay_serves_recorded_responses_offline(self, mock_completion, tmp_path):
+        path = tmp_path / "run.cassette"
+        mock_completion.return_value = _response("answer", 100, 20)
+        recording = Cassette.record(path)
+        LlmClient(model="m", options=LlmOptions(cassette=recording)).call("s", "u")
+        recording.close()
+        mock_completion.reset_mock()
+
+        client = LlmClient(
+            model="m", options=LlmOptions(cassette=Cassette.replay(path))
+        )
+        with tracing() as tracer:
+            assert client.call("s", "u") == "answer"
+
+        mock_completion.assert_not_called()
+        assert tracer.records[0].attributes == {
+            "model": "m",
+            "replayed": True,
+            "prompt_tokens": 100,
+            "completion_tokens": 20,
+        }
+
+    @patch("api_test_gen.llm.completion")
+    def test_replay_miss_fails(self, mock_completion, tmp_path):
+        path = tmp_path / "run.cassette"
+        Cassette.record(path).close()
+        client = LlmClient(
+            model="m", options=LlmOptions(cassette=Cassette.replay(path))
+        )
+
+        with pytest.raises(LlmError, match="has no response for this request"):
+            client.call("s", "u")
+        mock_completion.assert_not_called()
+
+    @patch("api_test_gen.llm.completion")
+    def test_cache_hits_are_recorded(self, mock_completion, tmp_path):
+        mock_completion.return_value = _response("cached")
+        cache = ResponseCache(tmp_path / "cache")
+        LlmClient(model="m", options=LlmOptions(cache=cache)).call("s", "u")
+        recording = Cassette.record(tmp_path / "run.cassette")
+
+        LlmClient(model="m", options=LlmOptions(cache=cache, cassette=recording)).call(
+            "s", "u"
+        )
+        recording.close()
+
+        mock_completion.assert_called_once()
+        replay = LlmClient(
+            model="m",
+            options=LlmOptions(cassette=Cassette.replay(tmp_path / "run.cassette")),
+        )
+        assert replay.call("s", "u") == "cached"
+
+
+class TestCliCassette:
+    @patch("api_test_gen.llm.completion")
+    def test_gen_cases_replays_recorded_run(self, mock_completion, tmp_path):
+        drafts = [
+            {
+                "scenario": "ok",
+                "expected_status": 200,
+                "expected_response": "ok",
+                "priority": "P0",
+            }
+        ]
+        mock_completion.return_value = _response(json.dumps(drafts))
+        cassette = tmp_path / "run.cassette"
+        args = ["gen-cases", str(FIXTURES / "petstore.yaml"), "--no-cache"]
+
+        recorded = CliRunner().invoke(
+            main, [*args, "-o", str(tmp_path / "a.md"), "--record", str(cassette)]
+        )
+        assert recorded.exit_code == 0, recorded.output
+        assert "recorded 3 responses" in recorded.output
+        mock_completion.reset_mock()
+
+        replayed = CliRunner().invoke(
+            main, [*args, "-o", str(tmp_path / "b.md"), "--replay", str(cassette)]
+        )
+
+        assert replayed.exit_code == 0, replayed.output
+        assert "replayed 3 responses" in replayed.output
+        mock_completion.assert_not_called()
+        assert (tmp_path / "a.md").read_text(encoding="utf-8") == (
+            tmp_path / "b.md"
+        ).read_text(encoding="utf-8")
+
+    def test_parse_closes_and_reports_its_cassette(self, tmp_path):
+        cassette = tmp_path / "run.cassette"
+        recordings = []
+        start_recording = Cassette.record
+
+        def record(path):
+            recordings.append(start_recording(path))
+            return recordings[-1]
+
+        with patch("api_test_gen.cli.Cassette.record", side_effect=record):
+            result = CliRunner().invoke(
+                main,
+                ["parse", str(FIXTURES / "petstore.yaml"), "--record", str(cassette)],
+            )
+
+        assert result.exit_code == 0, result.output
+        assert len(json.loads(result.stdout)) == 3
+        assert f"recorded 0 responses to {cassette}" in result.stderr
+        assert recordings[0]._handle is None
+
+    @patch("api_test_gen.llm.completion")
+    def test_failed_run_closes_its_cassette(self, mock_completion, tmp_path):
+        mock_completion.side_effect = RuntimeError("outage")
+        recordings = []
+        start_recording = Cassette.record
+
+        def record(path):
+            recordings.append(start_recording(path))
+            return recordings[-1]
+
+        with patch("api_test_gen.cli.Cassette.record", side_effect=record):
+            result = CliRunner().invoke(
+                main,
+                [
+                    "gen-cases",
+                    str(FIXTURES / "petstore.yaml"),
+                    "--no-cache",
+                    "-o",
+                    str(tmp_path / "cases.md"),
+                    "--record",
+                    str(tmp_path / "run.cassette"),
+                ],
+            )
+
+        assert result.exit_code != 0
+        assert recordings[0]._handle is None
+
+    def test_record_and_replay_are_exclusive(self, tmp_path):
+        cassette = tmp_path / "run.cassette"
+        Cassette.record(cassette).close()
+
+        result = CliRunner().invoke(
+            main,
+            [
+                "gen-cases",
+                str(FIXTURES / "petstore.yaml"),
+                "-o",
+                str(tmp_path / "cases.md"),
+                "--record",
+                str(tmp_path / "new.cassette"),
+                "--replay",
+                str(cassette),
+            ],
+        )
+
+        assert result.exit_code == 2
+        assert "--record cannot be combined with --replay" in result.output
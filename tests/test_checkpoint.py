@@ -0,0 +1,156 @@
+import json
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+from click.testing import CliRunner
+
+from api_test_gen.cli import main
+from api_test_gen.generator.checkpoint import CheckpointJournal, journal_path
+from api_test_gen.generator.testcase import TestCaseGenerator
+from api_test_gen.generator.testcase_document import TestCaseDraft
+from api_test_gen.parser.base import ApiEndpoint
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def _draft(scenario):
+    return TestCaseDraft(
+        scenario=scenario,
+        input=None,
+        expected_status=200,
+        expected_response="ok",
+        priority="P0",
+    )
+
+
+def _response(scenario):
+    return json.dumps([_draft(scenario).model_dump(mode="json")])
+
+
+class TestCheckpointJournal:
+    def test_journal_path_sits_next_to_output(self, tmp_path):
+        assert journal_path(tmp_path / "cases.md") == (
+            tmp_path / "cases.md.journal.jsonl"
+        )
+
+    def test_resume_restores_matching_entries(self, tmp_path):
+        path = tmp_path / "cases.md.journal.jsonl"
+        journal = CheckpointJournal.start(path)
+        journal.record("GET /a", "fp-a", [_draft("a")])
+        journal.record("GET /b", "fp-b", [_draft("b")])
+        journal.close()
+
+        resumed = CheckpointJournal.start(path, resume=True)
+
+        assert resumed.restored("GET /a", "fp-a") == [_draft("a")]
+        assert resumed.restored("GET /b", "changed") is None
+        assert resumed.reused == 1
+        resumed.close()
+
+    def test_start_without_resume_forgets_entries(self, tmp_path):
+        path = tmp_path / "journal.jsonl"
+        journal = CheckpointJournal.start(path)
+        journal.record("GET /a", "fp-a", [_draft("a")])
+        journal.close()
+
+        fresh = CheckpointJournal.start(path)
+
+        assert fresh.restored("GET /a", "fp-a") is None
+        assert path.read_text(encoding="utf-8") == ""
+        fresh.close()
+
+    def test_torn_last_line_is_dropped(self, tmp_path):
+        path = tmp_path / "journal.jsonl"
+        journal = CheckpointJournal.start(path)
+        journal.record("GET /a", "fp-a", [_draft("a")])
+        journal.close()
+        with path.open("a", encoding="utf-8") as handle:
+            handle.write('{"key": "GET /b", "finger')
+
+        resumed = CheckpointJournal.start(path, resume=True)
+        resumed.record("GET /c", "fp-c", [_draft("c")])
+        resumed.close()
+
+        lines = path.read_text(encoding="utf-8").splitlines()
+        assert [json.loads(line)["key"] for line in lines] == ["GET /a", "GET /c"]
+
+    def test_discard_removes_file(self, tmp_path):
+        path = tmp_path / "journal.jsonl"
+        journal = CheckpointJournal.start(path)
+
+        journal.discard()
+
+        assert not path.exists()
+
+
+class TestGeneratorCheckpoints:
+    @patch("api_test_gen.generator.testcase.LlmClient")
+    def test_finished_endpoints_survive_a_failure(self, MockLlmClient, tmp_path):
+        mock_client = MagicMock()
+        mock_client.call.side_effect = [_response("a"), RuntimeError("outage")]
+        MockLlmClient.return_value = mock_client
+        endpoints = [ApiEndpoint(method="GET", path=f"/{name}") for name in "ab"]
+        path = tmp_path / "journal.jsonl"
+
+        journal = CheckpointJournal.start(path)
+        with pytest.raises(RuntimeError, match="outage"):
+            TestCaseGenerator(model="m").generate(endpoints, journal=journal)
+        journal.close()
+
+        mock_client.call.reset_mock(side_effect=True)
+        mock_client.call.return_value = _response("b")
+        resumed = CheckpointJournal.start(path, resume=True)
+        result = TestCaseGenerator(model="m").generate(endpoints, journal=resumed)
+        resumed.close()
+
+        mock_client.call.assert_called_once()
+        assert "/b" in mock_client.call.call_args.kwargs["user"]
+        assert "| TC-001 | a |" in result
+        assert "| TC-002 | b |" in result
+
+    @patch("api_test_gen.generator.testcase.LlmClient")
+    def test_changed_model_invalidates_entries(self, MockLlmClient, tmp_path):
+        mock_client = MagicMock()
+        mock_client.call.return_value = _response("a")
+        MockLlmClient.return_value = mock_client
+        endpoints = [ApiEndpoint(method="GET", path="/a")]
+        path = tmp_path / "journal.jsonl"
+
+        journal = CheckpointJournal.start(path)
+        TestCaseGenerator(model="m1").generate(endpoints, journal=journal)
+        journal.close()
+        resumed = CheckpointJournal.start(path, resume=True)
+        TestCaseGenerator(model="m2").generate(endpoints, journal=resumed)
+        resumed.close()
+
+        assert mock_client.call.call_count == 2
+
+
+class TestCliResume:
+    @patch("api_test_gen.generator.testcase.LlmClient")
+    def test_gen_cases_resumes_after_interruption(self, MockLlmClient, tmp_path):
+        mock_client = MagicMock()
+        mock_client.call.side_effect = [
+            _response("create"),
+            _response("list"),
+            KeyboardInterrupt(),
+        ]
+        MockLlmClient.return_value = mock_client
+        output = tmp_path / "cases.md"
+        args = ["gen-cases", str(FIXTURES / "petstore.yaml"), "-o", str(output)]
+
+        interrupted = CliRunner().invoke(main, [*args, "--no-cache"])
+        assert interrupted.exit_code != 0
+        assert not output.exists()
+        assert journal_path(output).exists()
+
+        mock_client.call.reset_mock(side_effect=True)
+        mock_client.call.return_value = _response("again")
+        resumed = CliRunner().invoke(main, [*args, "--no-cache", "--resume"])
+
+        assert resumed.exit_code == 0, resumed.output
+        assert "Resumed 2 endpoints" in resumed.output
+        mock_client.call.assert_called_once()
+        assert not journal_path(output).exists()
+        assert output.read_text(encoding="utf-8").count("## ") == 3
@@ -1,5 +1,6 @@
+import json
 from pathlib import Path
-from unittest.mock import patch
+from unittest.mock import ANY, patch
 
 from click.testing import CliRunner
 
@@ -8,6 +9,7 @@ from api_test_gen.generator.common import GenerationValidationError
 from api_test_gen.generator.testcase_document import TestCaseDocumentError
 from api_test_gen.parser.base import ApiEndpoint
 from api_test_gen.pipeline import filter_endpoints
+from api_test_gen.ratelimit import RateLimits
 
 FIXTURES = Path(__file__).parent / "fixtures"
 
@@ -26,9 +28,9 @@ def _make_endpoint(method: str, path: str) -> ApiEndpoint:
 
 
 class TestCliGenCases:
-    @patch("api_test_gen.cli.generate_testcases")
+    @patch("api_test_gen.cli.stream_testcases")
     def test_gen_cases_with_swagger(self, mock_generate, tmp_path):
-        mock_generate.return_value = "## GET /pets\n| TC-001 | ... |"
+        mock_generate.return_value = ["## GET /pets\n| TC-001 | ... |"]
         output_file = tmp_path / "cases.md"
         runner = CliRunner()
         result = runner.invoke(
@@ -45,7 +47,7 @@ class TestCliGenCases:
         assert output_file.exists()
         mock_generate.assert_called_once()
 
-    @patch("api_test_gen.cli.generate_testcases", return_value="## GET /pets")
+    @patch("api_test_gen.cli.stream_testcases", return_value=["## GET /pets"])
     @patch("api_test_gen.cli.parse_document")
     def test_markdown_model_is_forwarded(self, mock_parse, _mock_generate, tmp_path):
         mock_parse.return_value = [_make_endpoint("GET", "/pets")]
@@ -67,7 +69,115 @@ class TestCliGenCases:
         )
 
         assert result.exit_code == 0
-        mock_parse.assert_called_once_with(doc, "markdown", model="custom-model")
+        mock_parse.assert_called_once_with(
+            doc, "markdown", model="custom-model", llm_options=ANY
+        )
+
+    @patch("api_test_gen.cli.stream_testcases", return_value=["## GET /pets"])
+    def test_cache_dir_is_used_for_llm_options(self, mock_generate, tmp_path):
+        cache_dir = tmp_path / "llm-cache"
+
+        result = CliRunner().invoke(
+            main,
+            [
+                "gen-cases",
+                str(FIXTURES / "petstore.yaml"),
+                "-o",
+                str(tmp_path / "cases.md"),
+                "--cache-dir",
+                str(cache_dir),
+                "--cache-max-mb",
+                "8",
+            ],
+        )
+
+        assert result.exit_code == 0
+        cache = mock_generate.call_args.kwargs["llm_options"].cache
+        assert cache.directory == cache_dir
+        assert cache.max_bytes == 8 * 1024 * 1024
+
+    @patch("api_test_gen.cli.stream_testcases", return_value=["## GET /pets"])
+    def test_no_cache_disables_response_cache(self, mock_generate, tmp_path):
+        result = CliRunner().invoke(
+            main,
+            [
+                "gen-cases",
+                str(FIXTURES / "petstore.yaml"),
+                "-o",
+                str(tmp_path / "cases.md"),
+                "--no-cache",
+            ],
+        )
+
+        assert result.exit_code == 0
+        assert mock_generate.call_args.kwargs["llm_options"].cache is None
+
+    @patch("api_test_gen.cli.stream_testcases", return_value=["## GET /pets"])
+    def test_jobs_is_forwarded(self, mock_generate, tmp_path):
+        result = CliRunner().invoke(
+            main,
+            [
+                "gen-cases",
+                str(FIXTURES / "petstore.yaml"),
+                "-o",
+                str(tmp_path / "cases.md"),
+                "--jobs",
+                "4",
+            ],
+        )
+
+        assert result.exit_code == 0
+        assert mock_generate.call_args.kwargs["jobs"] == 4
+
+    @patch("api_test_gen.cli.stream_testcases", return_value=["## GET /pets"])
+    def test_rate_limits_are_forwarded(self, mock_generate, tmp_path):
+        result = CliRunner().invoke(
+            main,
+            [
+                "gen-cases",
+                str(FIXTURES / "petstore.yaml"),
+                "-o",
+                str(tmp_path / "cases.md"),
+                "--rpm",
+                "50",
+                "--tpm",
+                "40000",
+                "--max-concurrency",
+                "4",
+            ],
+        )
+
+        assert result.exit_code == 0
+        limiter = mock_generate.call_args.kwargs["llm_options"].rate_limiter
+        assert limiter.limits == RateLimits(
+            requests_per_minute=50, tokens_per_minute=40000, max_concurrency=4
+        )
+
+    def test_summary_reports_rate_limiter_stats(self, tmp_path):
+        def generate(endpoints, **kwargs):
+            limiter = kwargs["llm_options"].rate_limiter.for_model("gpt-4o")
+            with limiter.slot(1):
+                pass
+            return ["## GET /pets"]
+
+        with patch("api_test_gen.cli.stream_testcases", side_effect=generate):
+            result = CliRunner().invoke(
+                main,
+                [
+                    "gen-cases",
+                    str(FIXTURES / "petstore.yaml"),
+                    "-o",
+                    str(tmp_path / "cases.md"),
+                    "--max-concurrency",
+                    "3",
+                ],
+            )
+
+        assert result.exit_code == 0, result.output
+        assert (
+            "LLM gpt-4o: 1 requests, 0 retries, 0 throttled, 0.0s waiting, "
+            "concurrency limit 3" in result.output
+        )
 
     def test_parse_error_is_user_facing(self, tmp_path):
         doc = tmp_path / "broken.yaml"
@@ -89,7 +199,7 @@ class TestCliGenCases:
         assert "Failed to parse" in result.output
         assert "Traceback" not in result.output
 
-    @patch("api_test_gen.cli.generate_testcases")
+    @patch("api_test_gen.cli.stream_testcases")
     def test_generation_error_is_user_facing(self, mock_generate, tmp_path):
         mock_generate.side_effect = TestCaseDocumentError(
             "Invalid test-case JSON: expected an array"
@@ -170,6 +280,38 @@ class TestCliGenCode:
         assert "Generated files failed validation" in result.output
 
 
+class TestCliParse:
+    def test_parse_prints_endpoints_json_to_stdout(self):
+        result = CliRunner().invoke(main, ["parse", str(FIXTURES / "petstore.yaml")])
+
+        assert result.exit_code == 0
+        endpoints = json.loads(result.stdout)
+        assert [(e["method"], e["path"]) for e in endpoints] == [
+            ("GET", "/pets"),
+            ("POST", "/pets"),
+            ("GET", "/pets/{petId}"),
+        ]
+        assert "Found 3 endpoints." in result.stderr
+
+    def test_parse_writes_filtered_endpoints_to_file(self, tmp_path):
+        output = tmp_path / "endpoints.json"
+        result = CliRunner().invoke(
+            main,
+            [
+                "parse",
+                str(FIXTURES / "petstore.yaml"),
+                "--filter",
+                "POST /pets",
+                "-o",
+                str(output),
+            ],
+        )
+
+        assert result.exit_code == 0
+        endpoints = json.loads(output.read_text(encoding="utf-8"))
+        assert [(e["method"], e["path"]) for e in endpoints] == [("POST", "/pets")]
+
+
 class TestCliRun:
     @patch("api_test_gen.cli.generate_code")
     @patch("api_test_gen.cli.generate_testcases")
@@ -196,6 +338,89 @@ class TestCliRun:
         mock_testcases.assert_called_once()
         mock_code.assert_called_once()
 
+    @patch("api_test_gen.cli.generate_code")
+    @patch("api_test_gen.pipeline.TestCaseGenerator")
+    def test_run_incremental_regenerates_only_changed_endpoints(
+        self, MockGenerator, mock_code, tmp_path
+    ):
+        def render(endpoints, depth, start_index, journal=None):
+            return "\n\n".join(
+                f"## {endpoint.method} {endpoint.path}\n\n> s\n\n"
+                "| 编号 | 场景 | 输入 | 预期状态码 | 预期响应 | 优先级 |\n"
+                "|------|------|------|-----------|---------|--------|\n"
+                f"| TC-{start_index + offset:03d} | ok | 无 | 200 | ok | P0 |"
+                for offset, endpoint in enumerate(endpoints)
+            )
+
+        MockGenerator.return_value.generate.side_effect = render
+        mock_code.return_value = {"test_pets.py": "# tests"}
+        output_dir = tmp_path / "output"
+        args = ["run", str(FIXTURES / "petstore.yaml"), "-o", str(output_dir)]
+        runner = CliRunner()
+
+        first = runner.invoke(main, args)
+        assert first.exit_code == 0, first.output
+        assert (output_dir / "testcases.manifest.json").exists()
+        before = (output_dir / "testcases.md").read_text(encoding="utf-8")
+
+        second = runner.invoke(main, [*args, "--incremental"])
+
+        assert second.exit_code == 0, second.output
+        assert MockGenerator.return_value.generate.call_count == 1
+        assert (output_dir / "testcases.md").read_text(encoding="utf-8") == before
+        assert "Reusing" in second.output
+
+    @patch("api_test_gen.cli.generate_code")
+    @patch("api_test_gen.pipeline.TestCaseGenerator")
+    def test_failed_code_stage_invalidates_the_manifest(
+        self, MockGenerator, mock_code, tmp_path
+    ):
+        def render(endpoints, depth, start_index, journal=None):
+            return "\n\n".join(
+                f"## {endpoint.method} {endpoint.path}\n\n> {depth}\n\n"
+                "| 编号 | 场景 | 输入 | 预期状态码 | 预期响应 | 优先级 |\n"
+                "|------|------|------|-----------|---------|--------|\n"
+                f"| TC-{start_index + offset:03d} | ok | 无 | 200 | ok | P0 |"
+                for offset, endpoint in enumerate(endpoints)
+            )
+
+        MockGenerator.return_value.generate.side_effect = render
+        mock_code.return_value = {"test_pets.py": "# quick tests"}
+        output_dir = tmp_path / "output"
+        args = ["run", str(FIXTURES / "petstore.yaml"), "-o", str(output_dir)]
+        runner = CliRunner()
+        assert runner.invoke(main, args).exit_code == 0
+
+        mock_code.side_effect = GenerationValidationError({"test_pets.py": "bad"})
+        failed = runner.invoke(main, [*args, "--depth", "full", "--incremental"])
+        assert failed.exit_code != 0
+        assert not (output_dir / "testcases.manifest.json").exists()
+
+        mock_code.side_effect = None
+        MockGenerator.return_value.generate.reset_mock()
+        third = runner.invoke(main, [*args, "--incremental"])
+
+        assert third.exit_code == 0, third.output
+        generated = MockGenerator.return_value.generate.call_args.args[0]
+        assert len(generated) == 3
+        assert mock_code.call_args.kwargs["reusable"] == {}
+
+    def test_run_rejects_incremental_with_append(self, tmp_path):
+        result = CliRunner().invoke(
+            main,
+            [
+                "run",
+                str(FIXTURES / "petstore.yaml"),
+                "-o",
+                str(tmp_path),
+                "--incremental",
+                "--append",
+            ],
+        )
+
+        assert result.exit_code != 0
+        assert "--incremental cannot be combined with --append" in result.output
+
 
 class TestFilterEndpoints:
     def test_filter_by_method_and_path(self):
@@ -230,12 +455,14 @@ class TestFilterEndpoints:
 
 class TestAppendMode:
     @patch(
-        "api_test_gen.cli.generate_testcases",
-        return_value="""## POST /new
+        "api_test_gen.cli.stream_testcases",
+        return_value=[
+            """## POST /new
 
 | 编号 | 场景 | 输入 | 预期状态码 | 预期响应 | 优先级 |
 |------|------|------|-----------|---------|--------|
-| TC-008 | new | 无 | 201 | ok | P0 |""",
+| TC-008 | new | 无 | 201 | ok | P0 |"""
+        ],
     )
     def test_gen_cases_append(self, mock_generate, tmp_path):
         output_file = tmp_path / "cases.md"
@@ -268,7 +495,7 @@ class TestAppendMode:
         assert "TC-008" in content
         assert mock_generate.call_args.kwargs["start_index"] == 8
 
-    @patch("api_test_gen.cli.generate_testcases")
+    @patch("api_test_gen.cli.stream_testcases")
     def test_gen_cases_append_rejects_duplicate_endpoint(self, mock_generate, tmp_path):
         output_file = tmp_path / "cases.md"
         output_file.write_text(
@@ -1,9 +1,12 @@
+from types import SimpleNamespace
 from unittest.mock import patch, MagicMock
 
 import pytest
 
+from api_test_gen.cache import ResponseCache
 from api_test_gen.generator.code import CodeGenerator
 from api_test_gen.generator.common import GenerationValidationError
+from api_test_gen.llm import LlmOptions
 
 SAMPLE_TESTCASES = """## POST /api/users
 
@@ -95,6 +98,20 @@ class TestCodeGenerator:
         assert len(names) == 2
         assert all(name.startswith("test_post_api_users_") for name in names)
 
+    @patch("api_test_gen.generator.common.validate_files", return_value={})
+    @patch("api_test_gen.generator.code.LlmClient")
+    def test_reusable_files_skip_llm(self, MockLlmClient, _mock_validate):
+        mock_client = MagicMock()
+        MockLlmClient.return_value = mock_client
+        previous = "class TestPrevious:\n    pass\n"
+
+        files = CodeGenerator(model="test-model").generate(
+            SAMPLE_TESTCASES, reusable={"test_post_api_users.py": previous}
+        )
+
+        assert files["test_post_api_users.py"] == previous
+        mock_client.call.assert_not_called()
+
 
 class TestCodeGeneratorValidation:
     @patch("api_test_gen.generator.common.validate_files")
@@ -143,6 +160,28 @@ class TestCodeGeneratorValidation:
         # initial + 2 retries = 3 validation calls
         assert mock_validate.call_count == 3
 
+    @patch("api_test_gen.generator.common.validate_files")
+    @patch("api_test_gen.llm.completion")
+    def test_rerun_after_failure_requests_new_code(
+        self, mock_completion, mock_validate, tmp_path
+    ):
+        responses = iter(
+            [MOCK_CODE_RESPONSE, FIXED_CODE_RESPONSE, SECOND_FIXED_CODE_RESPONSE] * 2
+        )
+        mock_completion.side_effect = lambda **request: SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=next(responses)))]
+        )
+        mock_validate.return_value = {"test_post_api_users.py": "SyntaxError: line 5"}
+        options = LlmOptions(cache=ResponseCache(tmp_path / "cache"))
+
+        for _ in range(2):
+            with pytest.raises(GenerationValidationError):
+                CodeGenerator(model="test-model", llm_options=options).generate(
+                    SAMPLE_TESTCASES
+                )
+
+        assert mock_completion.call_count == 6
+
     @patch("api_test_gen.generator.common.validate_files")
     @patch("api_test_gen.generator.code.LlmClient")
     def test_no_retry_when_valid(self, MockLlmClient, mock_validate):
@@ -0,0 +1,122 @@
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from api_test_gen.generator.common import (
+    GenerationValidationError,
+    map_ordered,
+    run_task_graph,
+    validate_and_repair,
+)
+
+
+def test_map_ordered_keeps_input_order_with_threads():
+    assert list(map_ordered(lambda value: value * 2, [3, 1, 2], jobs=3)) == [6, 2, 4]
+
+
+def test_task_graph_passes_dependency_results_in_order():
+    tasks = {
+        "a": (lambda: 1, ()),
+        "b": (lambda: 2, ()),
+        "sum": (lambda a, b: a + b, ("a", "b")),
+    }
+
+    assert run_task_graph(tasks) == {"a": 1, "b": 2, "sum": 3}
+    assert run_task_graph(tasks, jobs=4) == {"a": 1, "b": 2, "sum": 3}
+
+
+def test_task_graph_runs_independent_tasks_concurrently():
+    barrier = threading.Barrier(2, timeout=5)
+    tasks = {
+        "left": (barrier.wait, ()),
+        "right": (barrier.wait, ()),
+        "join": (lambda left, right: sorted([left, right]), ("left", "right")),
+    }
+
+    assert run_task_graph(tasks, jobs=2)["join"] == [0, 1]
+
+
+def test_task_graph_rejects_unknown_dependencies():
+    with pytest.raises(ValueError, match="depends on unknown or later tasks"):
+        run_task_graph({"b": (lambda a: a, ("a",)), "a": (lambda: 1, ())})
+
+
+def test_task_graph_stops_scheduling_after_failure():
+    started = []
+
+    def fail():
+        raise RuntimeError("boom")
+
+    tasks = {
+        "fail": (fail, ()),
+        "after": (lambda _: started.append("after"), ("fail",)),
+    }
+
+    with pytest.raises(RuntimeError, match="boom"):
+        run_task_graph(tasks, jobs=2)
+    assert started == []
+
+
+class TestValidateAndRepair:
+    @patch("api_test_gen.generator.common.validate_files")
+    def test_failing_files_are_repaired_concurrently(self, mock_validate):
+        barrier = threading.Barrier(2, timeout=5)
+        mock_validate.side_effect = [{"a.py": "bad", "b.py": "bad"}, {}]
+
+        def repair(path, content, error):
+            barrier.wait()
+            return f"# fixed {path}\n"
+
+        files = validate_and_repair(
+            {"a.py": "x = (", "b.py": "y = (", "c.py": "z = 1\n"}, repair, jobs=2
+        )
+
+        assert files == {
+            "a.py": "# fixed a.py\n",
+            "b.py": "# fixed b.py\n",
+            "c.py": "z = 1\n",
+        }
+        assert mock_validate.call_count == 2
+
+    @patch("api_test_gen.generator.common.validate_files")
+    def test_syntax_errors_are_repaired_again_without_full_validation(
+        self, mock_validate
+    ):
+        mock_validate.side_effect = [{"a.py": "SyntaxError"}, {}]
+        attempts = iter(["still = (", "fixed = 1\n"])
+        errors = []
+
+        def repair(path, content, error):
+            errors.append(error)
+            return next(attempts)
+
+        files = validate_and_repair({"a.py": "x = ("}, repair)
+
+        assert files == {"a.py": "fixed = 1\n"}
+        assert errors[0] == "SyntaxError"
+        assert errors[1].startswith("SyntaxError: ")
+        assert mock_validate.call_count == 2
+
+    @patch("api_test_gen.generator.common.validate_files")
+    def test_retry_budget_is_per_file(self, mock_validate):
+        mock_validate.return_value = {"a.py": "bad"}
+        calls = []
+
+        def repair(path, content, error):
+            calls.append(path)
+            return f"{content}# again\n"
+
+        with pytest.raises(GenerationValidationError):
+            validate_and_repair({"a.py": "x = 1\n"}, repair, max_retries=2)
+
+        assert calls == ["a.py", "a.py"]
+
+    @patch("api_test_gen.generator.common.validate_files")
+    def test_unrepairable_errors_stop_immediately(self, mock_validate):
+        mock_validate.return_value = {"_collect": "import error"}
+
+        with pytest.raises(GenerationValidationError, match="import error"):
+            validate_and_repair({"a.py": "x = 1\n"}, lambda *args: "unused")
+
+        assert mock_validate.call_count == 1
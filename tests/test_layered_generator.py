@@ -2,7 +2,8 @@ from unittest.mock import MagicMock, patch
 
 import pytest
 
-from api_test_gen.generator.layered import LayeredCodeGenerator
+from api_test_gen.generator.common import GenerationValidationError
+from api_test_gen.generator.layered import PROMPTS_DIR, LayeredCodeGenerator
 from api_test_gen.generator.testcase_document import TestCaseDocumentError
 from api_test_gen.parser.base import ApiEndpoint
 
@@ -424,6 +425,44 @@ class TestLayeredGenerate:
 
         assert mock_client.call.call_count == 8
 
+    @patch("api_test_gen.generator.common.validate_files", return_value={})
+    @patch("api_test_gen.generator.layered.LlmClient")
+    def test_parallel_generation_matches_sequential(
+        self, MockLlmClient, _mock_validate
+    ):
+        layer_prompts = {
+            (PROMPTS_DIR / f"layered_{layer}.md").read_text(encoding="utf-8"): layer
+            for layer in ("api", "data", "services", "tests")
+        }
+        seen_users = []
+
+        def fake_call(system, user):
+            layer = layer_prompts[system]
+            seen_users.append((layer, user))
+            tag = "pets" if "'pets'" in user else "users"
+            lang = "yaml" if layer == "data" else "python"
+            return f"```{lang}\n# {tag} {layer}\n```"
+
+        MockLlmClient.return_value.call.side_effect = fake_call
+        endpoints = [
+            _ep("POST", "/api/users", ["users"]),
+            _ep("GET", "/api/users/{id}", ["users"]),
+            _ep("GET", "/api/pets", ["pets"]),
+        ]
+
+        sequential = LayeredCodeGenerator(model="test").generate(
+            SAMPLE_TESTCASES, endpoints
+        )
+        parallel = LayeredCodeGenerator(model="test", jobs=8).generate(
+            SAMPLE_TESTCASES, endpoints
+        )
+
+        assert list(parallel.items()) == list(sequential.items())
+        services_prompts = [user for layer, user in seen_users if layer == "services"]
+        assert any("# pets api" in user for user in services_prompts)
+        tests_prompts = [user for layer, user in seen_users if layer == "tests"]
+        assert all("api\n" in user and "data\n" in user for user in tests_prompts)
+
 
 class TestLayeredValidation:
     @patch("api_test_gen.generator.common.validate_files")
@@ -455,6 +494,30 @@ class TestLayeredValidation:
         assert mock_validate.call_count == 2
         assert mock_client.call.call_count == 5  # 4 layers + 1 retry
 
+    @patch("api_test_gen.generator.common.validate_files")
+    @patch("api_test_gen.generator.layered.LlmClient")
+    def test_failed_file_responses_are_discarded(self, MockLlmClient, mock_validate):
+        mock_client = MagicMock()
+        mock_client.call.side_effect = [
+            MOCK_API_RESPONSE,
+            MOCK_DATA_RESPONSE,
+            MOCK_SERVICES_RESPONSE,
+            MOCK_TESTS_RESPONSE,
+            FIXED_API_RESPONSE,
+            MOCK_API_RESPONSE,
+        ]
+        MockLlmClient.return_value = mock_client
+        mock_validate.return_value = {"api/users_api.py": "SyntaxError: line 3"}
+
+        gen = LayeredCodeGenerator(model="test")
+        with pytest.raises(GenerationValidationError):
+            gen.generate(SAMPLE_TESTCASES, [_ep("POST", "/api/users", ["users"])])
+
+        discarded = [call.args[1] for call in mock_client.discard.call_args_list]
+        assert len(discarded) == 3
+        assert "生成封装类" in discarded[0]
+        assert all("请修复" in user for user in discarded[1:])
+
     @patch("api_test_gen.generator.common.validate_files")
     @patch("api_test_gen.generator.layered.LlmClient")
     def test_no_retry_when_valid(self, MockLlmClient, mock_validate):
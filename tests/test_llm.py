@@ -1,8 +1,15 @@
-from unittest.mock import patch, MagicMock
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
-from api_test_gen.llm import LlmClient, LlmError
+from api_test_gen.cache import ResponseCache
+from api_test_gen.llm import LlmClient, LlmError, LlmOptions
+from api_test_gen.ratelimit import RateLimiter
 
 
 class TestLlmClient:
@@ -54,7 +61,7 @@ class TestLlmClient:
 
         call_kwargs = mock_completion.call_args[1]
         assert call_kwargs["timeout"] == 5
-        assert call_kwargs["num_retries"] == 3
+        assert call_kwargs["num_retries"] == 0
 
     @patch("api_test_gen.llm.completion")
     def test_empty_content_raises(self, mock_completion):
@@ -85,3 +92,422 @@ class TestLlmClient:
         client = LlmClient(model="gpt-4o")
         with pytest.raises(LlmError, match="connection reset"):
             client.call(system="sys", user="usr")
+
+    @patch("api_test_gen.llm.completion")
+    def test_throttled_request_is_retried_with_backoff(self, mock_completion):
+        mock_completion.side_effect = [
+            _StatusError(429),
+            _StatusError(503),
+            _mock_response("ok"),
+        ]
+        sleeps = []
+        options = LlmOptions(rate_limiter=RateLimiter(sleep=sleeps.append))
+
+        client = LlmClient(model="gpt-4o", num_retries=2, options=options)
+
+        assert client.call(system="sys", user="usr") == "ok"
+        assert mock_completion.call_count == 3
+        assert len(sleeps) == 2
+        stats = options.rate_limiter.for_model("gpt-4o").stats
+        assert (stats.requests, stats.retries, stats.throttled) == (3, 2, 1)
+
+    @patch("api_test_gen.llm.completion")
+    def test_retries_are_bounded(self, mock_completion):
+        mock_completion.side_effect = _StatusError(429)
+        options = LlmOptions(rate_limiter=RateLimiter(sleep=lambda _: None))
+
+        client = LlmClient(model="gpt-4o", num_retries=2, options=options)
+
+        with pytest.raises(LlmError, match="status 429"):
+            client.call(system="sys", user="usr")
+        assert mock_completion.call_count == 3
+
+    @patch("api_test_gen.llm.completion")
+    def test_client_errors_are_not_retried(self, mock_completion):
+        mock_completion.side_effect = _StatusError(401)
+
+        client = LlmClient(model="gpt-4o", num_retries=2)
+
+        with pytest.raises(LlmError):
+            client.call(system="sys", user="usr")
+        mock_completion.assert_called_once()
+
+    @patch("api_test_gen.llm.supports_prompt_caching", return_value=True)
+    @patch("api_test_gen.llm.completion")
+    def test_cache_breakpoints_mark_system_prefix(self, mock_completion, _):
+        mock_completion.return_value = _mock_response("ok")
+
+        client = LlmClient(model="claude-sonnet-4-20250514")
+        client.call(system="shared-rest", user="usr", cache_breakpoints=(6,))
+
+        content = mock_completion.call_args.kwargs["messages"][0]["content"]
+        assert content == [
+            {
+                "type": "text",
+                "text": "shared",
+                "cache_control": {"type": "ephemeral"},
+            },
+            {"type": "text", "text": "-rest"},
+        ]
+
+    @patch("api_test_gen.llm.supports_prompt_caching", return_value=False)
+    @patch("api_test_gen.llm.completion")
+    def test_cache_breakpoints_ignored_without_support(self, mock_completion, _):
+        mock_completion.return_value = _mock_response("ok")
+
+        client = LlmClient(model="gemini/gemini-pro")
+        client.call(system="shared-rest", user="usr", cache_breakpoints=(6,))
+
+        content = mock_completion.call_args.kwargs["messages"][0]["content"]
+        assert content == "shared-rest"
+
+
+class _StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+
+
+def _mock_response(content):
+    response = MagicMock()
+    response.choices = [MagicMock()]
+    response.choices[0].message.content = content
+    return response
+
+
+class _FakeCompletionHandler(BaseHTTPRequestHandler):
+    """Minimal OpenAI-compatible chat completion endpoint."""
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.requests.append(body)
+        payload = {
+            "id": "chatcmpl-fake",
+            "object": "chat.completion",
+            "created": 0,
+            "model": body["model"],
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {
+                        "role": "assistant",
+                        "content": f"echo: {body['messages'][1]['content']}",
+                    },
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": {"prompt_tokens": 3, "completion_tokens": 2, "total_tokens": 5},
+        }
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def fake_completion_server(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FakeCompletionHandler)
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+class TestLlmClientCache:
+    @patch("api_test_gen.llm.completion")
+    def test_second_identical_call_is_served_from_cache(
+        self, mock_completion, tmp_path
+    ):
+        mock_completion.return_value = _mock_response("cached answer")
+        options = LlmOptions(cache=ResponseCache(tmp_path))
+
+        first = LlmClient(model="gpt-4o", options=options).call("sys", "usr")
+        second = LlmClient(model="gpt-4o", options=options).call("sys", "usr")
+
+        assert first == second == "cached answer"
+        mock_completion.assert_called_once()
+        assert options.cache.hits == 1
+        assert options.cache.misses == 1
+
+    @patch("api_test_gen.llm.completion")
+    def test_cache_key_includes_model_and_prompts(self, mock_completion, tmp_path):
+        mock_completion.return_value = _mock_response("ok")
+        options = LlmOptions(cache=ResponseCache(tmp_path))
+
+        LlmClient(model="gpt-4o", options=options).call("sys", "usr")
+        LlmClient(model="other-model", options=options).call("sys", "usr")
+        LlmClient(model="gpt-4o", options=options).call("sys", "changed")
+
+        assert mock_completion.call_count == 3
+
+    @patch("api_test_gen.llm.completion")
+    def test_discard_forces_a_fresh_request(self, mock_completion, tmp_path):
+        mock_completion.return_value = _mock_response("ok")
+        client = LlmClient(
+            model="gpt-4o", options=LlmOptions(cache=ResponseCache(tmp_path))
+        )
+
+        client.call("sys", "usr")
+        client.discard("sys", "usr")
+        client.call("sys", "usr")
+
+        assert mock_completion.call_count == 2
+
+    @patch("api_test_gen.llm.acompletion", new_callable=AsyncMock)
+    def test_acall_shares_the_cache(self, mock_acompletion, tmp_path):
+        mock_acompletion.return_value = _mock_response("async answer")
+        options = LlmOptions(cache=ResponseCache(tmp_path))
+        client = LlmClient(model="gpt-4o", options=options)
+
+        async def scenario():
+            try:
+                return await client.acall("sys", "usr")
+            finally:
+                await client.aclose()
+
+        asyncio.run(scenario())
+
+        assert client.call("sys", "usr") == "async answer"
+        mock_acompletion.assert_called_once()
+
+
+class TestLlmClientAsync:
+    @patch("api_test_gen.llm.acompletion", new_callable=AsyncMock)
+    def test_acall_passes_same_request(self, mock_acompletion):
+        mock_acompletion.return_value = _mock_response("ok")
+        client = LlmClient(model="gpt-4o", timeout=5, num_retries=3)
+
+        async def scenario():
+            try:
+                return await client.acall(system="sys", user="usr")
+            finally:
+                await client.aclose()
+
+        assert asyncio.run(scenario()) == "ok"
+        call_kwargs = mock_acompletion.call_args.kwargs
+        assert call_kwargs["model"] == "gpt-4o"
+        assert call_kwargs["timeout"] == 5
+        assert call_kwargs["num_retries"] == 0
+        assert call_kwargs["messages"][0] == {"role": "system", "content": "sys"}
+        assert call_kwargs["shared_session"] is not None
+
+    @patch("api_test_gen.llm.acompletion", new_callable=AsyncMock)
+    def test_acall_reuses_session_on_one_loop(self, mock_acompletion):
+        mock_acompletion.return_value = _mock_response("ok")
+        client = LlmClient(model="gpt-4o")
+
+        async def scenario():
+            await asyncio.gather(*(client.acall("sys", f"u{i}") for i in range(3)))
+            await client.aclose()
+
+        asyncio.run(scenario())
+
+        sessions = {
+            id(call.kwargs["shared_session"])
+            for call in mock_acompletion.call_args_list
+        }
+        assert len(sessions) == 1
+
+    @patch("api_test_gen.llm.acompletion", new_callable=AsyncMock)
+    def test_acall_empty_content_raises(self, mock_acompletion):
+        mock_acompletion.return_value = _mock_response("  ")
+        client = LlmClient(model="gpt-4o")
+
+        with pytest.raises(LlmError, match="empty response"):
+            asyncio.run(client.acall(system="sys", user="usr"))
+
+    @patch("api_test_gen.llm.acompletion", new_callable=AsyncMock)
+    def test_acall_provider_error_is_wrapped(self, mock_acompletion):
+        mock_acompletion.side_effect = RuntimeError("connection reset")
+        client = LlmClient(model="gpt-4o")
+
+        with pytest.raises(LlmError, match="connection reset"):
+            asyncio.run(client.acall(system="sys", user="usr"))
+
+    def test_acall_fans_out_against_local_server(self, fake_completion_server):
+        port = fake_completion_server.server_port
+        client = LlmClient(
+            model="openai/fake-model",
+            api_base=f"http://127.0.0.1:{port}/v1",
+            num_retries=0,
+        )
+
+        async def scenario():
+            try:
+                return await asyncio.gather(
+                    *(client.acall("sys", f"request {i}") for i in range(8))
+                )
+            finally:
+                await client.aclose()
+
+        results = asyncio.run(scenario())
+
+        assert results == [f"echo: request {i}" for i in range(8)]
+        assert len(fake_completion_server.requests) == 8
+
+
+class TestSingleFlight:
+    @patch("api_test_gen.llm.completion")
+    def test_concurrent_identical_calls_share_one_request(self, mock_completion):
+        started, release = threading.Event(), threading.Event()
+
+        def slow_completion(**kwargs):
+            started.set()
+            release.wait(5)
+            return _mock_response("shared")
+
+        mock_completion.side_effect = slow_completion
+        options = LlmOptions()
+        results = []
+
+        def call():
+            results.append(LlmClient(model="gpt-4o", options=options).call("s", "u"))
+
+        leader = threading.Thread(target=call)
+        leader.start()
+        started.wait(5)
+        followers = [threading.Thread(target=call) for _ in range(2)]
+        for follower in followers:
+            follower.start()
+        while options.single_flight.shared < 2:
+            time.sleep(0.001)
+        release.set()
+        for thread in [leader, *followers]:
+            thread.join(5)
+
+        assert results == ["shared"] * 3
+        mock_completion.assert_called_once()
+
+    @patch("api_test_gen.llm.completion")
+    def test_error_reaches_waiting_callers(self, mock_completion):
+        started, release = threading.Event(), threading.Event()
+
+        def failing_completion(**kwargs):
+            started.set()
+            release.wait(5)
+            raise RuntimeError("outage")
+
+        mock_completion.side_effect = failing_completion
+        options = LlmOptions()
+        errors = []
+
+        def call():
+            try:
+                LlmClient(model="gpt-4o", num_retries=0, options=options).call("s", "u")
+            except LlmError as error:
+                errors.append(error)
+
+        leader = threading.Thread(target=call)
+        leader.start()
+        started.wait(5)
+        follower = threading.Thread(target=call)
+        follower.start()
+        while not options.single_flight.shared:
+            time.sleep(0.001)
+        release.set()
+        leader.join(5)
+        follower.join(5)
+
+        assert len(errors) == 2
+        assert all("outage" in str(error) for error in errors)
+        mock_completion.assert_called_once()
+
+    @patch("api_test_gen.llm.completion")
+    def test_finished_requests_are_not_shared(self, mock_completion):
+        mock_completion.return_value = _mock_response("ok")
+        options = LlmOptions()
+        client = LlmClient(model="gpt-4o", options=options)
+
+        client.call("s", "u")
+        client.call("s", "u")
+
+        assert mock_completion.call_count == 2
+        assert options.single_flight.shared == 0
+
+    @patch("api_test_gen.llm.acompletion")
+    def test_concurrent_identical_acalls_share_one_request(self, mock_acompletion):
+        async def slow_acompletion(**kwargs):
+            await asyncio.sleep(0.01)
+            return _mock_response("shared")
+
+        mock_acompletion.side_effect = slow_acompletion
+        options = LlmOptions()
+        client = LlmClient(model="gpt-4o", options=options)
+
+        async def scenario():
+            try:
+                return await asyncio.gather(
+                    client.acall("s", "u"),
+                    client.acall("s", "u"),
+                    client.acall("s", "v"),
+                )
+            finally:
+                await client.aclose()
+
+        assert asyncio.run(scenario()) == ["shared"] * 3
+        assert mock_acompletion.call_count == 2
+        assert options.single_flight.shared == 1
+
+    @patch("api_test_gen.llm.acompletion")
+    def test_cancelled_follower_does_not_cancel_the_flight(self, mock_acompletion):
+        async def slow_acompletion(**kwargs):
+            await asyncio.sleep(0.05)
+            return _mock_response("shared")
+
+        mock_acompletion.side_effect = slow_acompletion
+        options = LlmOptions()
+        client = LlmClient(model="gpt-4o", options=options)
+
+        async def scenario():
+            try:
+                leader = asyncio.create_task(client.acall("s", "u"))
+                await asyncio.sleep(0)
+                impatient = asyncio.wait_for(client.acall("s", "u"), timeout=0.001)
+                follower = client.acall("s", "u")
+                return await asyncio.gather(
+                    leader, impatient, follower, return_exceptions=True
+                )
+            finally:
+                await client.aclose()
+
+        leader, impatient, follower = asyncio.run(scenario())
+
+        assert isinstance(impatient, TimeoutError)
+        assert (leader, follower) == ("shared", "shared")
+        mock_acompletion.assert_called_once()
+
+    @patch("api_test_gen.llm.acompletion")
+    def test_cancelled_leader_hands_the_request_to_a_follower(self, mock_acompletion):
+        async def slow_acompletion(**kwargs):
+            await asyncio.sleep(0.05)
+            return _mock_response("shared")
+
+        mock_acompletion.side_effect = slow_acompletion
+        options = LlmOptions()
+        client = LlmClient(model="gpt-4o", options=options)
+
+        async def scenario():
+            try:
+                leader = asyncio.create_task(
+                    asyncio.wait_for(client.acall("s", "u"), timeout=0.01)
+                )
+                await asyncio.sleep(0)
+                follower = asyncio.create_task(client.acall("s", "u"))
+                return await asyncio.gather(leader, follower, return_exceptions=True)
+            finally:
+                await client.aclose()
+
+        leader, follower = asyncio.run(scenario())
+
+        assert isinstance(leader, TimeoutError)
+        assert follower == "shared"
+        assert options.single_flight.shared == 1
+        assert mock_acompletion.call_count == 2
@@ -0,0 +1,54 @@
+from api_test_gen.generator.manifest import (
+    GenerationManifest,
+    endpoint_fingerprint,
+    endpoint_key,
+    load_manifest,
+)
+from api_test_gen.parser.base import ApiEndpoint
+
+
+def _endpoint(summary: str = "List pets") -> ApiEndpoint:
+    return ApiEndpoint(method="GET", path="/pets", summary=summary, tags=["pets"])
+
+
+def test_endpoint_key_uses_method_and_path():
+    assert endpoint_key(_endpoint()) == "GET /pets"
+
+
+def test_fingerprint_is_stable_for_unchanged_inputs():
+    first = endpoint_fingerprint(_endpoint(), "quick", "model-a", "flat")
+    second = endpoint_fingerprint(_endpoint(), "quick", "model-a", "flat")
+
+    assert first == second
+
+
+def test_fingerprint_changes_with_endpoint_and_settings():
+    baseline = endpoint_fingerprint(_endpoint(), "quick", "model-a", "flat")
+
+    assert endpoint_fingerprint(_endpoint("Changed"), "quick", "model-a", "flat") != (
+        baseline
+    )
+    assert endpoint_fingerprint(_endpoint(), "full", "model-a", "flat") != baseline
+    assert endpoint_fingerprint(_endpoint(), "quick", "model-b", "flat") != baseline
+    assert endpoint_fingerprint(_endpoint(), "quick", "model-a", "layered") != (
+        baseline
+    )
+
+
+def test_manifest_round_trips_through_json(tmp_path):
+    path = tmp_path / "testcases.manifest.json"
+    manifest = GenerationManifest(endpoints={"GET /pets": "abc"}, groups={"pets": "d"})
+    path.write_text(manifest.to_json(), encoding="utf-8")
+
+    assert load_manifest(path) == manifest
+
+
+def test_load_manifest_ignores_missing_or_incompatible_files(tmp_path):
+    path = tmp_path / "testcases.manifest.json"
+    assert load_manifest(path) is None
+
+    path.write_text("{not json", encoding="utf-8")
+    assert load_manifest(path) is None
+
+    path.write_text('{"version": 999, "endpoints": {}}', encoding="utf-8")
+    assert load_manifest(path) is None
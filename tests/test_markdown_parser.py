@@ -1,8 +1,14 @@
-from pathlib import Path
-from unittest.mock import patch, MagicMock
 import json
-from api_test_gen.parser.markdown import parse_markdown
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from api_test_gen.cache import ResponseCache
+from api_test_gen.llm import LlmOptions
 from api_test_gen.parser.base import ApiEndpoint
+from api_test_gen.parser.markdown import parse_markdown
 
 FIXTURES = Path(__file__).parent / "fixtures"
 
@@ -63,3 +69,20 @@ class TestMarkdownParser:
         post_ep = [e for e in endpoints if e.method == "POST"][0]
         assert post_ep.path == "/api/users"
         assert post_ep.request_body is not None
+
+    @patch("api_test_gen.llm.completion")
+    def test_invalid_response_is_not_replayed_from_cache(
+        self, mock_completion, tmp_path
+    ):
+        responses = iter(["not json", MOCK_LLM_RESPONSE])
+        mock_completion.side_effect = lambda **request: SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=next(responses)))]
+        )
+        options = LlmOptions(cache=ResponseCache(tmp_path / "cache"))
+
+        with pytest.raises(json.JSONDecodeError):
+            parse_markdown(FIXTURES / "sample-api.md", llm_options=options)
+        endpoints = parse_markdown(FIXTURES / "sample-api.md", llm_options=options)
+
+        assert len(endpoints) == 2
+        assert mock_completion.call_count == 2
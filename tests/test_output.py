@@ -1,7 +1,10 @@
+import os
+
 import pytest
 
 from api_test_gen.output import (
     OutputPathConflictError,
+    StreamingTextWriter,
     UnsafeOutputPathError,
     write_generated_files,
     write_text,
@@ -18,6 +21,51 @@ class TestWriteText:
         assert output.read_text(encoding="utf-8") == "existing\nnew"
 
 
+class TestStreamingTextWriter:
+    def test_chunks_are_visible_before_finalize(self, tmp_path):
+        output = tmp_path / "cases.md"
+        output.write_text("old", encoding="utf-8")
+
+        with StreamingTextWriter(output) as writer:
+            writer.write("first")
+            assert writer.partial_path.read_text(encoding="utf-8") == "first"
+            assert output.read_text(encoding="utf-8") == "old"
+            writer.write("\n\nsecond")
+
+        assert output.read_text(encoding="utf-8") == "first\n\nsecond"
+        assert not writer.partial_path.exists()
+
+    def test_append_matches_write_text(self, tmp_path):
+        output = tmp_path / "cases.md"
+        output.write_text("existing", encoding="utf-8")
+
+        with StreamingTextWriter(output, append=True) as writer:
+            writer.write("new")
+
+        assert output.read_text(encoding="utf-8") == "existing\nnew"
+
+    def test_failure_keeps_previous_file(self, tmp_path):
+        output = tmp_path / "cases.md"
+        output.write_text("old", encoding="utf-8")
+
+        with pytest.raises(RuntimeError), StreamingTextWriter(output) as writer:
+            writer.write("partial")
+            raise RuntimeError("boom")
+
+        assert output.read_text(encoding="utf-8") == "old"
+        assert not writer.partial_path.exists()
+
+    def test_replaced_file_keeps_its_mode(self, tmp_path):
+        output = tmp_path / "cases.md"
+        output.write_text("old", encoding="utf-8")
+        output.chmod(0o664)
+
+        with StreamingTextWriter(output) as writer:
+            writer.write("new")
+
+        assert output.stat().st_mode & 0o777 == 0o664
+
+
 class TestWriteGeneratedFiles:
     def test_writes_nested_files(self, tmp_path):
         result = write_generated_files(
@@ -43,6 +91,36 @@ class TestWriteGeneratedFiles:
         assert len(result.skipped) == 1
         assert len(result.created) == 1
 
+    def test_identical_files_are_not_rewritten(self, tmp_path):
+        output = tmp_path / "output"
+        files = {"test_users.py": "users", "test_pets.py": "pets"}
+        write_generated_files(output, files)
+        unchanged = output / "test_users.py"
+        os.utime(unchanged, ns=(0, 0))
+        before = unchanged.stat()
+
+        result = write_generated_files(
+            output, {**files, "test_pets.py": "new pets", "test_store.py": "store"}
+        )
+
+        assert result.unchanged == (unchanged.resolve(),)
+        assert result.updated == ((output / "test_pets.py").resolve(),)
+        assert result.created == ((output / "test_store.py").resolve(),)
+        assert len(result.written) == 2
+        after = unchanged.stat()
+        assert (after.st_mtime_ns, after.st_ino) == (before.st_mtime_ns, before.st_ino)
+
+    def test_updates_replace_files_and_keep_their_mode(self, tmp_path):
+        output = tmp_path / "output"
+        write_generated_files(output, {"run.sh": "old"})
+        (output / "run.sh").chmod(0o755)
+
+        write_generated_files(output, {"run.sh": "new"})
+
+        assert (output / "run.sh").read_text(encoding="utf-8") == "new"
+        assert (output / "run.sh").stat().st_mode & 0o777 == 0o755
+        assert sorted(path.name for path in output.iterdir()) == ["run.sh"]
+
     @pytest.mark.parametrize("path", ["../escape.py", "/tmp/escape.py", ""])
     def test_rejects_unsafe_paths_before_writing(self, tmp_path, path):
         output = tmp_path / "output"
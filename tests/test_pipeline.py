@@ -2,20 +2,24 @@ from unittest.mock import MagicMock, patch
 
 import pytest
 
+from api_test_gen.generator.manifest import GenerationManifest
 from api_test_gen.parser.base import ApiEndpoint
 from api_test_gen.pipeline import (
     DocumentParseError,
     generate_code,
     generate_testcases,
+    generate_testcases_incremental,
     parse_document,
+    plan_incremental,
+    reusable_code_files,
 )
 
 
-def _endpoint() -> ApiEndpoint:
+def _endpoint(method: str = "GET", summary: str = "List pets") -> ApiEndpoint:
     return ApiEndpoint(
-        method="GET",
+        method=method,
         path="/pets",
-        summary="List pets",
+        summary=summary,
         parameters=[],
         request_body=None,
         responses={},
@@ -33,7 +37,7 @@ def test_parse_document_forwards_model_to_markdown(mock_parse, tmp_path):
     endpoints = parse_document(doc, fmt="markdown", model="custom-model")
 
     assert endpoints == [_endpoint()]
-    mock_parse.assert_called_once_with(doc, model="custom-model")
+    mock_parse.assert_called_once_with(doc, model="custom-model", llm_options=None)
 
 
 @patch("api_test_gen.pipeline.CodeGenerator")
@@ -45,7 +49,9 @@ def test_generate_code_selects_flat_generator(MockGenerator):
     files = generate_code("## GET /pets", arch="flat", model="test-model")
 
     assert files == {"test_pets.py": "# test"}
-    MockGenerator.assert_called_once_with(model="test-model")
+    MockGenerator.assert_called_once_with(
+        model="test-model", llm_options=None, jobs=1, validation_cache=None
+    )
 
 
 @patch("api_test_gen.pipeline.TestCaseGenerator")
@@ -55,13 +61,15 @@ def test_generate_testcases_forwards_start_index(MockGenerator):
     MockGenerator.return_value = generator
 
     result = generate_testcases(
-        [_endpoint()], depth="full", model="test-model", start_index=8
+        [_endpoint()], depth="full", model="test-model", start_index=8, jobs=4
     )
 
     assert result == "## GET /pets"
-    MockGenerator.assert_called_once_with(model="test-model")
+    MockGenerator.assert_called_once_with(
+        model="test-model", jobs=4, llm_options=None, batch_tokens=None
+    )
     generator.generate.assert_called_once_with(
-        [_endpoint()], depth="full", start_index=8
+        [_endpoint()], depth="full", start_index=8, journal=None
     )
 
 
@@ -76,3 +84,78 @@ def test_parse_document_wraps_parser_errors(tmp_path):
 
     with pytest.raises(DocumentParseError, match="Failed to parse"):
         parse_document(document, fmt="swagger")
+
+
+def _section(method: str, first_case: int) -> str:
+    return (
+        f"## {method} /pets\n\n> pets\n\n"
+        "| 编号 | 场景 | 输入 | 预期状态码 | 预期响应 | 优先级 |\n"
+        "|------|------|------|-----------|---------|--------|\n"
+        f"| TC-{first_case:03d} | ok | 无 | 200 | ok | P0 |"
+    )
+
+
+def _previous_run(endpoints):
+    plan = plan_incremental(endpoints, None, None)
+    return GenerationManifest(endpoints=dict(plan.manifest.endpoints))
+
+
+def test_plan_incremental_reuses_only_unchanged_endpoints():
+    previous = [_endpoint("GET"), _endpoint("POST")]
+    manifest = _previous_run(previous)
+    current = [_endpoint("GET"), _endpoint("POST", summary="Create a pet")]
+    markdown = f"{_section('GET', 1)}\n\n{_section('POST', 2)}"
+
+    plan = plan_incremental(current, markdown, manifest)
+
+    assert list(plan.reused_sections) == ["GET /pets"]
+    assert plan.is_reused(current[0])
+    assert not plan.is_reused(current[1])
+
+
+def test_plan_incremental_without_previous_run_reuses_nothing():
+    plan = plan_incremental([_endpoint()], None, None)
+
+    assert plan.reused_sections == {}
+    assert set(plan.manifest.endpoints) == {"GET /pets"}
+
+
+@patch("api_test_gen.pipeline.TestCaseGenerator")
+def test_incremental_generation_splices_reused_sections(MockGenerator):
+    generator = MagicMock()
+    generator.generate.return_value = _section("POST", 8)
+    MockGenerator.return_value = generator
+    endpoints = [_endpoint("GET"), _endpoint("POST")]
+    reused = _section("GET", 7)
+    plan = plan_incremental(endpoints, reused, _previous_run(endpoints))
+
+    result = generate_testcases_incremental(endpoints, plan)
+
+    assert result == f"{reused}\n\n{_section('POST', 8)}"
+    generator.generate.assert_called_once_with(
+        [endpoints[1]], depth="quick", start_index=8, journal=None
+    )
+
+
+@patch("api_test_gen.pipeline.TestCaseGenerator")
+def test_incremental_generation_skips_llm_when_nothing_changed(MockGenerator):
+    endpoints = [_endpoint("GET")]
+    markdown = _section("GET", 1)
+    plan = plan_incremental(endpoints, markdown, _previous_run(endpoints))
+
+    assert generate_testcases_incremental(endpoints, plan) == markdown
+    MockGenerator.assert_not_called()
+
+
+def test_reusable_code_files_reads_files_of_reused_sections(tmp_path):
+    endpoints = [_endpoint("GET"), _endpoint("POST")]
+    markdown = f"{_section('GET', 1)}\n\n{_section('POST', 2)}"
+    manifest = _previous_run(endpoints)
+    manifest.endpoints["POST /pets"] = "stale"
+    plan = plan_incremental(endpoints, markdown, manifest)
+    (tmp_path / "test_get_pets.py").write_text("# old get", encoding="utf-8")
+    (tmp_path / "test_post_pets.py").write_text("# old post", encoding="utf-8")
+
+    files = reusable_code_files(tmp_path, markdown, endpoints, plan)
+
+    assert files == {"test_get_pets.py": "# old get"}
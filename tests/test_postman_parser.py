@@ -2,6 +2,10 @@ from pathlib import Path
 
 import json
 
+import pytest
+import yaml
+
+from api_test_gen.parser import document as document_module
 from api_test_gen.parser.postman import parse_postman
 from api_test_gen.parser.detect import detect_format
 
@@ -145,3 +149,22 @@ class TestNestedPostmanParser:
             graphql.request_body["properties"]["variables"]["properties"]["id"]["type"]
             == "integer"
         )
+
+
+class TestPostmanLoaders:
+    @pytest.mark.parametrize(
+        "loader",
+        [name for name in ("SafeLoader", "CSafeLoader") if hasattr(yaml, name)],
+    )
+    @pytest.mark.parametrize("fixture", ["sample.postman.json", "nested.postman.json"])
+    def test_json_fast_path_matches_yaml_loaders(self, fixture, loader, monkeypatch):
+        path = FIXTURES / fixture
+        fast = parse_postman(path)
+        text = path.read_text(encoding="utf-8")
+        monkeypatch.setattr(
+            document_module,
+            "load_structured",
+            lambda _: yaml.load(text, getattr(yaml, loader)),
+        )
+
+        assert parse_postman(path) == fast
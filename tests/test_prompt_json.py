@@ -0,0 +1,170 @@
+import json
+
+from api_test_gen.generator.prompt_json import (
+    MAX_DESCRIPTION_CHARS,
+    endpoint_json,
+    endpoints_json,
+)
+from api_test_gen.parser.base import ApiEndpoint, Param
+from api_test_gen.ratelimit import estimate_tokens
+
+USER = {
+    "type": "object",
+    "required": ["name"],
+    "properties": {
+        "id": {"type": "integer", "example": 7},
+        "name": {"type": "string", "description": "Display name"},
+        "tags": {"type": "array", "items": {"type": "string"}},
+    },
+}
+
+
+def _user_endpoint(path="/users", **fields):
+    return ApiEndpoint(
+        method="POST",
+        path=path,
+        request_body=USER,
+        responses={"201": {"description": "Created", "schema": USER}},
+        **fields,
+    )
+
+
+class TestEndpointJson:
+    def test_drops_empty_defaults_and_indentation(self):
+        endpoint = ApiEndpoint(
+            method="GET",
+            path="/items",
+            parameters=[Param(name="page", location="query", example=0)],
+        )
+
+        text = endpoint_json(endpoint)
+
+        assert "\n" not in text and ": " not in text
+        assert json.loads(text) == {
+            "method": "GET",
+            "path": "/items",
+            "parameters": [
+                {
+                    "name": "page",
+                    "location": "query",
+                    "param_type": "string",
+                    "example": 0,
+                }
+            ],
+        }
+
+    def test_keeps_false_values_that_are_not_defaults(self):
+        endpoint = ApiEndpoint(
+            method="PATCH",
+            path="/flags",
+            parameters=[
+                Param(
+                    name="enabled",
+                    location="query",
+                    param_type="boolean",
+                    example=False,
+                )
+            ],
+            request_body={"type": "object", "nullable": False, "default": False},
+            auth_required=True,
+        )
+
+        data = json.loads(endpoint_json(endpoint))
+
+        assert data["parameters"][0]["example"] is False
+        assert "required" not in data["parameters"][0]
+        assert data["request_body"] == {
+            "type": "object",
+            "nullable": False,
+            "default": False,
+        }
+        assert data["auth_required"] is True and "request_body_required" not in data
+
+    def test_keeps_other_content_types(self):
+        endpoint = ApiEndpoint(
+            method="POST", path="/upload", content_types=["multipart/form-data"]
+        )
+
+        assert json.loads(endpoint_json(endpoint))["content_types"] == [
+            "multipart/form-data"
+        ]
+
+    def test_repeated_schema_is_defined_once(self):
+        data = json.loads(endpoint_json(_user_endpoint()))
+
+        assert data["request_body"] == {"$ref": "#/$defs/S1"}
+        assert data["responses"]["201"]["schema"] == {"$ref": "#/$defs/S1"}
+        assert data["$defs"] == {"S1": USER}
+
+    def test_property_maps_are_not_shared(self):
+        properties = {
+            "street": {"type": "string", "maxLength": 120},
+            "city": {"type": "string", "maxLength": 80},
+        }
+        endpoint = ApiEndpoint(
+            method="POST",
+            path="/addresses",
+            request_body={"type": "object", "properties": properties},
+            responses={"200": {"schema": {"properties": properties}}},
+        )
+
+        data = json.loads(endpoint_json(endpoint))
+
+        assert data["request_body"]["properties"] == properties
+        assert "$defs" not in data
+
+    def test_truncates_long_descriptions(self):
+        endpoint = ApiEndpoint(method="GET", path="/", description="x" * 1000)
+
+        description = json.loads(endpoint_json(endpoint))["description"]
+
+        assert len(description) == MAX_DESCRIPTION_CHARS
+        assert description.endswith("…")
+
+    def test_budget_drops_examples_and_descriptions_first(self):
+        endpoint = _user_endpoint(description="Creates a user. " * 10)
+        full = estimate_tokens(endpoint_json(endpoint))
+
+        text = endpoint_json(endpoint, token_budget=full - 10)
+
+        assert estimate_tokens(text) <= full - 10
+        assert "example" not in text
+        assert json.loads(text)["$defs"]["S1"]["properties"]["tags"]["items"] == {
+            "type": "string"
+        }
+
+    def test_budget_collapses_nested_schemas_last(self):
+        text = endpoint_json(_user_endpoint(), token_budget=60)
+
+        assert json.loads(text)["path"] == "/users"
+        assert "description" not in text
+        assert '"tags":{"type":"array"}' in text and "items" not in text
+
+
+class TestEndpointsJson:
+    def test_schemas_are_shared_across_endpoints(self):
+        text = endpoints_json([_user_endpoint("/a"), _user_endpoint("/b")])
+
+        data = json.loads(text)
+        assert [endpoint["path"] for endpoint in data["endpoints"]] == ["/a", "/b"]
+        assert list(data["$defs"]) == ["S1"]
+        assert text.count('"required":["name"]') == 1
+
+    def test_nested_shared_schema_is_defined_inside_its_parent(self):
+        team = {
+            "type": "object",
+            "properties": {"lead": USER, "members": {"type": "array", "items": USER}},
+        }
+        endpoints = [
+            ApiEndpoint(
+                method="GET", path="/teams/1", responses={"200": {"schema": team}}
+            ),
+            ApiEndpoint(
+                method="GET", path="/teams/2", responses={"200": {"schema": team}}
+            ),
+        ]
+
+        data = json.loads(endpoints_json(endpoints))
+
+        assert data["$defs"]["S1"]["properties"]["lead"] == {"$ref": "#/$defs/S2"}
+        assert data["$defs"]["S2"] == USER
@@ -0,0 +1,201 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from api_test_gen.ratelimit import (
+    FATAL,
+    RETRYABLE,
+    THROTTLED,
+    ModelLimiter,
+    RateLimiter,
+    RateLimits,
+    classify_error,
+)
+
+
+class _StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+
+
+class _FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def _limiter(clock=None, **limits):
+    clock = clock or _FakeClock()
+    return ModelLimiter(RateLimits(**limits), clock=clock, sleep=clock.sleep)
+
+
+def _throttle(limiter):
+    with pytest.raises(_StatusError), limiter.slot(1):
+        raise _StatusError(429)
+
+
+class TestClassifyError:
+    @pytest.mark.parametrize(
+        ("error", "expected"),
+        [
+            (_StatusError(429), THROTTLED),
+            (_StatusError(408), THROTTLED),
+            (TimeoutError(), THROTTLED),
+            (_StatusError(503), RETRYABLE),
+            (ConnectionResetError(), RETRYABLE),
+            (_StatusError(400), FATAL),
+            (RuntimeError("boom"), FATAL),
+        ],
+    )
+    def test_classification(self, error, expected):
+        assert classify_error(error) == expected
+
+
+class TestTokenBuckets:
+    def test_requests_per_minute_paces_bursts(self):
+        clock = _FakeClock()
+        limiter = _limiter(clock, requests_per_minute=60)
+
+        for _ in range(62):
+            with limiter.slot(1):
+                pass
+
+        # 60 requests fit the initial budget; the next two wait 1s each.
+        assert clock.sleeps == [pytest.approx(1.0), pytest.approx(1.0)]
+        assert limiter.stats.waited_seconds == pytest.approx(2.0)
+
+    def test_tokens_per_minute_waits_for_large_prompts(self):
+        clock = _FakeClock()
+        limiter = _limiter(clock, tokens_per_minute=600)
+
+        with limiter.slot(500):
+            pass
+        with limiter.slot(400):
+            pass
+
+        # 300 tokens short at 10 tokens per second.
+        assert clock.sleeps == [pytest.approx(30.0)]
+
+    def test_reported_usage_corrects_the_estimate(self):
+        clock = _FakeClock()
+        limiter = _limiter(clock, tokens_per_minute=600)
+
+        with limiter.slot(100) as slot:
+            slot.record_usage(SimpleNamespace(usage=SimpleNamespace(total_tokens=600)))
+        with limiter.slot(60):
+            pass
+
+        assert clock.sleeps == [pytest.approx(6.0)]
+
+
+class TestUsage:
+    def test_prompt_cache_hits_are_counted(self):
+        limiter = _limiter()
+        usage = SimpleNamespace(
+            total_tokens=1200,
+            prompt_tokens=1000,
+            prompt_tokens_details=SimpleNamespace(cached_tokens=800),
+        )
+
+        with limiter.slot(1000) as slot:
+            slot.record_usage(SimpleNamespace(usage=usage))
+
+        assert limiter.stats.prompt_tokens == 1000
+        assert limiter.stats.cached_prompt_tokens == 800
+
+    def test_anthropic_cache_read_tokens_are_counted(self):
+        limiter = _limiter()
+        usage = SimpleNamespace(
+            total_tokens=1200,
+            prompt_tokens=1000,
+            prompt_tokens_details=None,
+            cache_read_input_tokens=600,
+        )
+
+        with limiter.slot(1000) as slot:
+            slot.record_usage(SimpleNamespace(usage=usage))
+
+        assert limiter.stats.cached_prompt_tokens == 600
+
+
+class TestAdaptiveConcurrency:
+    def test_unbounded_without_limits(self):
+        assert _limiter().concurrency_limit is None
+
+    def test_throttle_halves_and_success_ramps_up(self):
+        limiter = _limiter(max_concurrency=8)
+
+        _throttle(limiter)
+        assert limiter.concurrency_limit == 1
+
+        for _ in range(20):
+            with limiter.slot(1):
+                pass
+        assert 1 < limiter.concurrency_limit <= 8
+
+    def test_concurrent_throttles_count_once(self):
+        limiter = _limiter(max_concurrency=8)
+        slots = [limiter.slot(1) for _ in range(4)]
+        for slot in slots:
+            slot.__enter__()
+
+        for slot in slots:
+            slot.__exit__(_StatusError, _StatusError(429), None)
+
+        assert limiter.concurrency_limit == 2
+        assert limiter.stats.throttled == 4
+
+    def test_limit_blocks_threads_until_a_slot_frees(self):
+        limiter = _limiter(max_concurrency=1)
+        entered = threading.Event()
+
+        def second_request():
+            with limiter.slot(1):
+                entered.set()
+
+        with limiter.slot(1):
+            worker = threading.Thread(target=second_request)
+            worker.start()
+            assert not entered.wait(0.1)
+        worker.join(timeout=5)
+        assert entered.is_set()
+
+    def test_async_slots_respect_the_limit(self):
+        limiter = _limiter(max_concurrency=2)
+        active = peak = 0
+
+        async def request():
+            nonlocal active, peak
+            async with limiter.slot(1):
+                active += 1
+                peak = max(peak, active)
+                await asyncio.sleep(0.01)
+                active -= 1
+
+        async def scenario():
+            await asyncio.gather(*(request() for _ in range(6)))
+
+        asyncio.run(scenario())
+
+        assert peak == 2
+        assert limiter.stats.requests == 6
+
+
+class TestRateLimiter:
+    def test_limiters_are_per_model(self):
+        limiter = RateLimiter(RateLimits(max_concurrency=4))
+
+        first = limiter.for_model("gpt-4o")
+        assert limiter.for_model("gpt-4o") is first
+        assert limiter.for_model("claude") is not first
+        assert list(limiter.models()) == ["gpt-4o", "claude"]
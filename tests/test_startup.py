@@ -0,0 +1,51 @@
+"""Startup budget for commands that never call an LLM."""
+
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+FIXTURES = Path(__file__).parent / "fixtures"
+STARTUP_BUDGET_SECONDS = 2.0
+RUNS = 3
+
+PARSE_SCRIPT = """
+import sys
+from api_test_gen.cli import main
+
+main(["parse", sys.argv[1]], standalone_mode=False)
+assert "litellm" not in sys.modules, "parse imported litellm"
+"""
+
+
+def _run_parse() -> tuple[float, subprocess.CompletedProcess[str]]:
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", PARSE_SCRIPT, str(FIXTURES / "petstore.yaml")],
+        capture_output=True,
+        check=False,
+        text=True,
+        timeout=60,
+    )
+    return time.perf_counter() - start, result
+
+
+def test_parse_does_not_import_litellm():
+    _, result = _run_parse()
+
+    assert result.returncode == 0, result.stderr
+    endpoints = json.loads(result.stdout)
+    assert [endpoint["path"] for endpoint in endpoints] == [
+        "/pets",
+        "/pets",
+        "/pets/{petId}",
+    ]
+
+
+def test_parse_stays_within_startup_budget():
+    best = min(_run_parse()[0] for _ in range(RUNS))
+
+    assert best < STARTUP_BUDGET_SECONDS, (
+        f"parse took {best:.2f}s, budget is {STARTUP_BUDGET_SECONDS}s"
+    )
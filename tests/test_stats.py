@@ -0,0 +1,159 @@
+import json
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+from click.testing import CliRunner
+
+from api_test_gen.cache import ResponseCache
+from api_test_gen.cli import main
+from api_test_gen.generator.common import validate_and_repair
+from api_test_gen.llm import LlmClient, LlmOptions
+from api_test_gen.stats import span, traced_iterator, tracing
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def _response(text, prompt_tokens=0, completion_tokens=0, cost=None):
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=text))],
+        usage=SimpleNamespace(
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            total_tokens=prompt_tokens + completion_tokens,
+        ),
+        _hidden_params={"response_cost": cost},
+    )
+
+
+class TestTracer:
+    def test_span_is_a_no_op_without_tracer(self):
+        with span("stage", size=1) as stage:
+            stage.set(more=2)
+
+        assert not stage.recording
+
+    def test_stages_aggregate_by_name(self):
+        with tracing() as tracer:
+            for _ in range(3):
+                with span("validate"):
+                    pass
+            with span("repair"):
+                pass
+
+        stages = tracer.stages()
+        assert list(stages) == ["validate", "repair"]
+        assert stages["validate"].count == 3
+        assert stages["validate"].total_seconds >= stages["validate"].max_seconds
+
+    def test_failed_span_records_error(self):
+        with tracing() as tracer, pytest.raises(ValueError), span("parse"):
+            raise ValueError("bad")
+
+        assert tracer.records[0].attributes == {"error": "ValueError"}
+
+    def test_disabled_tracing_records_nothing(self):
+        with tracing(enabled=False) as tracer:
+            assert tracer is None
+            assert not span("stage").recording
+
+    def test_traced_iterator_spans_whole_iteration(self):
+        with tracing() as tracer:
+            assert list(traced_iterator("cases", iter("ab"), endpoints=2)) == ["a", "b"]
+
+        assert [record.name for record in tracer.records] == ["cases"]
+        assert tracer.records[0].attributes == {"endpoints": 2}
+
+    def test_models_total_tokens_and_cost(self):
+        with tracing() as tracer:
+            with span("llm", model="m", prompt_tokens=10, completion_tokens=5) as call:
+                call.set(cost=0.5)
+            with span("llm", model="m", cached=True):
+                pass
+            with span("llm", model="other", prompt_tokens=1, completion_tokens=1):
+                pass
+
+        models = tracer.models()
+        assert models["m"].calls == 2
+        assert models["m"].cached == 1
+        assert (models["m"].prompt_tokens, models["m"].completion_tokens) == (10, 5)
+        assert models["m"].cost == 0.5
+        assert models["other"].priced_calls == 0
+        report = tracer.report()
+        assert "0.5000" in report
+        assert report.splitlines()[-1].split()[-1] == "-"
+
+    def test_write_trace_emits_chrome_events(self, tmp_path):
+        with tracing() as tracer, span("generate_code", arch="flat"):
+            pass
+        path = tmp_path / "out" / "trace.json"
+
+        tracer.write_trace(path)
+
+        events = json.loads(path.read_text(encoding="utf-8"))["traceEvents"]
+        assert events[0]["name"] == "generate_code"
+        assert events[0]["ph"] == "X"
+        assert events[0]["args"] == {"arch": "flat"}
+
+
+class TestInstrumentation:
+    @patch("api_test_gen.llm.completion")
+    def test_llm_call_records_usage_and_cost(self, mock_completion, tmp_path):
+        mock_completion.return_value = _response("ok", 100, 20, cost=0.01)
+        client = LlmClient(model="m", options=LlmOptions(cache=ResponseCache(tmp_path)))
+
+        with tracing() as tracer:
+            client.call(system="sys", user="usr")
+            client.call(system="sys", user="usr")
+
+        first, second = tracer.records
+        assert first.attributes == {
+            "model": "m",
+            "prompt_tokens": 100,
+            "completion_tokens": 20,
+            "retries": 0,
+            "cost": 0.01,
+        }
+        assert second.attributes == {"model": "m", "cached": True}
+
+    @patch("api_test_gen.llm.model_prices", return_value=(1e-6, 2e-6))
+    @patch("api_test_gen.llm.completion")
+    def test_cost_falls_back_to_list_prices(self, mock_completion, _prices):
+        mock_completion.return_value = _response("ok", 1000, 500)
+
+        with tracing() as tracer:
+            LlmClient(model="m").call(system="sys", user="usr")
+
+        assert tracer.records[0].attributes["cost"] == pytest.approx(0.002)
+
+    @patch("api_test_gen.generator.common.validate_files")
+    def test_repair_rounds_are_spans(self, mock_validate):
+        mock_validate.side_effect = [{"a.py": "broken"}, {}]
+
+        with tracing() as tracer:
+            validate_and_repair({"a.py": "x = ("}, lambda path, content, error: "x = 1")
+
+        assert tracer.stages()["repair_round"].count == 1
+        assert "validate_python" in tracer.stages()
+
+    def test_cli_stats_and_trace(self, tmp_path):
+        trace = tmp_path / "trace.json"
+
+        result = CliRunner().invoke(
+            main,
+            [
+                "parse",
+                str(FIXTURES / "petstore.yaml"),
+                "-o",
+                str(tmp_path / "endpoints.json"),
+                "--stats",
+                "--trace",
+                str(trace),
+            ],
+        )
+
+        assert result.exit_code == 0, result.output
+        assert "parse_document" in result.output
+        events = json.loads(trace.read_text(encoding="utf-8"))["traceEvents"]
+        assert events[0]["args"] == {"format": "swagger"}
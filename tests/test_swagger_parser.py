@@ -1,11 +1,37 @@
+import json
 from pathlib import Path
 
 import pytest
+import yaml
 
-from api_test_gen.parser.detect import detect_format
+from api_test_gen.parser import document as document_module
+from api_test_gen.parser.detect import detect_format, sniff_format
+from api_test_gen.parser.document import LoadedDocument, load_structured
 from api_test_gen.parser.swagger import parse_openapi
 
 FIXTURES = Path(__file__).parent / "fixtures"
+YAML_FIXTURES = ("petstore.yaml", "openapi-complex.yaml", "swagger2.yaml")
+
+
+@pytest.fixture(
+    autouse=True,
+    params=[
+        pytest.param("SafeLoader", id="pure-yaml"),
+        pytest.param(
+            "CSafeLoader",
+            id="libyaml",
+            marks=pytest.mark.skipif(
+                not hasattr(yaml, "CSafeLoader"),
+                reason="PyYAML built without LibYAML",
+            ),
+        ),
+    ],
+)
+def yaml_loader(request, monkeypatch):
+    """Run every parser test against each available YAML loader."""
+    loader = getattr(yaml, request.param)
+    monkeypatch.setattr(document_module, "YamlLoader", loader)
+    return loader
 
 
 class TestDetectFormat:
@@ -20,6 +46,42 @@ class TestDetectFormat:
     def test_detect_swagger_2(self):
         assert detect_format(FIXTURES / "swagger2.yaml") == "swagger"
 
+    def test_sniffs_spec_markers_from_document_head(self):
+        assert sniff_format('{\n  "openapi": "3.0.0", "info": {}}') == "swagger"
+        assert sniff_format('{"info": {"_postman_id": "abc"}, "item": []}') == (
+            "postman"
+        )
+        assert sniff_format("# Generated\n---\nswagger: '2.0'\n") == "swagger"
+
+    def test_sniffing_leaves_ambiguous_heads_undecided(self):
+        assert sniff_format("# API Docs\n\nSee the openapi: section.\n") is None
+        assert sniff_format('{"info": {"title": "x"}}') is None
+
+    def test_markdown_with_key_lines_is_not_swagger(self):
+        path = FIXTURES / "front-matter.md"
+
+        assert sniff_format(path.read_text()) is None
+        assert detect_format(path) == "markdown"
+
+    def test_detected_document_is_parsed_only_once(self, monkeypatch):
+        calls = []
+        original = document_module.load_structured
+
+        def counting_load(text):
+            calls.append(text)
+            return original(text)
+
+        monkeypatch.setattr(document_module, "load_structured", counting_load)
+        document = LoadedDocument(
+            FIXTURES / "inline.yaml",
+            "info: {title: Late marker}\n" + "# padding\n" * 600 + "openapi: 3.0.0\n"
+            "paths: {}\n",
+        )
+
+        assert detect_format(document) == "swagger"
+        assert parse_openapi(document) == []
+        assert len(calls) == 1
+
 
 class TestOpenApiParser:
     def test_parse_petstore_endpoints_count(self):
@@ -152,6 +214,102 @@ paths:
             "$ref": "https://example.com/components.yaml#/requestBodies/Remote"
         }
 
+    def test_recursive_schema_keeps_ref_where_cycle_closes(self, tmp_path):
+        document = tmp_path / "recursive.yaml"
+        document.write_text(
+            """openapi: 3.0.0
+info: {title: Tree, version: 1.0.0}
+paths:
+  /nodes:
+    get:
+      responses:
+        '200':
+          description: OK
+          content:
+            application/json:
+              schema: {$ref: '#/components/schemas/Node'}
+components:
+  schemas:
+    Node:
+      type: object
+      properties:
+        children:
+          type: array
+          items: {$ref: '#/components/schemas/Node'}
+""",
+            encoding="utf-8",
+        )
+
+        schema = parse_openapi(document)[0].responses["200"]["schema"]
+
+        while "$ref" not in schema:
+            assert schema["type"] == "object"
+            schema = schema["properties"]["children"]["items"]
+        assert schema == {"$ref": "#/components/schemas/Node"}
+
+    def test_shared_schema_is_resolved_once_and_reused(self, tmp_path):
+        document = tmp_path / "shared.yaml"
+        document.write_text(
+            """openapi: 3.0.0
+info: {title: Shared, version: 1.0.0}
+paths:
+  /a:
+    get:
+      responses:
+        '200':
+          description: OK
+          content:
+            application/json:
+              schema: {$ref: '#/components/schemas/Wrapper'}
+  /b:
+    get:
+      responses:
+        '200':
+          description: OK
+          content:
+            application/json:
+              schema: {$ref: '#/components/schemas/Wrapper'}
+components:
+  schemas:
+    Wrapper:
+      type: object
+      properties:
+        pet: {$ref: '#/components/schemas/Pet'}
+    Pet:
+      type: object
+      properties:
+        name: {type: string}
+""",
+            encoding="utf-8",
+        )
+
+        first, second = (
+            endpoint.responses["200"]["schema"] for endpoint in parse_openapi(document)
+        )
+
+        assert first["properties"]["pet"] == {
+            "type": "object",
+            "properties": {"name": {"type": "string"}},
+        }
+        assert first["properties"]["pet"] is second["properties"]["pet"]
+
+
+class TestLoaderEquivalence:
+    @pytest.mark.parametrize("fixture", YAML_FIXTURES)
+    def test_json_and_yaml_loaders_produce_identical_endpoints(self, fixture, tmp_path):
+        source = FIXTURES / fixture
+        as_json = tmp_path / f"{source.stem}.json"
+        data = yaml.load(source.read_text(encoding="utf-8"), Loader=yaml.SafeLoader)
+        as_json.write_text(json.dumps(data, indent=2), encoding="utf-8")
+
+        assert parse_openapi(as_json) == parse_openapi(source)
+
+    def test_json_like_yaml_falls_back_to_yaml_loader(self):
+        assert load_structured("{openapi: 3.0.0, paths: {}}") == {
+            "openapi": "3.0.0",
+            "paths": {},
+        }
+
 
 class TestSwagger2Parser:
     def test_parses_body_parameters_and_security_inheritance(self):
@@ -1,10 +1,14 @@
+import json
+import time
 from unittest.mock import MagicMock, patch
 
 import pytest
 
+from api_test_gen.generator.prompt_json import endpoint_json
 from api_test_gen.generator.testcase import TestCaseGenerator
 from api_test_gen.generator.testcase_document import TestCaseDocumentError
-from api_test_gen.parser.base import ApiEndpoint
+from api_test_gen.parser.base import ApiEndpoint, Param
+from api_test_gen.ratelimit import estimate_tokens
 
 MOCK_LLM_RESPONSE = """```json
 [
@@ -96,4 +100,220 @@ class TestTestCaseGenerator:
                 [self._make_endpoint(), self._make_endpoint()]
             )
 
+        mock_client.call.assert_not_called()
+
+    @patch("api_test_gen.generator.testcase.LlmClient")
+    def test_parallel_generation_keeps_endpoint_order(self, MockLlmClient):
+        def respond(system, user, cache_breakpoints=()):
+            # Later endpoints answer first so completion order is reversed.
+            index = int(user.split("/items")[1].split('"')[0])
+            time.sleep(0.05 * (3 - index))
+            return json.dumps(
+                [
+                    {
+                        "scenario": f"item {index}",
+                        "input": None,
+                        "expected_status": 200,
+                        "expected_response": "ok",
+                        "priority": "P0",
+                    }
+                ]
+            )
+
+        mock_client = MagicMock()
+        mock_client.call.side_effect = respond
+        MockLlmClient.return_value = mock_client
+        endpoints = [
+            ApiEndpoint(method="GET", path=f"/items{index}") for index in range(3)
+        ]
+
+        result = TestCaseGenerator(model="test-model", jobs=3).generate(
+            endpoints, start_index=5
+        )
+
+        assert result.index("## GET /items0") < result.index("## GET /items1")
+        assert result.index("## GET /items1") < result.index("## GET /items2")
+        assert "| TC-005 | item 0 |" in result
+        assert "| TC-006 | item 1 |" in result
+        assert "| TC-007 | item 2 |" in result
+        assert mock_client.call.call_count == 3
+
+
+class TestPromptPrefixCaching:
+    @patch("api_test_gen.generator.testcase.LlmClient")
+    def test_system_prompt_starts_with_shared_prefix(self, MockLlmClient):
+        mock_client = MagicMock()
+        mock_client.call.return_value = MOCK_LLM_RESPONSE
+        MockLlmClient.return_value = mock_client
+        endpoints = [
+            ApiEndpoint(method="GET", path="/health"),
+            ApiEndpoint(
+                method="GET",
+                path="/pets",
+                parameters=[Param(name="page", location="query")],
+            ),
+        ]
+
+        TestCaseGenerator(model="test-model").generate(endpoints)
+
+        calls = [call.kwargs for call in mock_client.call.call_args_list]
+        prefixes = {call["system"][: call["cache_breakpoints"][0]] for call in calls}
+        assert len(prefixes) == 1
+        assert calls[0]["system"] != calls[1]["system"]
+        for call in calls:
+            assert call["cache_breakpoints"][-1] == len(call["system"])
+
+    @patch("api_test_gen.generator.testcase.LlmClient")
+    def test_requests_are_grouped_by_skill_set(self, MockLlmClient):
+        mock_client = MagicMock()
+        mock_client.call.return_value = MOCK_LLM_RESPONSE
+        MockLlmClient.return_value = mock_client
+        paged = [Param(name="page", location="query")]
+        endpoints = [
+            ApiEndpoint(method="GET", path="/a", parameters=paged),
+            ApiEndpoint(method="GET", path="/b"),
+            ApiEndpoint(method="GET", path="/c", parameters=paged),
+            ApiEndpoint(method="GET", path="/d"),
+        ]
+
+        result = TestCaseGenerator(model="test-model").generate(endpoints)
+
+        systems = [call.kwargs["system"] for call in mock_client.call.call_args_list]
+        assert systems[0] == systems[1]
+        assert systems[2] == systems[3]
+        assert systems[1] != systems[2]
+        headings = [line for line in result.splitlines() if line.startswith("## ")]
+        assert headings == ["## GET /a", "## GET /b", "## GET /c", "## GET /d"]
+
+
+def _batch_response(drafts_by_key):
+    return "```json\n" + json.dumps(drafts_by_key, ensure_ascii=False) + "\n```"
+
+
+def _draft(scenario):
+    return {
+        "scenario": scenario,
+        "input": None,
+        "expected_status": 200,
+        "expected_response": "ok",
+        "priority": "P0",
+    }
+
+
+class TestBatching:
+    @patch("api_test_gen.generator.testcase.LlmClient")
+    def test_endpoints_share_one_request(self, MockLlmClient):
+        mock_client = MagicMock()
+        mock_client.call.return_value = _batch_response(
+            {"GET /a": [_draft("a")], "GET /b": [_draft("b")], "GET /c": [_draft("c")]}
+        )
+        MockLlmClient.return_value = mock_client
+        endpoints = [ApiEndpoint(method="GET", path=f"/{name}") for name in "abc"]
+
+        result = TestCaseGenerator(model="test-model", batch_tokens=10_000).generate(
+            endpoints
+        )
+
         mock_client.call.assert_called_once()
+        user_prompt = mock_client.call.call_args.kwargs["user"]
+        assert "### GET /a" in user_prompt
+        assert "### GET /c" in user_prompt
+        assert "| TC-001 | a |" in result
+        assert "| TC-003 | c |" in result
+
+    @patch("api_test_gen.generator.testcase.LlmClient")
+    def test_batches_respect_skill_sets_and_budget(self, MockLlmClient):
+        def respond(system, user, cache_breakpoints=()):
+            keys = [
+                line.removeprefix("### ")
+                for line in user.splitlines()
+                if line.startswith("### ")
+            ]
+            if not keys:
+                return json.dumps([_draft("single")])
+            return _batch_response({key: [_draft(key)] for key in keys})
+
+        mock_client = MagicMock()
+        mock_client.call.side_effect = respond
+        MockLlmClient.return_value = mock_client
+        paged = [Param(name="page", location="query")]
+        endpoints = [
+            ApiEndpoint(method="GET", path="/a"),
+            ApiEndpoint(method="GET", path="/b", parameters=paged),
+            ApiEndpoint(method="GET", path="/c"),
+        ]
+        budget = 2 * estimate_tokens(endpoint_json(endpoints[0]))
+
+        TestCaseGenerator(model="test-model", batch_tokens=budget).generate(endpoints)
+
+        users = [call.kwargs["user"] for call in mock_client.call.call_args_list]
+        assert len(users) == 2
+        assert "### GET /a" in users[0] and "### GET /c" in users[0]
+        assert "GET /b" not in users[0]
+
+    @patch("api_test_gen.generator.testcase.LlmClient")
+    def test_only_invalid_endpoints_are_retried(self, MockLlmClient):
+        mock_client = MagicMock()
+        mock_client.call.side_effect = [
+            _batch_response({"GET /a": [_draft("a")], "GET /b": []}),
+            json.dumps([_draft("b retried")]),
+        ]
+        MockLlmClient.return_value = mock_client
+        endpoints = [ApiEndpoint(method="GET", path=f"/{name}") for name in "ab"]
+
+        result = TestCaseGenerator(model="test-model", batch_tokens=10_000).generate(
+            endpoints
+        )
+
+        assert mock_client.call.call_count == 2
+        retry_prompt = mock_client.call.call_args.kwargs["user"]
+        assert "/b" in retry_prompt and "/a" not in retry_prompt
+        assert "| TC-002 | b retried |" in result
+        mock_client.discard.assert_not_called()
+
+
+class TestStreaming:
+    @patch("api_test_gen.generator.testcase.LlmClient")
+    def test_sections_are_yielded_before_later_endpoints_finish(self, MockLlmClient):
+        finished = []
+
+        def respond(system, user, cache_breakpoints=()):
+            finished.append(user)
+            return json.dumps([_draft("ok")])
+
+        mock_client = MagicMock()
+        mock_client.call.side_effect = respond
+        MockLlmClient.return_value = mock_client
+        endpoints = [ApiEndpoint(method="GET", path=f"/{name}") for name in "abc"]
+
+        sections = TestCaseGenerator(model="test-model").iter_sections(endpoints)
+
+        assert next(sections).startswith("## GET /a")
+        assert len(finished) == 1
+        assert [section.splitlines()[0] for section in sections] == [
+            "## GET /b",
+            "## GET /c",
+        ]
+
+    @patch("api_test_gen.generator.testcase.LlmClient")
+    def test_parallel_sections_follow_input_order(self, MockLlmClient):
+        def respond(system, user, cache_breakpoints=()):
+            name = user.split('"path":"/')[1][0]
+            time.sleep({"a": 0.1, "b": 0.0, "c": 0.05}[name])
+            return json.dumps([_draft(name)])
+
+        mock_client = MagicMock()
+        mock_client.call.side_effect = respond
+        MockLlmClient.return_value = mock_client
+        endpoints = [ApiEndpoint(method="GET", path=f"/{name}") for name in "abc"]
+
+        sections = list(
+            TestCaseGenerator(model="test-model", jobs=3).iter_sections(endpoints)
+        )
+
+        assert [section.splitlines()[0] for section in sections] == [
+            "## GET /a",
+            "## GET /b",
+            "## GET /c",
+        ]
+        assert "| TC-003 | c |" in sections[2]
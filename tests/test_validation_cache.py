@@ -0,0 +1,156 @@
+from unittest.mock import MagicMock, patch
+
+from api_test_gen.cache import ResponseCache
+from api_test_gen.generator.collect_worker import CollectWorker
+from api_test_gen.generator.validation_cache import (
+    ValidationCache,
+    collect_keys,
+    static_key,
+)
+from api_test_gen.generator.validator import validate_collect, validate_files
+
+LAYERED = {
+    "config/settings.py": "BASE_URL = 'http://localhost'\n",
+    "base/client.py": "from config.settings import BASE_URL\n",
+    "api/users_api.py": "from base.client import *\n",
+    "api/pets_api.py": "from base.client import *\n",
+    "tests/conftest.py": "import pytest\n",
+    "tests/test_users.py": "from api.users_api import *\n\ndef test_x():\n    pass\n",
+    "tests/test_pets.py": "from api.pets_api import *\n\ndef test_y():\n    pass\n",
+}
+MODULES = ["tests/test_pets.py", "tests/test_users.py"]
+
+
+class TestKeys:
+    def test_static_key_depends_on_content_only(self):
+        assert static_key("a.py", "x = 1\n") == static_key("b.py", "x = 1\n")
+        assert static_key("a.py", "x = 1\n") != static_key("a.py", "x = 2\n")
+        assert static_key("a.py", "x: 1\n") != static_key("a.yaml", "x: 1\n")
+
+    def test_module_key_follows_transitive_imports(self):
+        before = collect_keys(LAYERED, MODULES)
+        files = dict(LAYERED, **{"config/settings.py": "BASE_URL = 'x'\n"})
+
+        after = collect_keys(files, MODULES)
+
+        assert after["tests/test_users.py"] != before["tests/test_users.py"]
+        assert after["tests/test_pets.py"] != before["tests/test_pets.py"]
+
+    def test_unrelated_module_change_keeps_key(self):
+        before = collect_keys(LAYERED, MODULES)
+        files = dict(LAYERED, **{"api/pets_api.py": "import os\n"})
+
+        after = collect_keys(files, MODULES)
+
+        assert after["tests/test_users.py"] == before["tests/test_users.py"]
+        assert after["tests/test_pets.py"] != before["tests/test_pets.py"]
+
+    def test_conftest_and_data_files_are_dependencies(self):
+        before = collect_keys(LAYERED, MODULES)
+
+        conftest = collect_keys(dict(LAYERED, **{"tests/conftest.py": "\n"}), MODULES)
+        data = collect_keys(dict(LAYERED, **{"data/users.yaml": "a: 1\n"}), MODULES)
+
+        assert conftest["tests/test_users.py"] != before["tests/test_users.py"]
+        assert data["tests/test_users.py"] != before["tests/test_users.py"]
+
+    def test_relative_imports_are_resolved(self):
+        files = {
+            "pkg/__init__.py": "",
+            "pkg/helpers.py": "VALUE = 1\n",
+            "pkg/test_a.py": "from .helpers import VALUE\n",
+        }
+        before = collect_keys(files, ["pkg/test_a.py"])
+
+        after = collect_keys(
+            dict(files, **{"pkg/helpers.py": "VALUE = 2\n"}), ["pkg/test_a.py"]
+        )
+
+        assert after != before
+
+
+class TestValidationCache:
+    def test_results_survive_across_instances_on_disk(self, tmp_path):
+        ValidationCache.on_disk(tmp_path).put("key", "")
+
+        cache = ValidationCache(ResponseCache(tmp_path))
+
+        assert cache.get("key") == ""
+        assert cache.get("other") is None
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    @patch("api_test_gen.generator.validator.validate_collect", return_value={})
+    @patch("api_test_gen.generator.validator.validate_python", return_value={})
+    def test_static_checks_skip_unchanged_content(self, mock_python, _collect):
+        cache = ValidationCache()
+        files = {"a.py": "x = 1\n", "b.yaml": "a: 1\n", "notes.md": "# hi\n"}
+
+        validate_files(files, cache)
+        validate_files(dict(files, **{"a.py": "x = 2\n"}), cache)
+
+        checked = [call.args[0] for call in mock_python.call_args_list]
+        assert checked == [
+            {"a.py": "x = 1\n", "b.yaml": "a: 1\n"},
+            {"a.py": "x = 2\n"},
+        ]
+
+    @patch("api_test_gen.generator.validator.shared_worker")
+    def test_collect_requests_only_modules_with_changed_inputs(self, mock_shared):
+        worker = MagicMock()
+        worker.collect.return_value = {"tests/test_pets.py": "ImportError"}
+        mock_shared.return_value = worker
+        cache = ValidationCache()
+
+        assert validate_collect(LAYERED, cache) == {"tests/test_pets.py": "ImportError"}
+        assert worker.collect.call_args.kwargs["targets"] == MODULES
+
+        worker.collect.return_value = {}
+        files = dict(LAYERED, **{"api/pets_api.py": "import os\n"})
+        assert validate_collect(files, cache) == {}
+        assert worker.collect.call_args.kwargs["targets"] == ["tests/test_pets.py"]
+
+        worker.collect.reset_mock()
+        assert validate_collect(files, cache) == {}
+        worker.collect.assert_not_called()
+
+    @patch("api_test_gen.generator.validator.shared_worker")
+    def test_unattributed_errors_are_not_cached(self, mock_shared):
+        worker = MagicMock()
+        worker.collect.return_value = {"_collect": "conftest exploded"}
+        mock_shared.return_value = worker
+        cache = ValidationCache()
+
+        validate_collect(LAYERED, cache)
+        validate_collect(LAYERED, cache)
+
+        assert worker.collect.call_count == 2
+
+    @patch("api_test_gen.generator.validator.shared_worker")
+    def test_collect_failures_are_not_persisted(self, mock_shared, tmp_path):
+        worker = MagicMock()
+        worker.collect.return_value = {"tests/test_pets.py": "No module named 'faker'"}
+        mock_shared.return_value = worker
+
+        validate_collect(LAYERED, ValidationCache.on_disk(tmp_path))
+        worker.collect.return_value = {}
+        validate_collect(LAYERED, ValidationCache.on_disk(tmp_path))
+
+        assert worker.collect.call_args.kwargs["targets"] == ["tests/test_pets.py"]
+
+
+class TestWorkerTargets:
+    def test_targets_limit_collection_and_force_a_full_round_later(self):
+        worker = CollectWorker()
+        try:
+            files = {
+                "test_a.py": "import missing_a\n",
+                "test_b.py": "import missing_b\n",
+            }
+            assert list(worker.collect(files, targets=["test_b.py"])) == ["test_b.py"]
+            assert worker.last_collected == ["test_b.py"]
+
+            files["test_b.py"] = "def test_b():\n    pass\n"
+            assert list(worker.collect(files)) == ["test_a.py"]
+            assert worker.last_collected == ["test_a.py", "test_b.py"]
+        finally:
+            worker.close()
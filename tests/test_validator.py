@@ -1,12 +1,17 @@
-import subprocess
-import sys
-from unittest.mock import MagicMock, patch
+from importlib import metadata
 
-from api_test_gen.generator.validator import (
+import pytest
+
+from api_test_gen.generator import validator
+from api_test_gen.generator.collect_worker import (
     COLLECT_TIMEOUT_SECONDS,
+    CollectWorker,
+)
+from api_test_gen.generator.validator import (
     validate_collect,
     validate_files,
     validate_python,
+    validate_references,
     validate_yaml,
 )
 
@@ -30,6 +35,35 @@ class TestValidatePython:
         assert errors == {}
 
 
+class TestProcessPoolChecks:
+    def test_parallel_results_match_in_process_order(self, monkeypatch):
+        monkeypatch.setattr(validator, "PARALLEL_MIN_FILES", 4)
+        files = {
+            f"test_{index}.py": "def broken(\n" if index % 3 == 0 else "x = 1\n"
+            for index in range(12)
+        }
+        files.update({"bad.yaml": "key: [invalid\n", "ok.yaml": "a: 1\n"})
+
+        sequential = {
+            **validate_python(files, workers=1),
+            **validate_yaml(files, workers=1),
+        }
+        parallel = {
+            **validate_python(files, workers=2),
+            **validate_yaml(files, workers=2),
+        }
+
+        assert list(parallel) == list(sequential)
+        assert parallel == sequential
+        assert list(parallel) == [
+            "test_0.py",
+            "test_3.py",
+            "test_6.py",
+            "test_9.py",
+            "bad.yaml",
+        ]
+
+
 class TestValidateYaml:
     def test_valid_yaml(self):
         errors = validate_yaml({"users.yaml": "name: test\nage: 20\n"})
@@ -44,6 +78,89 @@ class TestValidateYaml:
         assert errors == {}
 
 
+LAYERED_FILES = {
+    "api/__init__.py": "",
+    "api/users_api.py": "from base.client import HttpClient\n\n"
+    "class UsersApi:\n    pass\n",
+    "base/__init__.py": "",
+    "base/config.py": "BASE_URL = 'http://localhost'\n",
+    "base/client.py": "from .config import BASE_URL\n\nclass HttpClient:\n    pass\n",
+    "tests/conftest.py": "import pytest\n\n@pytest.fixture\ndef users_api():\n"
+    "    return None\n\n@pytest.fixture(name='token')\ndef _token():\n"
+    "    return ''\n",
+}
+
+
+class TestValidateReferences:
+    def _check(self, test_module):
+        return validate_references(
+            {**LAYERED_FILES, "tests/test_users.py": test_module}
+        )
+
+    def test_valid_project_passes(self):
+        errors = self._check(
+            "import pytest\nimport requests\nfrom api.users_api import UsersApi\n\n"
+            "class TestUsers:\n"
+            "    @pytest.mark.parametrize('payload, status', [({}, 200)])\n"
+            "    def test_create(self, users_api, token, payload, status, tmp_path):\n"
+            "        pass\n"
+        )
+        assert errors == {}
+
+    def test_wrong_class_name_is_reported(self):
+        errors = self._check("from api.users_api import UserApi\n")
+        assert errors == {
+            "tests/test_users.py": "ImportError: cannot import name 'UserApi' "
+            "from 'api.users_api' (line 1)"
+        }
+
+    def test_missing_module_is_reported(self):
+        errors = self._check("import api.user_api\n")
+        assert "No module named 'api.user_api'" in errors["tests/test_users.py"]
+
+    def test_broken_relative_import_is_reported_for_its_module(self):
+        files = dict(LAYERED_FILES)
+        files["base/client.py"] = files["base/client.py"].replace("config", "settings")
+        assert list(validate_references(files)) == ["base/client.py"]
+
+    def test_unknown_fixture_is_reported(self):
+        errors = self._check("def test_list(user_api, token):\n    pass\n")
+        assert errors == {
+            "tests/test_users.py": "fixture 'user_api' not found for test_list (line 1)"
+        }
+
+    def test_third_party_and_guarded_imports_are_ignored(self):
+        errors = self._check(
+            "import requests\nfrom yaml import safe_load\n"
+            "try:\n    from api.optional import Extra\nexcept ImportError:\n"
+            "    Extra = None\n"
+        )
+        assert errors == {}
+
+    def test_star_imports_and_plugins_disable_checks(self):
+        files = dict(LAYERED_FILES)
+        files["api/__init__.py"] = "from api.users_api import *\n"
+        files["tests/test_users.py"] = (
+            "from api import Anything\npytest_plugins = ['x']\n\n"
+            "def test_x(provided_by_plugin):\n    pass\n"
+        )
+        assert validate_references(files) == {}
+
+    def test_installed_plugin_fixtures_are_known(self, monkeypatch, tmp_path):
+        (tmp_path / "fake_mock_plugin.py").write_text(
+            "import pytest\n\n@pytest.fixture\ndef mocker():\n    return None\n"
+        )
+        monkeypatch.syspath_prepend(str(tmp_path))
+        plugin = metadata.EntryPoint("fake_mock", "fake_mock_plugin", "pytest11")
+        monkeypatch.setattr(validator.metadata, "entry_points", lambda group: [plugin])
+        validator._plugin_fixtures.cache_clear()
+        try:
+            errors = self._check("def test_list(mocker, token):\n    pass\n")
+        finally:
+            validator._plugin_fixtures.cache_clear()
+        assert errors == {}
+
+
 class TestValidateCollect:
     def test_valid_tests_collect(self):
         files = {
@@ -65,25 +182,73 @@ class TestValidateCollect:
         errors = validate_collect(files)
         assert errors == {}
 
-    @patch("api_test_gen.generator.validator.subprocess.run")
-    def test_uses_current_interpreter_and_timeout(self, mock_run):
-        mock_run.return_value = MagicMock(returncode=0, stderr="", stdout="")
+    def test_import_error_is_reported_for_its_module(self):
+        files = {
+            "tests/__init__.py": "",
+            "tests/test_bad.py": "import nonexistent_module\n",
+            "tests/test_ok.py": "def test_ok():\n    pass\n",
+        }
+        errors = validate_collect(files)
+        assert list(errors) == ["tests/test_bad.py"]
+        assert "nonexistent_module" in errors["tests/test_bad.py"]
+
 
-        errors = validate_collect({"test_ok.py": "def test_ok():\n    assert True\n"})
+class TestCollectWorker:
+    @pytest.fixture
+    def worker(self):
+        worker = CollectWorker()
+        yield worker
+        worker.close()
 
-        assert errors == {}
-        command = mock_run.call_args.args[0]
-        assert command[:3] == [sys.executable, "-m", "pytest"]
-        assert mock_run.call_args.kwargs["timeout"] == COLLECT_TIMEOUT_SECONDS
+    def test_recollects_only_changed_test_modules(self, worker):
+        files = {
+            "test_a.py": "def test_a():\n    pass\n",
+            "test_b.py": "import missing_dependency\n",
+        }
+        assert list(worker.collect(files)) == ["test_b.py"]
+        assert worker.last_collected == ["test_a.py", "test_b.py"]
+        pid = worker._process.pid
+
+        files["test_b.py"] = "def test_b():\n    pass\n"
+        assert worker.collect(files) == {}
+        assert worker.last_collected == ["test_b.py"]
+        assert worker._process.pid == pid
 
-    @patch("api_test_gen.generator.validator.subprocess.run")
-    def test_collection_timeout_is_reported(self, mock_run):
-        mock_run.side_effect = subprocess.TimeoutExpired("pytest", 30)
+    def test_helper_change_recollects_every_test_module(self, worker):
+        files = {
+            "conftest.py": "",
+            "test_a.py": "from helpers import VALUE\n\ndef test_a():\n    pass\n",
+            "helpers.py": "VALUE = 1\n",
+        }
+        assert worker.collect(files) == {}
+
+        del files["helpers.py"]
+        errors = worker.collect(files)
+
+        assert worker.last_collected == ["test_a.py"]
+        assert "helpers" in errors["test_a.py"]
+
+    def test_collection_timeout_is_reported(self):
+        worker = CollectWorker(timeout=1)
+        try:
+            errors = worker.collect({"test_slow.py": "import time\ntime.sleep(30)\n"})
+            assert errors == {"_collect": "pytest collection timed out after 1 seconds"}
+            assert worker.collect({"test_ok.py": "def test_ok():\n    pass\n"}) == {}
+        finally:
+            worker.close()
+
+    def test_crash_reports_worker_stderr(self, worker):
+        crash = "import faulthandler\nfaulthandler._sigsegv()\n"
 
-        errors = validate_collect({"test_slow.py": "def test_slow():\n    pass\n"})
+        errors = worker.collect({"test_crash.py": crash})
 
-        assert "_collect" in errors
-        assert "timed out" in errors["_collect"]
+        message = errors["_collect"]
+        assert message.startswith("pytest collection worker exited unexpectedly")
+        assert "Segmentation fault" in message and "test_crash.py" in message
+        assert worker.collect({"test_ok.py": "def test_ok():\n    pass\n"}) == {}
+
+    def test_default_timeout(self):
+        assert CollectWorker().timeout == COLLECT_TIMEOUT_SECONDS
 
 
 class TestValidateFiles:
@@ -104,6 +269,18 @@ class TestValidateFiles:
         errors = validate_files(files)
         assert "test_bad.py" in errors
 
+    def test_reference_errors_skip_collection(self, monkeypatch):
+        def fail(*args, **kwargs):
+            raise AssertionError("collection should not run")
+
+        monkeypatch.setattr(validator, "validate_collect", fail)
+        files = {
+            "helpers.py": "VALUE = 1\n",
+            "test_ok.py": "from helpers import VALEU\n",
+        }
+        errors = validate_files(files)
+        assert "cannot import name 'VALEU'" in errors["test_ok.py"]
+
     def test_yaml_error_caught(self):
         files = {
             "test_ok.py": "x = 1\n",